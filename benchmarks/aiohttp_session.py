@@ -0,0 +1,132 @@
+"""Compare a default aiohttp session with one from create_session().
+
+A stand-in server answers every request with a small JSON body after a fixed
+delay, imitating GitHub's latency. Each new connection first waits for a
+simulated TCP and TLS handshake and each DNS lookup takes a simulated
+round trip, so the cost of reconnecting is roughly what it is against GitHub.
+
+The workload is bursts of concurrent getitem() calls with idle pauses in
+between, like a bot handling webhook events or a job polling the API. The
+pauses are longer than how long a default session keeps connections alive
+and caches DNS lookups, but shorter than for create_session(). The time the
+bursts after the first took, the connections the server saw, and the DNS
+lookups made are reported.
+
+This takes about a minute. Run with ``python benchmarks/aiohttp_session.py``.
+"""
+
+import asyncio
+import time
+
+import aiohttp
+
+from gidgethub import aiohttp as gh_aiohttp
+
+DELAY = 0.05
+HANDSHAKE = 0.1
+DNS_LOOKUP = 0.02
+BURSTS = 3
+BURST_SIZE = 50
+PAUSE = 20
+BODY = b'{"resources": {"core": {"limit": 5000, "remaining": 4999}}}'
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"content-type: application/json; charset=utf-8\r\n"
+    b"content-length: %d\r\n"
+    b"x-ratelimit-limit: 5000\r\n"
+    b"x-ratelimit-remaining: 4999\r\n"
+    b"x-ratelimit-reset: 0\r\n\r\n" % len(BODY)
+) + BODY
+
+
+class HTTP11Protocol(asyncio.Protocol):
+    """Answer HTTP/1.1 GET requests, keeping the connection open."""
+
+    connections = 0
+
+    def connection_made(self, transport):
+        type(self).connections += 1
+        self.transport = transport
+        self.buffer = b""
+        # Requests are answered in order, after the handshake.
+        self.ready = time.monotonic() + HANDSHAKE
+
+    def data_received(self, data):
+        self.buffer += data
+        while b"\r\n\r\n" in self.buffer:
+            _, self.buffer = self.buffer.split(b"\r\n\r\n", 1)
+            start = max(time.monotonic(), self.ready)
+            asyncio.get_running_loop().call_later(
+                start - time.monotonic() + DELAY, self.respond
+            )
+
+    def respond(self):
+        if not self.transport.is_closing():
+            self.transport.write(RESPONSE)
+
+
+DNS_LOOKUPS = 0
+
+
+def slow_dns(loop):
+    """Make DNS lookups, as aiohttp does them, take a simulated round trip."""
+    getaddrinfo = loop.getaddrinfo
+
+    async def slow_getaddrinfo(host, *args, **kwargs):
+        global DNS_LOOKUPS
+        DNS_LOOKUPS += 1
+        await asyncio.sleep(DNS_LOOKUP)
+        return await getaddrinfo("127.0.0.1", *args, **kwargs)
+
+    loop.getaddrinfo = slow_getaddrinfo
+
+
+async def run(tuned):
+    global DNS_LOOKUPS
+    HTTP11Protocol.connections = DNS_LOOKUPS = 0
+    loop = asyncio.get_running_loop()
+    slow_dns(loop)
+    server = await loop.create_server(HTTP11Protocol, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    session = gh_aiohttp.create_session() if tuned else aiohttp.ClientSession()
+    burst_times = []
+    try:
+        async with session:
+            gh = gh_aiohttp.GitHubAPI(
+                session, "gidgethub-benchmarks", base_url=f"http://github.test:{port}"
+            )
+            for burst in range(BURSTS):
+                if burst:
+                    await asyncio.sleep(PAUSE)
+                start = time.perf_counter()
+                await asyncio.gather(
+                    *(gh.getitem("/rate_limit") for _ in range(BURST_SIZE))
+                )
+                burst_times.append(time.perf_counter() - start)
+    finally:
+        server.close()
+        await server.wait_closed()
+    return burst_times
+
+
+def main():
+    print(
+        f"{BURSTS} bursts of {BURST_SIZE} requests, {PAUSE} s apart; "
+        f"{DELAY * 1000:.0f} ms server latency, {HANDSHAKE * 1000:.0f} ms "
+        f"handshakes, {DNS_LOOKUP * 1000:.0f} ms DNS lookups\n"
+    )
+    print(
+        f"{'session':<18} {'1st burst':>10} {'later bursts':>13} "
+        f"{'connections':>11} {'DNS lookups':>11}"
+    )
+    for name, tuned in [("ClientSession()", False), ("create_session()", True)]:
+        first, *later = asyncio.run(run(tuned))
+        print(
+            f"{name:<18} {first * 1000:>7.0f} ms "
+            f"{sum(later) / len(later) * 1000:>10.0f} ms "
+            f"{HTTP11Protocol.connections:>11} {DNS_LOOKUPS:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
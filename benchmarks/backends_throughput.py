@@ -0,0 +1,221 @@
+"""Compare the throughput of the backends against a local stand-in for GitHub.
+
+The server from ``benchmarks/mock_github.py`` runs in a process of its own
+and each run of a backend in another, so they do not compete for the GIL and
+the peak memory of each run can be told apart. Each run has a number of
+concurrent workers repeat one of these workloads for a fixed time:
+
+- ``getitem``: get a single pull request (17 KB)
+- ``getitem-cached``: the same with a cache, so that every response is a 304
+- ``getiter``: iterate over the 3 pages of pull requests (1.1 MB)
+- ``graphql``: make a GraphQL query
+
+The backends' clients are created with their factories, allowing at least as
+many connections as there are workers. The requests made per second, the
+50th and 99th percentile latency of those requests (as measured by a request
+listener), and the peak RSS of the process are reported. Pass ``--help`` to
+see how to pick the backends, workloads, concurrency levels, duration, and
+server latency; with the defaults this takes about three minutes.
+
+Requires aiohttp, httpx, and tornado. Run with
+``python benchmarks/backends_throughput.py``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BACKENDS = ["aiohttp", "httpx", "tornado", "asyncio"]
+WORKLOADS = ["getitem", "getitem-cached", "getiter", "graphql"]
+CONCURRENCY = [1, 10, 50]
+MAX_CONNECTIONS = 100
+QUERY = """
+query {
+  viewer {
+    name
+    repositories(first: 10) { nodes { name } }
+  }
+}
+"""
+
+
+class LatencyListener:
+    """Record the status and duration of every request."""
+
+    def __init__(self):
+        self.durations = []
+        self.errors = 0
+
+    def request_finished(self, metrics):
+        if metrics.status_code not in {200, 304}:
+            self.errors += 1
+        self.durations.append(metrics.duration)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run(backend, workload, concurrency, base_url, duration):
+    """Run a workload, returning the requests made and their durations."""
+    listener = LatencyListener()
+    cache = {} if workload == "getitem-cached" else None
+    kwargs = {"base_url": base_url, "cache": cache, "request_listeners": [listener]}
+    if backend == "aiohttp":
+        from gidgethub import aiohttp as gh_aiohttp
+
+        client = gh_aiohttp.create_session(limit=MAX_CONNECTIONS)
+        gh = gh_aiohttp.GitHubAPI(client, "gidgethub-benchmarks", **kwargs)
+    elif backend == "httpx":
+        from gidgethub import httpx as gh_httpx
+
+        client = gh_httpx.create_client(http2=False, max_connections=MAX_CONNECTIONS)
+        gh = gh_httpx.GitHubAPI(client, "gidgethub-benchmarks", **kwargs)
+    elif backend == "tornado":
+        from gidgethub import tornado as gh_tornado
+
+        client = gh_tornado.create_client(max_clients=MAX_CONNECTIONS)
+        gh = gh_tornado.GitHubAPI("gidgethub-benchmarks", client=client, **kwargs)
+    else:
+        from gidgethub import asyncio as gh_asyncio
+
+        client = gh_asyncio.ConnectionPool(max_connections_per_host=MAX_CONNECTIONS)
+        gh = gh_asyncio.GitHubAPI(client, "gidgethub-benchmarks", **kwargs)
+
+    async def operation():
+        if workload == "getiter":
+            async for _ in gh.getiter("/repos/gidgethub/gidgethub/pulls"):
+                pass
+        elif workload == "graphql":
+            await gh.graphql(QUERY, endpoint=f"{base_url}/graphql")
+        else:
+            await gh.getitem(
+                "/repos/{owner}/{repo}/pulls/{number}",
+                {"owner": "gidgethub", "repo": "gidgethub", "number": 1},
+            )
+
+    async def worker(deadline):
+        while time.perf_counter() < deadline:
+            await operation()
+
+    try:
+        # Warm up the connections (and the cache).
+        await asyncio.gather(*(operation() for _ in range(concurrency)))
+        listener.durations.clear()
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(worker(deadline) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    finally:
+        if backend == "tornado":
+            client.close()
+        elif backend == "httpx":
+            await client.aclose()
+        else:
+            await client.close()
+    return listener, elapsed
+
+
+def child(backend, workload, concurrency, base_url, duration):
+    """Run a workload and print the results as JSON."""
+    listener, elapsed = asyncio.run(
+        run(backend, workload, int(concurrency), base_url, float(duration))
+    )
+    durations = listener.durations
+    # Kilobytes on Linux, bytes on macOS.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss //= 1024
+    results = {
+        "requests_per_second": len(durations) / elapsed,
+        "p50": percentile(durations, 0.5),
+        "p99": percentile(durations, 0.99),
+        "peak_rss_mb": peak_rss / 1024,
+        "errors": listener.errors,
+    }
+    print(json.dumps(results))
+
+
+def start_server(latency):
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_github.py"),
+            f"--latency={latency}",
+            # Never run out.
+            "--rate-limit=1000000000",
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    return server, server.stdout.readline().strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--workloads", nargs="+", default=WORKLOADS, choices=WORKLOADS)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=CONCURRENCY)
+    parser.add_argument(
+        "--duration", type=float, default=3.0, help="seconds to run each workload"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds the server waits"
+    )
+    args = parser.parse_args()
+    server, base_url = start_server(args.latency)
+    # Import gidgethub from this checkout.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    print(f"{args.duration:g} s per run, {args.latency * 1000:g} ms server latency\n")
+    print(
+        f"{'workload':<15} {'workers':>7} {'backend':<8} {'req/s':>8} "
+        f"{'p50':>9} {'p99':>9} {'peak RSS':>9}"
+    )
+    try:
+        for workload in args.workloads:
+            for concurrency in args.concurrency:
+                for backend in args.backends:
+                    output = subprocess.run(
+                        [
+                            sys.executable,
+                            __file__,
+                            "--child",
+                            backend,
+                            workload,
+                            str(concurrency),
+                            base_url,
+                            str(args.duration),
+                        ],
+                        check=True,
+                        capture_output=True,
+                        env=env,
+                        text=True,
+                    ).stdout
+                    results = json.loads(output)
+                    line = (
+                        f"{workload:<15} {concurrency:>7} {backend:<8} "
+                        f"{results['requests_per_second']:>8.0f} "
+                        f"{results['p50'] * 1000:>6.1f} ms "
+                        f"{results['p99'] * 1000:>6.1f} ms "
+                        f"{results['peak_rss_mb']:>6.1f} MB"
+                    )
+                    if results["errors"]:
+                        line += f" ({results['errors']} errors)"
+                    print(line, flush=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(*sys.argv[2:])
+    else:
+        main()
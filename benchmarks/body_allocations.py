@@ -0,0 +1,75 @@
+"""Measure the memory allocated while decoding large response bodies.
+
+The "str copy" numbers re-create what decipher_response() did before UTF-8
+JSON bodies were handed straight to the JSON codec: decode the whole body to
+a str and then parse that. The "direct" numbers use the current code path.
+The peak includes the decoded objects themselves, which are the same either
+way, so the difference between the two is the cost of the copy.
+
+Besides the sample pages from the tests, a non-ASCII variant of the first
+page is measured, as a str of non-ASCII text takes 2-4 bytes per character.
+
+Run with ``python benchmarks/body_allocations.py``.
+"""
+
+import json
+import pathlib
+import tracemalloc
+
+from gidgethub import codec, sansio
+
+SAMPLES = pathlib.Path(__file__).parent.parent / "tests" / "samples"
+HEADERS = {"content-type": "application/json; charset=utf-8"}
+
+
+def bodies():
+    for name in ["pr_page_1", "pr_page_last", "pr_single"]:
+        yield name, (SAMPLES / name / "body").read_bytes()
+    data = json.loads((SAMPLES / "pr_page_1" / "body").read_bytes())
+    for item in data:
+        item["title"] += " ✨"
+    yield "pr_page_1 (non-ASCII)", json.dumps(data, ensure_ascii=False).encode()
+
+
+def codecs():
+    yield "json", codec.StdlibJSONCodec()
+    try:
+        yield "orjson", codec.OrjsonCodec()
+    except ImportError:
+        print("orjson is not installed; only measuring the json module\n")
+
+
+def decode_str_copy(body, json_codec):
+    return json_codec.decode(str(body, "utf-8"))
+
+
+def decode_direct(body, json_codec):
+    return sansio.decipher_response(200, HEADERS, body, json_codec=json_codec)[0]
+
+
+def peak(func, body, json_codec):
+    func(body, json_codec)  # Warm up any caches.
+    tracemalloc.start()
+    try:
+        func(body, json_codec)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    print(f"{'body':<24} {'bytes':>8} {'codec':<7} {'str copy':>10} {'direct':>10}")
+    for name, body in bodies():
+        for codec_name, json_codec in codecs():
+            # A memoryview shows that the body itself is not copied either.
+            view = memoryview(body)
+            before = peak(decode_str_copy, view, json_codec)
+            after = peak(decode_direct, view, json_codec)
+            print(
+                f"{name:<24} {len(body):>8} {codec_name:<7} "
+                f"{before / 1024:7.0f} KB {after / 1024:7.0f} KB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Compare HTTP/1.1 and HTTP/2 throughput of the httpx backend.
+
+A stand-in server answers every request with a small JSON body after a fixed
+delay, imitating GitHub's latency, over cleartext HTTP/1.1 and HTTP/2 (with
+prior knowledge, as there is no TLS to negotiate the protocol). Concurrent
+getitem() calls are made through clients from create_client(), and the
+throughput and the number of connections the server saw are reported.
+
+Over HTTP/1.1 every request in flight needs a connection of its own, so the
+throughput is capped by max_connections; over HTTP/2 the requests are
+multiplexed as streams over a single connection. The cost of the TLS
+handshakes which the extra HTTP/1.1 connections need against the real GitHub
+is not included.
+
+Requires the h2 package (``pip install httpx[http2]``). Run with
+``python benchmarks/httpx_http2.py``.
+"""
+
+import asyncio
+import time
+
+import h2.config
+import h2.connection
+import h2.events
+
+from gidgethub import httpx as gh_httpx
+
+DELAY = 0.05
+# The number of requests which gidgethub lets be in flight at once.
+CONCURRENCY = 100
+BODY = b'{"resources": {"core": {"limit": 5000, "remaining": 4999}}}'
+RESPONSE_HEADERS = [
+    ("content-type", "application/json; charset=utf-8"),
+    ("content-length", str(len(BODY))),
+    ("x-ratelimit-limit", "5000"),
+    ("x-ratelimit-remaining", "4999"),
+    ("x-ratelimit-reset", "0"),
+]
+
+
+class HTTP11Protocol(asyncio.Protocol):
+    """Answer HTTP/1.1 GET requests on a keep-alive connection."""
+
+    connections = 0
+
+    def connection_made(self, transport):
+        type(self).connections += 1
+        self.transport = transport
+        self.buffer = b""
+
+    def data_received(self, data):
+        self.buffer += data
+        while b"\r\n\r\n" in self.buffer:
+            _, self.buffer = self.buffer.split(b"\r\n\r\n", 1)
+            asyncio.get_running_loop().call_later(DELAY, self.respond)
+
+    def respond(self):
+        if self.transport.is_closing():
+            return
+        head = [b"HTTP/1.1 200 OK"]
+        head.extend(f"{name}: {value}".encode() for name, value in RESPONSE_HEADERS)
+        self.transport.write(b"\r\n".join(head) + b"\r\n\r\n" + BODY)
+
+
+class HTTP2Protocol(asyncio.Protocol):
+    """Answer HTTP/2 requests, each on its own stream of the connection."""
+
+    connections = 0
+
+    def connection_made(self, transport):
+        type(self).connections += 1
+        self.transport = transport
+        config = h2.config.H2Configuration(client_side=False)
+        self.conn = h2.connection.H2Connection(config=config)
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.StreamEnded):
+                asyncio.get_running_loop().call_later(
+                    DELAY, self.respond, event.stream_id
+                )
+        self.transport.write(self.conn.data_to_send())
+
+    def respond(self, stream_id):
+        if self.transport.is_closing():
+            return
+        self.conn.send_headers(stream_id, [(":status", "200")] + RESPONSE_HEADERS)
+        self.conn.send_data(stream_id, BODY, end_stream=True)
+        self.transport.write(self.conn.data_to_send())
+
+
+async def run(protocol, *, requests, max_connections):
+    protocol.connections = 0
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(protocol, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    http2 = protocol is HTTP2Protocol
+    try:
+        async with gh_httpx.create_client(
+            http2=http2, http1=not http2, max_connections=max_connections
+        ) as client:
+            gh = gh_httpx.GitHubAPI(
+                client,
+                "gidgethub-benchmarks",
+                base_url=f"http://127.0.0.1:{port}",
+                max_concurrency=CONCURRENCY,
+            )
+            start = time.perf_counter()
+            await asyncio.gather(*(gh.getitem("/rate_limit") for _ in range(requests)))
+            return time.perf_counter() - start
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def main(requests=1000):
+    print(
+        f"{requests} requests, {CONCURRENCY} at a time, "
+        f"{DELAY * 1000:.0f} ms server latency\n"
+    )
+    print(f"{'protocol':<10} {'max_connections':>15} {'connections':>11} {'req/s':>8}")
+    for protocol, name in [(HTTP11Protocol, "HTTP/1.1"), (HTTP2Protocol, "HTTP/2")]:
+        for max_connections in [10, 100]:
+            seconds = asyncio.run(
+                run(protocol, requests=requests, max_connections=max_connections)
+            )
+            print(
+                f"{name:<10} {max_connections:>15} {protocol.connections:>11} "
+                f"{requests / seconds:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark the available JSON codecs on the sample payloads of the tests.
+
+Every JSON body under ``tests/samples`` is decoded and re-encoded by each
+installed codec, and webhook events are parsed with
+:meth:`gidgethub.sansio.Event.from_http` and every codec.
+
+Run with ``python benchmarks/json_codecs.py``.
+"""
+
+import pathlib
+import timeit
+
+from gidgethub import codec, sansio
+
+SAMPLES = pathlib.Path(__file__).parent.parent / "tests" / "samples"
+EVENT_HEADERS = {
+    "content-type": "application/json",
+    "x-github-event": "pull_request",
+    "x-github-delivery": "72d3162e-cc78-11e3-81ab-4c9367dc0958",
+}
+
+
+def samples():
+    for path in sorted(SAMPLES.glob("*/body")) + sorted(SAMPLES.glob("GraphQL/*.json")):
+        data = path.read_bytes()
+        try:
+            codec.DEFAULT_CODEC.decode(data)
+        except ValueError:
+            continue
+        yield path.relative_to(SAMPLES).as_posix(), data
+
+
+def codecs():
+    yield "json", codec.StdlibJSONCodec()
+    try:
+        yield "orjson", codec.OrjsonCodec()
+    except ImportError:
+        print("orjson is not installed; only benchmarking the json module\n")
+
+
+def measure(func, data):
+    number = max(1, 2_000_000 // max(len(data), 1))
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    return seconds / number * 1e6
+
+
+def main():
+    bodies = list(samples())
+    json_codecs = list(codecs())
+    names = [name for name, _ in json_codecs]
+    print(f"{'sample':<56} {'bytes':>8} " + " ".join(f"{n:>16}" for n in names))
+    for sample, data in bodies:
+        for operation in ["decode", "encode", "from_http"]:
+            if operation == "from_http" and not sample.endswith("body"):
+                continue
+            results = []
+            for _, json_codec in json_codecs:
+                if operation == "decode":
+                    func = lambda: json_codec.decode(data)  # noqa: E731
+                elif operation == "encode":
+                    obj = json_codec.decode(data)
+                    func = lambda: json_codec.encode(obj)  # noqa: E731
+                else:
+                    func = lambda: sansio.Event.from_http(  # noqa: E731
+                        EVENT_HEADERS, data, json_codec=json_codec
+                    )
+                results.append(f"{measure(func, data):13.1f} µs")
+            label = f"{sample} ({operation})"
+            print(f"{label:<56} {len(data):>8} " + " ".join(results))
+
+
+if __name__ == "__main__":
+    main()
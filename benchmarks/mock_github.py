@@ -0,0 +1,274 @@
+"""A local stand-in for api.github.com serving the responses in tests/samples.
+
+The server speaks HTTP/1.1 with keep-alive, so all of the backends can be
+benchmarked against it without the network. These endpoints are served:
+
+- ``GET /repos/{owner}/{repo}/pulls/{number}``: the ``pr_single`` sample, or
+  ``pr_diff`` if a diff is accepted
+- ``GET /repos/{owner}/{repo}/pulls``: the ``pr_page_1``, ``pr_page_2``, and
+  ``pr_page_last`` samples as pages 1 to 3
+- ``GET /search/issues``: the ``search_issues_page_1`` and
+  ``search_issues_page_last`` samples as pages 1 and 2
+- ``POST /graphql``: the GraphQL ``success-200.json`` sample
+- ``GET /rate_limit``: the current rate limits
+
+Anything else is answered with the ``pr_not_found`` sample. Paged responses
+have Link headers pointing back at this server. Responses carry ETags, and a
+request whose If-None-Match matches is answered with a 304.
+
+Every response carries rate limit headers. The core, search, and graphql
+rate limits are tracked separately, as GitHub does. 304 responses are not
+charged. Once a rate limit is used up, requests are answered with a 403
+until the hour-long window resets.
+
+Run with ``python benchmarks/mock_github.py``, which prints the base URL to
+pass to GitHubAPI.
+"""
+
+import argparse
+import asyncio
+import email.utils
+import hashlib
+import json
+import pathlib
+import re
+import time
+import urllib.parse
+
+SAMPLES = pathlib.Path(__file__).parent.parent / "tests" / "samples"
+# How long a rate limit window lasts.
+WINDOW = 3600
+DEFAULT_LIMITS = {"core": 5000, "search": 30, "graphql": 5000}
+PULL_PAGES = ["pr_page_1", "pr_page_2", "pr_page_last"]
+SEARCH_PAGES = ["search_issues_page_1", "search_issues_page_last"]
+REASONS = {200: "OK", 304: "Not Modified", 403: "Forbidden", 404: "Not Found"}
+
+
+class Response:
+    """A recorded response body with the headers which matter to clients."""
+
+    def __init__(self, status_code, content_type, body):
+        self.status_code = status_code
+        self.content_type = content_type
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def load_sample(directory, status_code=200):
+    sample_dir = SAMPLES / directory
+    headers = json.loads((sample_dir / f"{status_code}.json").read_text())
+    body = (sample_dir / "body").read_bytes()
+    return Response(status_code, headers["content-type"], body)
+
+
+class RateLimit:
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.reset = int(time.time()) + WINDOW
+
+    def charge(self, cost):
+        """Charge *cost* against the rate limit, returning False if used up."""
+        now = time.time()
+        if now >= self.reset:
+            self.used = 0
+            self.reset = int(now) + WINDOW
+        if cost and self.used >= self.limit:
+            return False
+        self.used = min(self.used + cost, self.limit)
+        return True
+
+    def headers(self, resource):
+        return {
+            "x-ratelimit-limit": str(self.limit),
+            "x-ratelimit-remaining": str(self.limit - self.used),
+            "x-ratelimit-reset": str(self.reset),
+            "x-ratelimit-used": str(self.used),
+            "x-ratelimit-resource": resource,
+        }
+
+
+class MockGitHub:
+    """The state of the stand-in API, shared by all connections."""
+
+    def __init__(self, *, limits=None, latency=0.0):
+        self.latency = latency
+        self.rate_limits = {
+            resource: RateLimit(limit)
+            for resource, limit in {**DEFAULT_LIMITS, **(limits or {})}.items()
+        }
+        self.requests = 0
+        self.pull = load_sample("pr_single")
+        self.diff = load_sample("pr_diff")
+        self.pulls = [load_sample(name) for name in PULL_PAGES]
+        self.search = [load_sample(name) for name in SEARCH_PAGES]
+        self.not_found = load_sample("pr_not_found", 404)
+        self.graphql = Response(
+            200,
+            "application/json; charset=utf-8",
+            (SAMPLES / "GraphQL" / "success-200.json").read_bytes(),
+        )
+
+    def route(self, method, target, headers):
+        """Return the resource, response, and Link header for a request."""
+        path, _, query = target.partition("?")
+        params = urllib.parse.parse_qs(query)
+        page = int(params.get("page", ["1"])[0])
+        if method == "POST" and path == "/graphql":
+            return "graphql", self.graphql, None
+        elif method != "GET":
+            return "core", self.not_found, None
+        elif path == "/rate_limit":
+            resources = {
+                resource: {
+                    "limit": rate_limit.limit,
+                    "remaining": rate_limit.limit - rate_limit.used,
+                    "reset": rate_limit.reset,
+                    "used": rate_limit.used,
+                }
+                for resource, rate_limit in self.rate_limits.items()
+            }
+            body = json.dumps({"resources": resources}).encode("utf-8")
+            return "core", Response(200, self.pull.content_type, body), None
+        elif re.fullmatch(r"/repos/[^/]+/[^/]+/pulls/\d+", path):
+            if "diff" in headers.get("accept", ""):
+                return "core", self.diff, None
+            return "core", self.pull, None
+        elif re.fullmatch(r"/repos/[^/]+/[^/]+/pulls", path):
+            return self.page("core", self.pulls, page, path, params, headers)
+        elif path == "/search/issues":
+            return self.page("search", self.search, page, path, params, headers)
+        return "core", self.not_found, None
+
+    def page(self, resource, pages, page, path, params, headers):
+        if not 1 <= page <= len(pages):
+            return resource, Response(200, pages[0].content_type, b"[]"), None
+        base = f"http://{headers.get('host', 'localhost')}{path}"
+
+        def url(number):
+            query = urllib.parse.urlencode({**params, "page": number}, doseq=True)
+            return f"{base}?{query}"
+
+        links = []
+        if page < len(pages):
+            links.append(f'<{url(page + 1)}>; rel="next"')
+            links.append(f'<{url(len(pages))}>; rel="last"')
+        if page > 1:
+            links.append(f'<{url(1)}>; rel="first"')
+            links.append(f'<{url(page - 1)}>; rel="prev"')
+        return resource, pages[page - 1], ", ".join(links) or None
+
+    def respond(self, method, target, headers):
+        """Return the serialized response to a request."""
+        self.requests += 1
+        resource, response, link = self.route(method, target, headers)
+        revalidated = headers.get("if-none-match") == response.etag
+        rate_limit = self.rate_limits[resource]
+        response_headers = {
+            "date": email.utils.formatdate(usegmt=True),
+            "content-type": response.content_type,
+        }
+        if not rate_limit.charge(0 if revalidated else 1):
+            status_code = 403
+            body = json.dumps(
+                {
+                    "message": "API rate limit exceeded",
+                    "documentation_url": "https://docs.github.com/rest/overview/rate-limits-for-the-rest-api",
+                }
+            ).encode("utf-8")
+            response_headers["content-type"] = "application/json; charset=utf-8"
+        elif revalidated:
+            status_code = 304
+            body = b""
+            response_headers["etag"] = response.etag
+        else:
+            status_code = response.status_code
+            body = response.body
+            response_headers["etag"] = response.etag
+            if link:
+                response_headers["link"] = link
+        response_headers.update(rate_limit.headers(resource))
+        response_headers["content-length"] = str(len(body))
+        lines = [f"HTTP/1.1 {status_code} {REASONS[status_code]}"]
+        lines.extend(f"{name}: {value}" for name, value in response_headers.items())
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        return head + body
+
+
+class HTTPProtocol(asyncio.Protocol):
+    """Serve HTTP/1.1 requests from a MockGitHub, keeping connections open."""
+
+    def __init__(self, github):
+        self.github = github
+        self.buffer = b""
+        # When the previous response will be sent, to keep responses in order.
+        self.last_response = 0.0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        while True:
+            head, sep, rest = self.buffer.partition(b"\r\n\r\n")
+            if not sep:
+                return
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            headers = {}
+            for line in header_lines:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            if len(rest) < length:
+                return
+            self.buffer = rest[length:]
+            method, target, _ = request_line.split(" ", 2)
+            self.send(self.github.respond(method, target, headers))
+
+    def send(self, response):
+        if not self.github.latency:
+            self.transport.write(response)
+            return
+        loop = asyncio.get_running_loop()
+        at = max(loop.time() + self.github.latency, self.last_response)
+        self.last_response = at
+        loop.call_at(at, self.write, response)
+
+    def write(self, response):
+        if not self.transport.is_closing():
+            self.transport.write(response)
+
+
+async def serve(github, host="127.0.0.1", port=0):
+    """Start serving *github*, returning the server."""
+    loop = asyncio.get_running_loop()
+    return await loop.create_server(lambda: HTTPProtocol(github), host, port)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds to delay each response"
+    )
+    parser.add_argument(
+        "--rate-limit", type=int, help="the limit of every rate limit resource"
+    )
+    args = parser.parse_args()
+    limits = None
+    if args.rate_limit is not None:
+        limits = dict.fromkeys(DEFAULT_LIMITS, args.rate_limit)
+    github = MockGitHub(limits=limits, latency=args.latency)
+    server = await serve(github, args.host, args.port)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
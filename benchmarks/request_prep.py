@@ -0,0 +1,84 @@
+"""Benchmark the per-request overhead of preparing a request's URL and headers.
+
+The "uncached" numbers re-create what GitHubAPI did for every request before
+URL templates and headers were cached: join the URL to the base URL, parse and
+expand the URI template, and build the headers from scratch. The "cached"
+numbers use the current code paths.
+
+Run with ``python benchmarks/request_prep.py``.
+"""
+
+import asyncio
+import timeit
+import urllib.parse
+
+import uritemplate
+
+from gidgethub import abc as gh_abc
+from gidgethub import sansio
+
+URL = "/repos/{owner}/{repo}/issues/{number}/comments{?since}"
+URL_VARS = {"owner": "gidgethub", "repo": "gidgethub", "number": 42}
+ACCEPT = sansio.accept_format()
+OAUTH_TOKEN = "ghp_" + "x" * 36
+RESPONSE_HEADERS = {
+    "x-ratelimit-limit": "5000",
+    "x-ratelimit-remaining": "4999",
+    "x-ratelimit-reset": "0",
+    "content-type": "application/json; charset=utf-8",
+}
+
+
+class NullGitHubAPI(gh_abc.GitHubAPI):
+    """Respond to every request immediately without any I/O."""
+
+    async def _request(self, method, url, headers, body=b""):
+        return 200, RESPONSE_HEADERS, b"{}"
+
+    async def sleep(self, seconds):
+        pass
+
+
+def prepare_uncached(gh):
+    url = urllib.parse.urljoin(
+        gh.base_url.removesuffix("/") + "/", URL.removeprefix("/")
+    )
+    url = uritemplate.expand(url, var_dict=URL_VARS)
+    headers = sansio.create_headers(
+        gh.requester, accept=ACCEPT, oauth_token=gh.oauth_token
+    )
+    return url, headers
+
+
+def prepare_cached(gh):
+    url = sansio.format_url(URL, URL_VARS, base_url=gh.base_url)
+    headers = gh._create_headers(ACCEPT, oauth_token=gh.oauth_token)
+    return url, headers
+
+
+def getitem_loop(gh, number):
+    async def loop():
+        for _ in range(number):
+            await gh.getitem(URL, URL_VARS, oauth_token=OAUTH_TOKEN)
+
+    asyncio.run(loop())
+
+
+def report(name, seconds, number):
+    print(f"{name:<28} {seconds / number * 1e6:8.2f} µs/request")
+
+
+def main(number=20_000):
+    gh = NullGitHubAPI("gidgethub-benchmarks", oauth_token=OAUTH_TOKEN)
+    assert prepare_uncached(gh) == prepare_cached(gh)
+    for name, func in [
+        ("prepare (uncached)", prepare_uncached),
+        ("prepare (cached)", prepare_cached),
+    ]:
+        report(name, min(timeit.repeat(lambda: func(gh), number=number)), number)
+    seconds = min(timeit.repeat(lambda: getitem_loop(gh, number), number=1))
+    report("getitem() with no I/O", seconds, number)
+
+
+if __name__ == "__main__":
+    main()
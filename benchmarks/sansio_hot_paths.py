@@ -0,0 +1,195 @@
+"""Benchmark the hot paths of gidgethub.sansio.
+
+Each case calls one function on a fixture: the sample responses and webhook
+from ``tests/samples`` plus synthetic payloads far larger than any sample
+(a webhook event of a few megabytes, a search page of 100 large items, and a
+long Link header). The time per call is the fastest of several runs, and the
+peak is the most memory allocated at once during a single call, as measured
+by tracemalloc.
+
+To compare two versions, save the results of one and compare the other
+against them::
+
+    python benchmarks/sansio_hot_paths.py --save before.json
+    python benchmarks/sansio_hot_paths.py --compare before.json
+
+A substring of the case names may be passed to run only the matching cases,
+e.g. ``decipher_response``. A full run takes about half a minute.
+
+Run with ``python benchmarks/sansio_hot_paths.py`` or ``nox -s benchmarks``.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import pathlib
+import timeit
+import tracemalloc
+import urllib.parse
+
+from gidgethub import sansio
+
+SAMPLES = pathlib.Path(__file__).parent.parent / "tests" / "samples"
+SECRET = "benchmark secret"
+# The target time of each run of a case.
+RUN_TIME = 0.2
+RUNS = 5
+
+
+def sample(directory, status_code):
+    sample_dir = SAMPLES / directory
+    headers = json.loads((sample_dir / f"{status_code}.json").read_text())
+    return headers, (sample_dir / "body").read_bytes()
+
+
+def webhook(event, data):
+    body = json.dumps(data).encode("utf-8")
+    signature = hmac.new(SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    headers = {
+        "content-type": "application/json",
+        "x-github-event": event,
+        "x-github-delivery": "72d3162e-cc78-11e3-81ab-4c9367dc0958",
+        "x-hub-signature-256": f"sha256={signature}",
+    }
+    return headers, body
+
+
+def cases():
+    """Yield the name and function of each case."""
+    pr_headers, pr_body = sample("pr_single", 200)
+    page_headers, page_body = sample("pr_page_1", 200)
+    search_headers, search_body = sample("search_issues_page_1", 200)
+    merged_headers, merged_body = sample("pr_merged", 204)
+    ping_headers, ping_body = sample("ping_urlencoded", 200)
+    pull_request = json.loads(pr_body)
+
+    # A webhook for a pull request with a body of many megabytes, e.g. a
+    # generated release note.
+    large_pr = dict(pull_request, body="Generated notes ✨\n" * 200_000)
+    event_headers, event_body = webhook("pull_request", {"pull_request": pull_request})
+    large_event_headers, large_event_body = webhook(
+        "pull_request", {"pull_request": large_pr}
+    )
+    # A full page of search results, each with a long body.
+    search = json.loads(search_body)
+    item = dict(search["items"][0], body="Steps to reproduce\n" * 500)
+    large_search_body = json.dumps(
+        dict(search, items=[item] * 100), ensure_ascii=False
+    ).encode("utf-8")
+    # A Link header with the next page last among many relations.
+    url = "https://api.github.com/search/issues?q=" + urllib.parse.quote("x" * 200)
+    long_link = ", ".join(
+        [f'<{url}&page={page}>; rel="page{page}"' for page in range(50)]
+        + [f'<{url}&page=2>; rel="next"']
+    )
+
+    def from_http(headers, body, secret=SECRET):
+        return lambda: sansio.Event.from_http(headers, body, secret=secret)
+
+    def validate(body, digestmod):
+        digest = hmac.new(SECRET.encode("utf-8"), body, digestmod).hexdigest()
+        signature = f"{digestmod}={digest}"
+        return lambda: sansio.validate_event(body, signature=signature, secret=SECRET)
+
+    def decipher(status_code, headers, body):
+        return lambda: sansio.decipher_response(status_code, headers, body)
+
+    yield "Event.from_http pull_request", from_http(event_headers, event_body)
+    yield "Event.from_http large pull_request", from_http(
+        large_event_headers, large_event_body
+    )
+    yield "Event.from_http ping (urlencoded)", from_http(
+        ping_headers, ping_body, secret=None
+    )
+    yield "validate_event sha256", validate(event_body, "sha256")
+    yield "validate_event sha1", validate(event_body, "sha1")
+    yield "validate_event large sha256", validate(large_event_body, "sha256")
+    yield "decipher_response pr_single", decipher(200, pr_headers, pr_body)
+    yield "decipher_response pr_page_1", decipher(200, page_headers, page_body)
+    yield "decipher_response search page", decipher(200, search_headers, search_body)
+    yield "decipher_response large search", decipher(
+        200, search_headers, large_search_body
+    )
+    yield "decipher_response 204", decipher(204, merged_headers, merged_body)
+    for label, content_type in [
+        ("json", "application/json; charset=utf-8"),
+        ("diff", "application/vnd.github.v3.diff; charset=utf-8"),
+        ("urlencoded", "application/x-www-form-urlencoded"),
+        ("None", None),
+    ]:
+        yield f"_parse_content_type {label}", (
+            lambda content_type=content_type: sansio._parse_content_type(content_type)
+        )
+    yield "_next_link pr_page_1", lambda: sansio._next_link(page_headers["link"])
+    yield "_next_link long header", lambda: sansio._next_link(long_link)
+    yield "_next_link None", lambda: sansio._next_link(None)
+    yield "format_url plain", lambda: sansio.format_url("/rate_limit", {})
+    yield "format_url template", lambda: sansio.format_url(
+        "/repos/{owner}/{repo}/issues/{number}/comments{?since}",
+        {"owner": "gidgethub", "repo": "gidgethub", "number": 42},
+    )
+    yield "format_url absolute", lambda: sansio.format_url(
+        "https://uploads.github.com/repos/o/r/releases/1/assets{?name,label}",
+        {"name": "gidgethub.tar.gz"},
+    )
+
+
+def measure(func):
+    """Return the seconds per call and the peak bytes allocated by *func*."""
+    timer = timeit.Timer(func)
+    number, seconds = timer.autorange()
+    number = max(1, int(number * RUN_TIME / seconds))
+    per_call = min(timer.repeat(RUNS, number)) / number
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return per_call, peak
+
+
+def format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:9.2f} µs"
+    return f"{seconds * 1e3:9.2f} ms"
+
+
+def format_size(size):
+    if size < 1024:
+        return f"{size:7} B  "
+    elif size < 1024**2:
+        return f"{size / 1024:7.1f} KiB"
+    return f"{size / 1024**2:7.1f} MiB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pattern", nargs="?", default="", help="run matching cases")
+    parser.add_argument("--save", metavar="FILE", help="save the results as JSON")
+    parser.add_argument(
+        "--compare", metavar="FILE", help="compare with results saved by --save"
+    )
+    args = parser.parse_args()
+    baseline = {}
+    if args.compare:
+        baseline = json.loads(pathlib.Path(args.compare).read_text())
+    results = {}
+    print(f"{'case':<40} {'time/call':>12} {'peak':>11}")
+    for name, func in cases():
+        if args.pattern not in name:
+            continue
+        per_call, peak = measure(func)
+        results[name] = {"seconds": per_call, "peak": peak}
+        line = f"{name:<40} {format_time(per_call)} {format_size(peak)}"
+        if name in baseline:
+            change = per_call / baseline[name]["seconds"] - 1
+            line += f" {change:+7.1%}"
+        print(line)
+    if args.save:
+        pathlib.Path(args.save).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Compare how long each backend takes to start up in a fresh interpreter.
+
+Each run imports a backend in a new Python process, then makes its first
+request (creating whatever client or session it needs) to a local stand-in
+server. The fastest of several runs is reported, along with the number of
+modules the import loaded. This is the overhead paid by short-lived processes
+such as GitHub Actions steps and serverless webhook handlers.
+
+Run with ``python benchmarks/startup_time.py``.
+"""
+
+import http.server
+import os
+import subprocess
+import sys
+import threading
+
+RUNS = 5
+BACKENDS = ["asyncio", "aiohttp", "httpx", "tornado"]
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"resources": {}}'
+        self.send_response(200)
+        self.send_header("content-type", "application/json; charset=utf-8")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def child(backend, url):
+    """Import *backend*, make a request, and print the timings."""
+    import time
+
+    start = time.perf_counter()
+    if backend == "asyncio":
+        from gidgethub import asyncio as gh_asyncio
+
+        async def request():
+            async with gh_asyncio.ConnectionPool() as pool:
+                await gh_asyncio.GitHubAPI(pool, "gidgethub").getitem(url)
+
+    elif backend == "aiohttp":
+        import aiohttp
+
+        from gidgethub import aiohttp as gh_aiohttp
+
+        async def request():
+            async with aiohttp.ClientSession() as session:
+                await gh_aiohttp.GitHubAPI(session, "gidgethub").getitem(url)
+
+    elif backend == "httpx":
+        import httpx
+
+        from gidgethub import httpx as gh_httpx
+
+        async def request():
+            async with httpx.AsyncClient() as client:
+                await gh_httpx.GitHubAPI(client, "gidgethub").getitem(url)
+
+    else:
+        from gidgethub import tornado as gh_tornado
+
+        async def request():
+            await gh_tornado.GitHubAPI("gidgethub").getitem(url)
+
+    imported = time.perf_counter()
+    import asyncio
+
+    asyncio.run(request())
+    done = time.perf_counter()
+    print(imported - start, done - imported, len(sys.modules))
+
+
+def measure(backend, url):
+    # Import gidgethub from this checkout.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    runs = []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, __file__, backend, url],
+            check=True,
+            capture_output=True,
+            env=env,
+            text=True,
+        ).stdout
+        runs.append([float(value) for value in output.split()])
+    import_time = min(run[0] for run in runs)
+    request_time = min(run[1] for run in runs)
+    return import_time, request_time, int(runs[0][2])
+
+
+def main():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/rate_limit"
+    print(f"Fastest of {RUNS} runs\n")
+    print(f"{'backend':<10} {'import':>9} {'1st request':>12} {'modules':>8}")
+    try:
+        for backend in BACKENDS:
+            import_time, request_time, modules = measure(backend, url)
+            print(
+                f"{backend:<10} {import_time * 1000:>6.1f} ms "
+                f"{request_time * 1000:>9.1f} ms {modules:>8}"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        child(*sys.argv[1:])
+    else:
+        main()
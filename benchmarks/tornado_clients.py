@@ -0,0 +1,134 @@
+"""Compare the throughput of the Tornado backend's clients with aiohttp's.
+
+A stand-in server answers every request with a small JSON body after a fixed
+delay, imitating GitHub's latency. Concurrent getitem() calls are made through
+Tornado's shared client (which allows 10 requests in flight), through clients
+from gidgethub.tornado.create_client(), and through aiohttp, and the
+throughput and the number of connections the server saw are reported.
+
+The curl client requires pycurl. Run with
+``python benchmarks/tornado_clients.py``.
+"""
+
+import asyncio
+import time
+
+import aiohttp
+
+from gidgethub import aiohttp as gh_aiohttp
+from gidgethub import tornado as gh_tornado
+
+DELAY = 0.05
+# The number of requests which gidgethub lets be in flight at once.
+CONCURRENCY = 100
+BODY = b'{"resources": {"core": {"limit": 5000, "remaining": 4999}}}'
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"content-type: application/json; charset=utf-8\r\n"
+    b"content-length: %d\r\n"
+    b"x-ratelimit-limit: 5000\r\n"
+    b"x-ratelimit-remaining: 4999\r\n"
+    b"x-ratelimit-reset: 0\r\n\r\n" % len(BODY)
+) + BODY
+
+
+class HTTP11Protocol(asyncio.Protocol):
+    """Answer HTTP/1.1 GET requests, keeping the connection open."""
+
+    connections = 0
+
+    def connection_made(self, transport):
+        type(self).connections += 1
+        self.transport = transport
+        self.buffer = b""
+
+    def data_received(self, data):
+        self.buffer += data
+        while b"\r\n\r\n" in self.buffer:
+            _, self.buffer = self.buffer.split(b"\r\n\r\n", 1)
+            asyncio.get_running_loop().call_later(DELAY, self.respond)
+
+    def respond(self):
+        if not self.transport.is_closing():
+            self.transport.write(RESPONSE)
+
+
+async def tornado_shared(base_url):
+    yield gh_tornado.GitHubAPI(
+        "gidgethub-benchmarks", base_url=base_url, max_concurrency=CONCURRENCY
+    )
+
+
+async def tornado_simple(base_url):
+    client = gh_tornado.create_client(max_clients=CONCURRENCY)
+    try:
+        yield gh_tornado.GitHubAPI(
+            "gidgethub-benchmarks",
+            client=client,
+            base_url=base_url,
+            max_concurrency=CONCURRENCY,
+        )
+    finally:
+        client.close()
+
+
+async def tornado_curl(base_url):
+    client = gh_tornado.create_client(max_clients=CONCURRENCY, curl=True)
+    try:
+        yield gh_tornado.GitHubAPI(
+            "gidgethub-benchmarks",
+            client=client,
+            base_url=base_url,
+            max_concurrency=CONCURRENCY,
+        )
+    finally:
+        client.close()
+
+
+async def aiohttp_session(base_url):
+    connector = aiohttp.TCPConnector(limit=CONCURRENCY)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        yield gh_aiohttp.GitHubAPI(
+            session,
+            "gidgethub-benchmarks",
+            base_url=base_url,
+            max_concurrency=CONCURRENCY,
+        )
+
+
+async def run(make_gh, requests):
+    HTTP11Protocol.connections = 0
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(HTTP11Protocol, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        async for gh in make_gh(f"http://127.0.0.1:{port}"):
+            start = time.perf_counter()
+            await asyncio.gather(*(gh.getitem("/rate_limit") for _ in range(requests)))
+            return time.perf_counter() - start
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def main(requests=1000):
+    print(
+        f"{requests} requests, {CONCURRENCY} at a time, "
+        f"{DELAY * 1000:.0f} ms server latency\n"
+    )
+    print(f"{'client':<40} {'connections':>11} {'req/s':>8}")
+    for name, make_gh in [
+        ("tornado, shared AsyncHTTPClient()", tornado_shared),
+        ("tornado, create_client()", tornado_simple),
+        ("tornado, create_client(curl=True)", tornado_curl),
+        ("aiohttp", aiohttp_session),
+    ]:
+        seconds = asyncio.run(run(make_gh, requests))
+        print(
+            f"{name:<40} {HTTP11Protocol.connections:>11} "
+            f"{requests / seconds:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -109,9 +109,16 @@ class GraphQLException(GitHubException):
 class BadGraphQLRequest(GraphQLException):
     """A 4XX HTTP response."""
 
-    def __init__(self, status_code: http.HTTPStatus, response: Any) -> None:
+    def __init__(
+        self,
+        status_code: http.HTTPStatus,
+        response: Any,
+        *,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
         assert 399 < status_code < 500
         self.status_code = status_code
+        self.headers = headers or {}
         super().__init__(response["message"], response)
 
 
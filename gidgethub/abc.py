@@ -1,9 +1,38 @@
 """Provide an abstract base class for easier requests."""
 
 import abc
+import asyncio
+import collections
+import contextlib
 import http
-import json
-from typing import Any, AsyncGenerator, Dict, Mapping, MutableMapping, Optional, Tuple
+import io
+import itertools
+import re
+import time
+import urllib.parse
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    OrderedDict,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
 from typing import Optional as Opt
 
 from uritemplate import variable
@@ -17,37 +46,225 @@ from . import (
     QueryError,
     GraphQLResponseTypeError,
 )
-from . import sansio
+from . import cache as gh_cache
+from . import codec, metrics, ratelimit, retry, sansio
 
 # Value represents etag, last-modified, data, and next page.
-CACHE_TYPE = MutableMapping[str, Tuple[Opt[str], Opt[str], Any, Opt[str]]]
+CACHE_TYPE = MutableMapping[str, gh_cache.CACHE_ENTRY]
 
 JSON_CONTENT_TYPE = "application/json"
 UTF_8_CHARSET = "utf-8"
 JSON_UTF_8_CHARSET = f"{JSON_CONTENT_TYPE}; charset={UTF_8_CHARSET}"
 ITERABLE_KEY = "items"
+# A request body for _request(): either read all at once or streamed as chunks.
+BODY_TYPE = Union[bytes, AsyncIterable[bytes]]
+# The size of the chunks in which files are uploaded.
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+# The number of distinct sets of request headers a GitHubAPI instance keeps.
+_HEADER_TEMPLATES_SIZE = 64
+
+
+def _body_size(headers: Mapping[str, str], body: BODY_TYPE) -> Opt[int]:
+    """Return the size of a request body, if it is known."""
+    if isinstance(body, bytes):
+        return len(body)
+    length = headers.get("content-length")
+    return None if length is None else int(length)
+
+
+def _rate_limit_resource(path: str) -> str:
+    """Return the rate limit resource which a request to *path* is charged to."""
+    if path.startswith("/search/code"):
+        return "code_search"
+    elif path.startswith("/search/"):
+        return "search"
+    return "core"
+
+
+async def _single_chunk(body: bytes) -> AsyncIterator[bytes]:
+    """Yield a body which was read all at once."""
+    if body:
+        yield body
+
+
+class _FileUpload:
+    """The rest of a binary file to upload, which can be re-read to retry."""
+
+    def __init__(self, file: BinaryIO) -> None:
+        self._file = file
+        self._start = file.tell()
+        self.length = file.seek(0, io.SEEK_END) - self._start
+        file.seek(self._start)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Read the file from where the upload starts, without blocking."""
+        self._file.seek(self._start)
+        remaining = self.length
+        while remaining > 0:
+            chunk = await asyncio.get_running_loop().run_in_executor(
+                None, self._file.read, min(remaining, _UPLOAD_CHUNK_SIZE)
+            )
+            if not chunk:
+                raise ValueError("file was truncated while being uploaded")
+            remaining -= len(chunk)
+            yield chunk
+
+
+# Fetch a page of results, returning the data, the next URL, and the headers.
+_PageFetcher = Callable[[str], Awaitable[Tuple[Any, Opt[str], Mapping[str, str]]]]
+# Marks the end of the pages produced by _read_ahead_pages().
+_END_OF_PAGES = object()
+
+_T = TypeVar("_T")
+
+# GraphQL documents which may contain a mutation, and so aren't safe to retry.
+_GRAPHQL_MUTATION = re.compile(r"\bmutation\b")
+
+
+async def _serial_pages(
+    fetch: _PageFetcher, first_page: Any, next_url: Opt[str]
+) -> AsyncGenerator[Any, None]:
+    """Yield pages one at a time by following the "next" links."""
+    yield first_page
+    while next_url:
+        data, next_url, _ = await fetch(next_url)
+        yield data
+
+
+async def _concurrent_pages(
+    fetch: _PageFetcher, first_page: Any, page_urls: List[str], concurrency: int
+) -> AsyncGenerator[Any, None]:
+    """Yield pages in order while fetching up to *concurrency* pages at once."""
+    pending: Deque["asyncio.Future[Tuple[Any, Opt[str], Mapping[str, str]]]"]
+    pending = collections.deque()
+    remaining_urls = iter(page_urls)
+    try:
+        for page_url in itertools.islice(remaining_urls, concurrency):
+            pending.append(asyncio.ensure_future(fetch(page_url)))
+        yield first_page
+        while pending:
+            data, _, _ = await pending.popleft()
+            next_page_url = next(remaining_urls, None)
+            if next_page_url is not None:
+                pending.append(asyncio.ensure_future(fetch(next_page_url)))
+            yield data
+    finally:
+        for task in pending:
+            task.cancel()
+        # Wait for the requests to stop so closing the pages really ends them.
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _read_ahead_pages(
+    fetch: _PageFetcher, first_page: Any, next_url: str, read_ahead: int
+) -> AsyncGenerator[Any, None]:
+    """Yield pages while following "next" links up to *read_ahead* pages early."""
+    pages: "asyncio.Queue[Tuple[Any, Opt[Exception]]]" = asyncio.Queue()
+    # A slot is held from when a page is requested until it starts being consumed.
+    slots = asyncio.Semaphore(read_ahead)
+
+    async def produce() -> None:
+        url: Opt[str] = next_url
+        try:
+            while url:
+                await slots.acquire()
+                data, url, _ = await fetch(url)
+                pages.put_nowait((data, None))
+        except Exception as exc:
+            pages.put_nowait((None, exc))
+        else:
+            pages.put_nowait((_END_OF_PAGES, None))
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        yield first_page
+        while True:
+            data, exc = await pages.get()
+            if exc is not None:
+                raise exc
+            elif data is _END_OF_PAGES:
+                break
+            slots.release()
+            yield data
+    finally:
+        producer.cancel()
+        # Wait for the request being made (if any) to stop.
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+class BatchRequest(NamedTuple):
+    """A request to be made by GitHubAPI.batch()."""
+
+    method: str
+    url: str
+    url_vars: Optional[variable.VariableValueDict] = {}
+    data: Any = b""
 
 
 class GitHubAPI(abc.ABC):
     """Provide an idiomatic API for making calls to GitHub's API."""
 
+    # Exceptions raised by _request() for failures of the connection itself
+    # (rather than an HTTP error response); subclasses add their own.
+    transport_errors: Tuple[Type[Exception], ...] = (OSError, asyncio.TimeoutError)
+    # Whether _request() and _stream() return response bodies as they were
+    # sent, still compressed according to their content-encoding. If so,
+    # compressed responses are requested and then decompressed by sansio.
+    encoded_bodies = False
+
     def __init__(
         self,
         requester: str,
         *,
         oauth_token: Opt[str] = None,
-        cache: Opt[CACHE_TYPE] = None,
+        cache: Opt[Union[CACHE_TYPE, gh_cache.AsyncCache]] = None,
         base_url: str = sansio.DOMAIN,
+        cache_raw: bool = False,
+        coalesce: bool = False,
+        rate_limit_scheduler: Opt[ratelimit.RateLimitScheduler] = None,
+        retry_policy: Opt[retry.RetryPolicy] = None,
+        max_concurrency: Opt[int] = None,
+        json_codec: codec.JSONCodec = codec.DEFAULT_CODEC,
+        request_listeners: Iterable[metrics.RequestListener] = (),
     ) -> None:
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
         self.requester = requester
         self.oauth_token = oauth_token
-        self._cache = cache
+        self._cache: Opt[gh_cache.AsyncCache]
+        # Check for a mapping first, as some synchronous mappings (e.g.
+        # diskcache.Cache) also have get(), set(), and delete() methods.
+        if cache is not None and hasattr(cache, "__getitem__"):
+            self._cache = gh_cache.MappingCache(cast(CACHE_TYPE, cache))
+        else:
+            self._cache = cache
+        self._cache_raw = cache_raw
+        self._coalesce = coalesce
+        self._in_flight: Dict[
+            Tuple[str, Tuple[Tuple[str, str], ...]],
+            "asyncio.Future[Tuple[Any, Opt[str], int, Mapping[str, str]]]",
+        ] = {}
         self.rate_limit: Opt[sansio.RateLimit] = None
+        self.rate_limits: Dict[str, sansio.RateLimit] = {}
+        self.rate_limit_scheduler = rate_limit_scheduler
+        self.retry_policy = retry_policy
+        self.max_concurrency = max_concurrency
+        self.json_codec = json_codec
+        self.request_listeners = list(request_listeners)
+        # The sizes of all response bodies as received and once decompressed.
+        self.bytes_received = 0
+        self.bytes_decompressed = 0
+        # Created on first use so it belongs to the running event loop.
+        self._request_slots: Opt[asyncio.Semaphore] = None
+        # (requester, accept, jwt, oauth_token) -> headers
+        self._header_templates: OrderedDict[
+            Tuple[str, str, Opt[str], Opt[str]], Dict[str, str]
+        ] = collections.OrderedDict()
         self.base_url = base_url
 
     @abc.abstractmethod
     async def _request(
-        self, method: str, url: str, headers: Mapping[str, str], body: bytes = b""
+        self, method: str, url: str, headers: Mapping[str, str], body: BODY_TYPE = b""
     ) -> Tuple[int, Mapping[str, str], bytes]:
         """Make an HTTP request."""
 
@@ -55,50 +272,370 @@ class GitHubAPI(abc.ABC):
     async def sleep(self, seconds: float) -> None:
         """Sleep for the specified number of seconds."""
 
-    async def _make_request(
+    @contextlib.asynccontextmanager
+    async def _stream(
+        self, method: str, url: str, headers: Mapping[str, str], body: bytes = b""
+    ) -> AsyncIterator[Tuple[int, Mapping[str, str], AsyncIterator[bytes]]]:
+        """Make an HTTP request, providing the response body as an iterator of chunks.
+
+        The response is only guaranteed to be open until the context manager
+        exits. Subclasses should override this to stream the response; by
+        default the whole body is read by _request().
+        """
+        status_code, response_headers, response_body = await self._request(
+            method, url, headers, body
+        )
+        yield status_code, response_headers, _single_chunk(response_body)
+
+    def _get_request_slots(self) -> Opt[asyncio.Semaphore]:
+        """Return the semaphore enforcing max_concurrency (if any)."""
+        if self.max_concurrency is None:
+            return None
+        if self._request_slots is None:
+            self._request_slots = asyncio.Semaphore(self.max_concurrency)
+        return self._request_slots
+
+    async def _capped_request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: BODY_TYPE = b"",
+        *,
+        template: Opt[str] = None,
+        attempt: int = 1,
+    ) -> Tuple[int, Mapping[str, str], bytes]:
+        """Make an HTTP request once fewer than max_concurrency are in flight.
+
+        The request is reported to the request listeners as being made to the
+        unexpanded URL *template* (the URL itself by default) on the
+        *attempt*-th attempt.
+        """
+        slots = self._get_request_slots()
+        if slots is not None:
+            await slots.acquire()
+        start = time.perf_counter()
+        try:
+            response = await self._request(method, url, headers, body)
+        except self.transport_errors as exc:
+            self._notify_listeners(
+                metrics.RequestMetrics(
+                    method,
+                    template or url,
+                    url,
+                    None,
+                    _body_size(headers, body),
+                    0,
+                    time.perf_counter() - start,
+                    attempt,
+                    None,
+                    exc,
+                )
+            )
+            raise
+        finally:
+            if slots is not None:
+                slots.release()
+        duration = time.perf_counter() - start
+        status_code, response_headers, response_body = response
+        decompressor = self._decompressor(response_headers)
+        response_body = decompressor.decompress(response_body, final=True)
+        self._record_transfer(
+            method, url, decompressor.compressed_size, decompressor.decompressed_size
+        )
+        if self.request_listeners:
+            self._notify_listeners(
+                metrics.RequestMetrics(
+                    method,
+                    template or url,
+                    url,
+                    status_code,
+                    _body_size(headers, body),
+                    decompressor.compressed_size,
+                    duration,
+                    attempt,
+                    sansio.RateLimit.from_http(response_headers),
+                )
+            )
+        return status_code, response_headers, response_body
+
+    def _notify_listeners(self, request_metrics: metrics.RequestMetrics) -> None:
+        """Pass the measurements of a request to the request listeners."""
+        for listener in self.request_listeners:
+            listener.request_finished(request_metrics)
+
+    def _decompressor(self, headers: Mapping[str, str]) -> sansio.Decompressor:
+        """Return the decompressor for the body of a response."""
+        if self.encoded_bodies:
+            return sansio.Decompressor(headers.get("content-encoding"))
+        return sansio.Decompressor(None)
+
+    async def _decompress_chunks(
         self,
         method: str,
         url: str,
+        decompressor: sansio.Decompressor,
+        chunks: AsyncIterator[bytes],
+    ) -> AsyncIterator[bytes]:
+        """Decompress a streamed response body."""
+        async for chunk in chunks:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+        data = decompressor.decompress(b"", final=True)
+        if data:
+            yield data
+        self._record_transfer(
+            method, url, decompressor.compressed_size, decompressor.decompressed_size
+        )
+
+    def _record_transfer(
+        self, method: str, url: str, received: int, decompressed: int
+    ) -> None:
+        """Account for the size of a response body.
+
+        *received* is its size as received and *decompressed* its size once
+        decompressed. Subclasses may extend this to record them per request.
+        """
+        self.bytes_received += received
+        self.bytes_decompressed += decompressed
+
+    def _create_headers(
+        self, accept: str, *, jwt: Opt[str] = None, oauth_token: Opt[str] = None
+    ) -> Dict[str, str]:
+        """Return a new copy of the headers for the accept and authorization."""
+        key = self.requester, accept, jwt, oauth_token
+        try:
+            template = self._header_templates[key]
+        except KeyError:
+            template = sansio.create_headers(
+                self.requester,
+                accept=accept,
+                jwt=jwt,
+                oauth_token=oauth_token,
+                accept_encoding=(
+                    sansio.accept_encoding() if self.encoded_bodies else None
+                ),
+            )
+            self._header_templates[key] = template
+            if len(self._header_templates) > _HEADER_TEMPLATES_SIZE:
+                self._header_templates.popitem(last=False)
+        else:
+            self._header_templates.move_to_end(key)
+        return dict(template)
+
+    def _prepare_request(
+        self,
+        url: str,
         url_vars: Optional[variable.VariableValueDict],
-        data: Any,
         accept: str,
-        jwt: Opt[str] = None,
-        oauth_token: Opt[str] = None,
-        content_type: str = JSON_CONTENT_TYPE,
-        extra_headers: Optional[Dict[str, str]] = None,
-    ) -> Tuple[bytes, Opt[str], int]:
-        """Construct and make an HTTP request."""
+        jwt: Opt[str],
+        oauth_token: Opt[str],
+        extra_headers: Optional[Dict[str, str]],
+    ) -> Tuple[str, Dict[str, str]]:
+        """Return the expanded URL and the headers for a request."""
         if oauth_token is not None and jwt is not None:
             raise ValueError("Cannot pass both oauth_token and jwt.")
         filled_url = sansio.format_url(url, url_vars, base_url=self.base_url)
         if jwt is not None:
-            request_headers = sansio.create_headers(
-                self.requester, accept=accept, jwt=jwt
-            )
+            request_headers = self._create_headers(accept, jwt=jwt)
         elif oauth_token is not None:
-            request_headers = sansio.create_headers(
-                self.requester, accept=accept, oauth_token=oauth_token
-            )
+            request_headers = self._create_headers(accept, oauth_token=oauth_token)
         else:
             # fallback to using oauth_token
-            request_headers = sansio.create_headers(
-                self.requester, accept=accept, oauth_token=self.oauth_token
-            )
+            request_headers = self._create_headers(accept, oauth_token=self.oauth_token)
         if extra_headers is not None:
             request_headers.update(extra_headers)
-        cached = cacheable = False
+        return filled_url, request_headers
+
+    async def _make_request(
+        self,
+        method: str,
+        url: str,
+        url_vars: Optional[variable.VariableValueDict],
+        data: Any,
+        accept: str,
+        jwt: Opt[str] = None,
+        oauth_token: Opt[str] = None,
+        content_type: str = JSON_CONTENT_TYPE,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[bytes, Opt[str], int]:
+        """Construct and make an HTTP request."""
+        data, more, status_code, _ = await self._make_request_with_headers(
+            method,
+            url,
+            url_vars,
+            data,
+            accept,
+            jwt=jwt,
+            oauth_token=oauth_token,
+            content_type=content_type,
+            extra_headers=extra_headers,
+        )
+        return data, more, status_code
+
+    async def _make_request_with_headers(
+        self,
+        method: str,
+        url: str,
+        url_vars: Optional[variable.VariableValueDict],
+        data: Any,
+        accept: str,
+        jwt: Opt[str] = None,
+        oauth_token: Opt[str] = None,
+        content_type: str = JSON_CONTENT_TYPE,
+        extra_headers: Optional[Dict[str, str]] = None,
+        template: Opt[str] = None,
+    ) -> Tuple[Any, Opt[str], int, Mapping[str, str]]:
+        """Construct and make an HTTP request, also returning the response headers.
+
+        The request is reported to the request listeners as being made to the
+        unexpanded URL *template*, which is *url* by default.
+        """
+        if template is None:
+            template = url
+        filled_url, request_headers = self._prepare_request(
+            url, url_vars, accept, jwt, oauth_token, extra_headers
+        )
+        if self._coalesce and method == "GET" and data == b"":
+            # Identical requests which are already in flight share a response.
+            key = filled_url, tuple(sorted(request_headers.items()))
+            try:
+                shared = self._in_flight[key]
+            except KeyError:
+                shared = asyncio.ensure_future(
+                    self._send_request(
+                        method,
+                        filled_url,
+                        request_headers,
+                        data,
+                        content_type,
+                        template,
+                    )
+                )
+                self._in_flight[key] = shared
+
+                def forget(
+                    shared: "asyncio.Future[Tuple[Any, Opt[str], int, Mapping[str, str]]]",
+                ) -> None:
+                    # Retrieve any exception so asyncio doesn't log it as never
+                    # retrieved when every caller was cancelled beforehand.
+                    if not shared.cancelled():
+                        shared.exception()
+                    del self._in_flight[key]
+
+                shared.add_done_callback(forget)
+            # Don't let a caller being cancelled cancel the request for everyone.
+            return await asyncio.shield(shared)
+        return await self._send_request(
+            method, filled_url, request_headers, data, content_type, template
+        )
+
+    async def _send_request(
+        self,
+        method: str,
+        filled_url: str,
+        request_headers: Dict[str, str],
+        data: Any,
+        content_type: str,
+        template: str,
+    ) -> Tuple[Any, Opt[str], int, Mapping[str, str]]:
+        """Make an HTTP request with the prepared URL and headers."""
+        if content_type != JSON_CONTENT_TYPE and callable(getattr(data, "read", None)):
+            data = _FileUpload(data)
+        return await self._with_retries(
+            method,
+            lambda attempt: self._attempt_request(
+                method,
+                filled_url,
+                dict(request_headers),
+                data,
+                content_type,
+                template,
+                attempt,
+            ),
+            # Unlike a file, an async iterable can only be sent once.
+            replayable=not isinstance(data, AsyncIterable),
+        )
+
+    async def _with_retries(
+        self,
+        method: str,
+        attempt_request: Callable[[int], Awaitable[_T]],
+        *,
+        replayable: bool = True,
+    ) -> _T:
+        """Make attempts at a request until it succeeds or isn't to be retried.
+
+        *attempt_request* is called with the number of the attempt. Whether a
+        failed attempt is retried is up to the retry policy, given *method*.
+        """
+        retryable = (HTTPException, BadGraphQLRequest) + self.transport_errors
+        attempt = 0
+        waited = 0.0
+        while True:
+            attempt += 1
+            try:
+                return await attempt_request(attempt)
+            except retryable as exc:
+                if self.retry_policy is None or not replayable:
+                    raise
+                delay = self.retry_policy.delay(method, exc, attempt, waited)
+                if delay is None:
+                    raise
+            waited += delay
+            await self.sleep(delay)
+
+    def _update_rate_limit(self, rate_limit: Opt[sansio.RateLimit]) -> None:
+        """Record the rate limit reported by a response."""
+        self.rate_limit = rate_limit
+        if rate_limit is not None:
+            self.rate_limits[rate_limit.resource or "core"] = rate_limit
+
+    async def _use_rate_limit(self, filled_url: str, resource: Opt[str] = None) -> None:
+        """Account for a request about to be made, waiting if it should be paced.
+
+        Only the rate limit of the resource the request is charged to is used,
+        so that e.g. an exhausted search rate limit does not pace other requests.
+        Unless *resource* is specified, it is determined from the URL.
+        """
+        if resource is None:
+            if filled_url.startswith(self.base_url):
+                path = filled_url[len(self.base_url) :]
+            else:
+                path = urllib.parse.urlsplit(filled_url).path
+            resource = _rate_limit_resource(path)
+        rate_limit = self.rate_limits.get(resource)
+        if rate_limit is not None:
+            if self.rate_limit_scheduler is not None:
+                delay = self.rate_limit_scheduler.delay(rate_limit)
+                if delay > 0:
+                    await self.sleep(delay)
+            rate_limit.remaining -= 1
+
+    async def _attempt_request(
+        self,
+        method: str,
+        filled_url: str,
+        request_headers: Dict[str, str],
+        data: Any,
+        content_type: str,
+        template: str,
+        attempt: int,
+    ) -> Tuple[Any, Opt[str], int, Mapping[str, str]]:
+        """Make a single attempt at an HTTP request."""
+        cacheable = False
+        cached_entry: Opt[gh_cache.CACHE_ENTRY] = None
+        body: BODY_TYPE
         # Can't use None as a "no body" sentinel as it's a legitimate JSON type.
         if data == b"":
             body = b""
             request_headers["content-length"] = "0"
             if method == "GET" and self._cache is not None:
                 cacheable = True
-                try:
-                    etag, last_modified, data, more = self._cache[filled_url]
-                    cached = True
-                except KeyError:
-                    pass
-                else:
+                cached_entry = await self._cache.get(filled_url)
+                if cached_entry is not None:
+                    etag, last_modified, data, more = cached_entry
                     if etag is not None:
                         request_headers["if-none-match"] = etag
                     if last_modified is not None:
@@ -107,23 +644,129 @@ class GitHubAPI(abc.ABC):
             if content_type != JSON_CONTENT_TYPE:
                 # We don't know how to handle other content types, so just pass things along.
                 request_headers["content-type"] = content_type
-                body = data
+                if isinstance(data, _FileUpload):
+                    body = data.chunks()
+                    request_headers["content-length"] = str(data.length)
+                elif isinstance(data, AsyncIterable):
+                    # Sent chunked unless extra_headers specified content-length.
+                    body = data
+                else:
+                    body = data
+                    request_headers["content-length"] = str(len(data))
             else:
                 # Since JSON is so common, add some niceties.
-                body = json.dumps(data).encode(UTF_8_CHARSET)
+                body = self.json_codec.encode(data)
                 request_headers["content-type"] = JSON_UTF_8_CHARSET
-            request_headers["content-length"] = str(len(body))
-        if self.rate_limit is not None:
-            self.rate_limit.remaining -= 1
-        response = await self._request(method, filled_url, request_headers, body)
-        if not (response[0] == 304 and cached):
-            data, self.rate_limit, more = sansio.decipher_response(*response)
+                request_headers["content-length"] = str(len(body))
+        await self._use_rate_limit(filled_url)
+        response = await self._capped_request(
+            method,
+            filled_url,
+            request_headers,
+            body,
+            template=template,
+            attempt=attempt,
+        )
+        if response[0] == 304 and self._cache is not None and cached_entry is not None:
+            # Let the cache know the entry is still fresh. Storing it again
+            # instead would have the cache re-measure or re-serialize it.
+            revalidate = getattr(self._cache, "revalidate", None)
+            if revalidate is not None:
+                await revalidate(filled_url)
+            if isinstance(data, gh_cache.RawBody):
+                data = data.decode(json_codec=self.json_codec)
+        else:
+            data, rate_limit, more = sansio.decipher_response(
+                *response, json_codec=self.json_codec
+            )
+            self._update_rate_limit(rate_limit)
             has_cache_details = "etag" in response[1] or "last-modified" in response[1]
             if self._cache is not None and cacheable and has_cache_details:
                 etag = response[1].get("etag")
                 last_modified = response[1].get("last-modified")
-                self._cache[filled_url] = etag, last_modified, data, more
-        return data, more, response[0]
+                cached_data = data
+                if self._cache_raw:
+                    cached_data = gh_cache.RawBody.from_body(
+                        response[1].get("content-type"), response[2]
+                    )
+                await self._cache.set(
+                    filled_url, (etag, last_modified, cached_data, more)
+                )
+        return data, more, response[0], response[1]
+
+    @contextlib.asynccontextmanager
+    async def _open_stream(
+        self,
+        url: str,
+        url_vars: Optional[variable.VariableValueDict],
+        accept: str,
+        jwt: Opt[str],
+        oauth_token: Opt[str],
+        extra_headers: Optional[Dict[str, str]],
+        template: Opt[str] = None,
+    ) -> AsyncIterator[Tuple[Mapping[str, str], AsyncIterator[bytes]]]:
+        """Make a GET request whose successful response is streamed.
+
+        The request is reported to the request listeners, as being made to
+        the unexpanded URL *template* (*url* by default), once the response
+        is closed. The max_concurrency slot is released once the response
+        head is read, as the body is consumed at the caller's pace and the
+        caller may make further requests meanwhile.
+        """
+        filled_url, request_headers = self._prepare_request(
+            url, url_vars, accept, jwt, oauth_token, extra_headers
+        )
+        request_headers["content-length"] = "0"
+        await self._use_rate_limit(filled_url)
+        slots = self._get_request_slots()
+        if slots is not None:
+            await slots.acquire()
+        holding_slot = slots is not None
+        start = time.perf_counter()
+        status_code: Opt[int] = None
+        response_headers: Mapping[str, str] = {}
+        decompressor = self._decompressor(response_headers)
+        error: Opt[BaseException] = None
+        try:
+            async with self._stream("GET", filled_url, request_headers) as response:
+                status_code, response_headers, raw_chunks = response
+                if slots is not None:
+                    slots.release()
+                    holding_slot = False
+                decompressor = self._decompressor(response_headers)
+                chunks = self._decompress_chunks(
+                    "GET", filled_url, decompressor, raw_chunks
+                )
+                body = b""
+                if status_code not in sansio._SUCCESS_STATUSES:
+                    # Error bodies are small; sansio raises the appropriate exception.
+                    body = b"".join([chunk async for chunk in chunks])
+                _, rate_limit, _ = sansio.decipher_response(
+                    status_code, response_headers, body, json_codec=self.json_codec
+                )
+                self._update_rate_limit(rate_limit)
+                yield response_headers, chunks
+        except self.transport_errors as exc:
+            error = exc
+            raise
+        finally:
+            if slots is not None and holding_slot:
+                slots.release()
+            if self.request_listeners:
+                self._notify_listeners(
+                    metrics.RequestMetrics(
+                        "GET",
+                        template or url,
+                        filled_url,
+                        status_code,
+                        0,
+                        decompressor.compressed_size,
+                        time.perf_counter() - start,
+                        1,
+                        sansio.RateLimit.from_http(response_headers),
+                        error,
+                    )
+                )
 
     async def getitem(
         self,
@@ -179,25 +822,86 @@ class GitHubAPI(abc.ABC):
         oauth_token: Opt[str] = None,
         extra_headers: Optional[Dict[str, str]] = None,
         iterable_key: Opt[str] = ITERABLE_KEY,
+        concurrency: int = 1,
+        read_ahead: int = 0,
+        incremental: bool = False,
     ) -> AsyncGenerator[Any, None]:
         """Return an async iterable for all the items at a specified endpoint."""
-        current_url: Opt[str] = url
-        while current_url:
-            data, current_url, _ = await self._make_request(
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        elif read_ahead < 0:
+            raise ValueError("read_ahead cannot be negative")
+        elif incremental and (concurrency > 1 or read_ahead):
+            raise ValueError("incremental cannot be combined with concurrent pages")
+        if incremental:
+            page_url: Opt[str] = url
+            while page_url:
+                async with self._open_stream(
+                    page_url, url_vars, accept, jwt, oauth_token, extra_headers, url
+                ) as (headers, chunks):
+                    page_url = sansio._next_link(headers.get("link"))
+                    decoder = sansio._ItemDecoder(
+                        headers.get("content-type"),
+                        iterable_key,
+                        json_codec=self.json_codec,
+                    )
+                    async for chunk in chunks:
+                        for item in decoder.feed(chunk):
+                            yield item
+                    for item in decoder.close():
+                        yield item
+            return
+
+        async def fetch(page_url: str) -> Tuple[Any, Opt[str], Mapping[str, str]]:
+            data, more, _, headers = await self._make_request_with_headers(
                 "GET",
-                current_url,
+                page_url,
                 url_vars,
                 b"",
                 accept,
                 jwt=jwt,
                 oauth_token=oauth_token,
                 extra_headers=extra_headers,
+                template=url,
             )
+            return data, more, headers
 
-            if isinstance(data, dict) and iterable_key in data:
-                data = data[iterable_key]
-            for item in data:
-                yield item
+        data, current_url, headers = await fetch(url)
+        page_urls = None
+        if concurrency > 1 and current_url:
+            last_url = sansio._last_link(headers.get("link"))
+            if last_url is not None:
+                page_urls = sansio._page_urls(current_url, last_url)
+        pages: AsyncGenerator[Any, None]
+        if page_urls is not None:
+            pages = _concurrent_pages(fetch, data, page_urls, concurrency)
+        elif read_ahead and current_url:
+            pages = _read_ahead_pages(fetch, data, current_url, read_ahead)
+        else:
+            pages = _serial_pages(fetch, data, current_url)
+        try:
+            async for data in pages:
+                for item in sansio._page_items(data, iterable_key):
+                    yield item
+        finally:
+            await pages.aclose()
+
+    async def getstream(
+        self,
+        url: str,
+        url_vars: Optional[variable.VariableValueDict] = {},
+        *,
+        accept: str = sansio.accept_format(),
+        jwt: Opt[str] = None,
+        oauth_token: Opt[str] = None,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> AsyncGenerator[bytes, None]:
+        """Return an async iterable of the chunks of the body at an endpoint."""
+        async with self._open_stream(
+            url, url_vars, accept, jwt, oauth_token, extra_headers
+        ) as (_, chunks):
+            async for chunk in chunks:
+                yield chunk
 
     async def post(
         self,
@@ -257,6 +961,7 @@ class GitHubAPI(abc.ABC):
         jwt: Opt[str] = None,
         oauth_token: Opt[str] = None,
         extra_headers: Optional[Dict[str, str]] = None,
+        content_type: str = JSON_CONTENT_TYPE,
     ) -> Any:
         data, _, _ = await self._make_request(
             "PUT",
@@ -266,6 +971,7 @@ class GitHubAPI(abc.ABC):
             accept,
             jwt=jwt,
             oauth_token=oauth_token,
+            content_type=content_type,
             extra_headers=extra_headers,
         )
         return data
@@ -292,6 +998,41 @@ class GitHubAPI(abc.ABC):
             extra_headers=extra_headers,
         )
 
+    async def batch(
+        self,
+        requests: Iterable[Union[BatchRequest, Tuple[Any, ...]]],
+        *,
+        accept: str = sansio.accept_format(),
+        jwt: Opt[str] = None,
+        oauth_token: Opt[str] = None,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> List[Any]:
+        """Make the requests concurrently, returning their results in order.
+
+        A request which fails has the exception it raised as its result
+        instead of the exception propagating.
+        """
+
+        async def make_request(request: BatchRequest) -> Any:
+            try:
+                data, _, _ = await self._make_request(
+                    request.method,
+                    request.url,
+                    request.url_vars,
+                    request.data,
+                    accept,
+                    jwt=jwt,
+                    oauth_token=oauth_token,
+                    extra_headers=extra_headers,
+                )
+            except Exception as exc:
+                return exc
+            return data
+
+        return await asyncio.gather(
+            *(make_request(BatchRequest(*request)) for request in requests)
+        )
+
     async def graphql(
         self,
         query: str,
@@ -307,9 +1048,9 @@ class GitHubAPI(abc.ABC):
         payload: Dict[str, Any] = {"query": query}
         if variables:
             payload["variables"] = variables
-        request_data = json.dumps(payload).encode("utf-8")
-        request_headers = sansio.create_headers(
-            self.requester, accept=JSON_UTF_8_CHARSET, oauth_token=self.oauth_token
+        request_data = self.json_codec.encode(payload)
+        request_headers = self._create_headers(
+            JSON_UTF_8_CHARSET, oauth_token=self.oauth_token
         )
         request_headers.update(
             {
@@ -317,33 +1058,56 @@ class GitHubAPI(abc.ABC):
                 "content-length": str(len(request_data)),
             }
         )
-        status_code, response_headers, response_data = await self._request(
-            "POST", endpoint, request_headers, request_data
+        # Queries only read data, so they are as safe to retry as a GET.
+        method = "POST" if _GRAPHQL_MUTATION.search(query) else "GET"
+        return await self._with_retries(
+            method,
+            lambda attempt: self._attempt_graphql(
+                endpoint, request_headers, request_data, attempt
+            ),
+        )
+
+    async def _attempt_graphql(
+        self,
+        endpoint: str,
+        request_headers: Mapping[str, str],
+        request_data: bytes,
+        attempt: int,
+    ) -> Any:
+        """Make a single attempt at a GraphQL query."""
+        await self._use_rate_limit(endpoint, "graphql")
+        status_code, response_headers, response_data = await self._capped_request(
+            "POST", endpoint, request_headers, request_data, attempt=attempt
         )
 
-        if not response_data:
+        if status_code >= 500:
+            # Checked first as the body of e.g. a 502 may well not be JSON.
+            raise GitHubBroken(http.HTTPStatus(status_code), headers=response_headers)
+        elif not response_data:
             raise GraphQLException("Response contained no data", response_data)
 
         # Decode content.
         resp_content_type = response_headers.get("content-type")
         type_, encoding = sansio._parse_content_type(resp_content_type)
-        response_str = response_data.decode(encoding)
-        if type_ == "application/json":
-            response: Dict[str, Any] = json.loads(response_str)
-        else:
-            raise GraphQLResponseTypeError(resp_content_type, response_str)
+        if type_ != "application/json":
+            raise GraphQLResponseTypeError(
+                resp_content_type, str(response_data, encoding)
+            )
+        response: Dict[str, Any] = sansio._decode_body(
+            resp_content_type, response_data, json_codec=self.json_codec
+        )
 
-        if status_code >= 500:
-            raise GitHubBroken(http.HTTPStatus(status_code))
-        elif status_code == 401:
+        if status_code == 401:
             raise GraphQLAuthorizationFailure(response)
         elif status_code >= 400:
             # 400 corresponds to malformed JSON, but that should never receive
-            # that as a response as json.dumps() should have raised its own
+            # that as a response as encoding the payload should have raised its own
             # exception before we made the request.
-            raise BadGraphQLRequest(http.HTTPStatus(status_code), response)
+            raise BadGraphQLRequest(
+                http.HTTPStatus(status_code), response, headers=response_headers
+            )
         elif status_code == 200:
-            self.rate_limit = sansio.RateLimit.from_http(response_headers)
+            self._update_rate_limit(sansio.RateLimit.from_http(response_headers))
             if "errors" in response:
                 raise QueryError(response)
             if "data" in response:
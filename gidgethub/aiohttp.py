@@ -1,12 +1,48 @@
 import asyncio
-from typing import Any, Mapping, Tuple
+import contextlib
+from typing import Any, AsyncIterator, Mapping, Optional, Tuple
 
 import aiohttp
 
 from . import abc as gh_abc
 
 
+def create_session(
+    *,
+    limit: int = 100,
+    keepalive_timeout: float = 30.0,
+    ttl_dns_cache: Optional[int] = 60,
+    connect_timeout: Optional[float] = 30.0,
+    read_timeout: Optional[float] = 60.0,
+    **kwargs: Any,
+) -> aiohttp.ClientSession:
+    """Create a session suited to making requests to GitHub's API.
+
+    Connections are kept alive for 'keepalive_timeout' seconds (aiohttp's
+    default is 15) and DNS lookups are cached for 'ttl_dns_cache' seconds
+    (rather than 10), so requests made in bursts reuse connections. Instead of
+    limiting every request to 5 minutes, connecting is limited to
+    'connect_timeout' seconds and waiting for each read to 'read_timeout'
+    seconds, so long downloads are not cut short but stalled connections are.
+    The other keyword arguments are passed on to aiohttp.ClientSession.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit, keepalive_timeout=keepalive_timeout, ttl_dns_cache=ttl_dns_cache
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=None, sock_connect=connect_timeout, sock_read=read_timeout
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, **kwargs)
+
+
 class GitHubAPI(gh_abc.GitHubAPI):
+    transport_errors = (
+        aiohttp.ClientConnectionError,
+        aiohttp.ClientPayloadError,
+        asyncio.TimeoutError,
+    )
+    encoded_bodies = True
+
     def __init__(
         self, session: aiohttp.ClientSession, *args: Any, **kwargs: Any
     ) -> None:
@@ -14,12 +50,29 @@ class GitHubAPI(gh_abc.GitHubAPI):
         super().__init__(*args, **kwargs)
 
     async def _request(
-        self, method: str, url: str, headers: Mapping[str, str], body: bytes = b""
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: gh_abc.BODY_TYPE = b"",
     ) -> Tuple[int, Mapping[str, str], bytes]:
+        # The body is returned as sent, so only accept what gidgethub asked for.
+        headers = {"accept-encoding": "identity", **headers}
         async with self._session.request(
-            method, url, headers=headers, data=body
+            method, url, headers=headers, data=body, auto_decompress=False
         ) as response:
             return response.status, response.headers, await response.read()
 
+    @contextlib.asynccontextmanager
+    async def _stream(
+        self, method: str, url: str, headers: Mapping[str, str], body: bytes = b""
+    ) -> AsyncIterator[Tuple[int, Mapping[str, str], AsyncIterator[bytes]]]:
+        # The body is returned as sent, so only accept what gidgethub asked for.
+        headers = {"accept-encoding": "identity", **headers}
+        async with self._session.request(
+            method, url, headers=headers, data=body, auto_decompress=False
+        ) as response:
+            yield response.status, response.headers, response.content.iter_any()
+
     async def sleep(self, seconds: float) -> None:
         await asyncio.sleep(seconds)
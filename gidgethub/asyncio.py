@@ -0,0 +1,356 @@
+import asyncio
+import contextlib
+import http.client
+import ssl
+import urllib.parse
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from . import abc as gh_abc
+
+# The most read from a connection at once while reading a response body.
+_READ_SIZE = 64 * 1024
+# Responses with these statuses (or to HEAD requests) never have a body.
+_NO_BODY_STATUSES = frozenset({204, 304})
+
+# (scheme, host, port)
+_Origin = Tuple[str, str, int]
+_T = TypeVar("_T")
+
+
+def _split_url(url: str) -> Tuple[_Origin, str, str]:
+    """Split a URL into its origin, request target, and Host header."""
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in {"http", "https"} or not parts.hostname:
+        raise ValueError(f"unsupported URL: {url!r}")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    target = parts.path or "/"
+    if parts.query:
+        target += "?" + parts.query
+    host = parts.netloc.rpartition("@")[2]
+    return (parts.scheme, parts.hostname, port), target, host
+
+
+def _request_head(
+    method: str, target: str, host: str, headers: Mapping[str, str]
+) -> bytes:
+    """Serialize the request line and headers of an HTTP/1.1 request."""
+    lines = [f"{method} {target} HTTP/1.1", f"host: {host}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    for line in lines:
+        if "\r" in line or "\n" in line:
+            raise ValueError(f"newline in request line or header: {line!r}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+class _Connection:
+    """An HTTP/1.1 connection, which may be reused once a response is read."""
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        read_timeout: Optional[float],
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.read_timeout = read_timeout
+        # When the connection became idle, by the event loop's clock.
+        self.idle_since = 0.0
+        # Whether the last response was read in full and the server agreed
+        # to keep the connection open.
+        self.reusable = False
+
+    def close(self) -> None:
+        self.reusable = False
+        self.writer.close()
+
+    async def _read(self, read: Awaitable[_T]) -> _T:
+        """Wait for a read, for no longer than the read timeout."""
+        if self.read_timeout is None:
+            return await read
+        return await asyncio.wait_for(read, self.read_timeout)
+
+    async def _readline(self) -> bytes:
+        try:
+            return await self._read(self.reader.readline())
+        except ValueError:
+            # The line is longer than the StreamReader's limit.
+            raise http.client.LineTooLong("status line or header")
+
+    async def exchange(
+        self, head: bytes, body: gh_abc.BODY_TYPE, *, chunked: bool
+    ) -> Tuple[int, str, Dict[str, str]]:
+        """Send a request and read the head of its response.
+
+        The connection is closed if that fails.
+        """
+        self.reusable = False
+        try:
+            if isinstance(body, bytes):
+                self.writer.write(head + body)
+            else:
+                self.writer.write(head)
+                await self._write_body(body, chunked=chunked)
+            await self.writer.drain()
+            return await self._read_response_head()
+        except BaseException:
+            self.close()
+            raise
+
+    async def _write_body(self, body: AsyncIterable[bytes], *, chunked: bool) -> None:
+        async for chunk in body:
+            if not chunk:
+                # An empty chunk would end a chunked body.
+                continue
+            if chunked:
+                self.writer.write(b"%x\r\n%b\r\n" % (len(chunk), chunk))
+            else:
+                self.writer.write(chunk)
+            await self.writer.drain()
+        if chunked:
+            self.writer.write(b"0\r\n\r\n")
+
+    async def _read_response_head(self) -> Tuple[int, str, Dict[str, str]]:
+        """Read the status line and headers of the (final) response."""
+        while True:
+            line = await self._readline()
+            if not line:
+                raise http.client.RemoteDisconnected(
+                    "server closed the connection without a response"
+                )
+            version, _, rest = line.decode("latin-1").partition(" ")
+            status = rest[:3]
+            if not version.startswith("HTTP/") or not status.isdigit():
+                raise http.client.BadStatusLine(line.decode("latin-1"))
+            headers: Dict[str, str] = {}
+            while True:
+                line = await self._readline()
+                if not line:
+                    raise http.client.IncompleteRead(b"")
+                if line in {b"\r\n", b"\n"}:
+                    break
+                name, sep, value = line.decode("latin-1").partition(":")
+                if not sep:
+                    raise http.client.HTTPException(f"invalid header: {line!r}")
+                name = name.strip().lower()
+                value = value.strip()
+                headers[name] = (
+                    f"{headers[name]}, {value}" if name in headers else value
+                )
+            # Skip informational responses, e.g. 100 Continue.
+            if not 100 <= int(status) < 200:
+                return int(status), version, headers
+
+    async def read_body(
+        self, method: str, status: int, version: str, headers: Mapping[str, str]
+    ) -> AsyncGenerator[bytes, None]:
+        """Read the response body, marking the connection reusable at its end."""
+        keep_alive = "close" not in headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            keep_alive = "keep-alive" in headers.get("connection", "").lower()
+        if method == "HEAD" or status in _NO_BODY_STATUSES:
+            pass
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            async for chunk in self._read_chunked():
+                yield chunk
+        elif "content-length" in headers:
+            async for chunk in self._read_length(int(headers["content-length"])):
+                yield chunk
+        else:
+            # The body is delimited by the server closing the connection.
+            keep_alive = False
+            while chunk := await self._read(self.reader.read(_READ_SIZE)):
+                yield chunk
+        self.reusable = keep_alive
+
+    async def _read_length(self, length: int) -> AsyncIterator[bytes]:
+        while length > 0:
+            chunk = await self._read(self.reader.read(min(length, _READ_SIZE)))
+            if not chunk:
+                raise http.client.IncompleteRead(b"", length)
+            length -= len(chunk)
+            yield chunk
+
+    async def _read_chunked(self) -> AsyncIterator[bytes]:
+        while True:
+            line = await self._readline()
+            try:
+                size = int(line.split(b";", 1)[0], 16)
+            except ValueError:
+                raise http.client.HTTPException(f"invalid chunk size: {line!r}")
+            if size == 0:
+                break
+            async for chunk in self._read_length(size):
+                yield chunk
+            if await self._readline() not in {b"\r\n", b"\n"}:
+                raise http.client.HTTPException("chunk not followed by a newline")
+        # Skip any trailers.
+        while await self._readline() not in {b"\r\n", b"\n", b""}:
+            pass
+
+
+class ConnectionPool:
+    """Make HTTP/1.1 requests over connections which are kept alive per host."""
+
+    def __init__(
+        self,
+        *,
+        max_connections_per_host: int = 10,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: Optional[float] = 30.0,
+        read_timeout: Optional[float] = 300.0,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ) -> None:
+        if max_connections_per_host < 1:
+            raise ValueError("max_connections_per_host must be at least 1")
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._ssl_context = ssl_context
+        # The number of connections made, for monitoring reuse.
+        self.connections_opened = 0
+        self._slots: Dict[_Origin, asyncio.Semaphore] = {}
+        # Idle connections, the most recently used last.
+        self._idle: Dict[_Origin, List[_Connection]] = {}
+
+    async def __aenter__(self) -> "ConnectionPool":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the idle connections."""
+        connections = [conn for idle in self._idle.values() for conn in idle]
+        self._idle.clear()
+        for connection in connections:
+            connection.close()
+        for connection in connections:
+            with contextlib.suppress(OSError):
+                await connection.writer.wait_closed()
+
+    def _reuse(self, origin: _Origin) -> Optional[_Connection]:
+        """Take an idle connection to *origin* which is still usable."""
+        idle = self._idle.get(origin, [])
+        now = asyncio.get_running_loop().time()
+        while idle:
+            connection = idle.pop()
+            if (
+                now - connection.idle_since < self.keepalive_expiry
+                and not connection.reader.at_eof()
+            ):
+                return connection
+            connection.close()
+        return None
+
+    async def _connect(self, origin: _Origin) -> _Connection:
+        scheme, host, port = origin
+        ssl_context = None
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            ssl_context = self._ssl_context
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=ssl_context),
+            self.connect_timeout,
+        )
+        self.connections_opened += 1
+        return _Connection(reader, writer, self.read_timeout)
+
+    @contextlib.asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: gh_abc.BODY_TYPE = b"",
+    ) -> AsyncIterator[Tuple[int, Mapping[str, str], AsyncIterator[bytes]]]:
+        """Make a request, providing the response body as an iterator of chunks.
+
+        The connection is returned to the pool if the body was read in full.
+        """
+        origin, target, host = _split_url(url)
+        headers = {name.lower(): value for name, value in headers.items()}
+        chunked = False
+        if "content-length" not in headers:
+            if not isinstance(body, bytes):
+                chunked = True
+                headers["transfer-encoding"] = "chunked"
+            elif body or method not in {"GET", "HEAD"}:
+                headers["content-length"] = str(len(body))
+        head = _request_head(method, target, host, headers)
+        if origin not in self._slots:
+            self._slots[origin] = asyncio.Semaphore(self.max_connections_per_host)
+        async with self._slots[origin]:
+            connection = self._reuse(origin)
+            response_head = None
+            if connection is not None:
+                try:
+                    response_head = await connection.exchange(
+                        head, body, chunked=chunked
+                    )
+                except ConnectionError:
+                    # The server closed the idle connection before responding,
+                    # so try again on a new one (if the body can be resent).
+                    if not isinstance(body, bytes):
+                        raise
+            if connection is None or response_head is None:
+                connection = await self._connect(origin)
+                response_head = await connection.exchange(head, body, chunked=chunked)
+            status, version, response_headers = response_head
+            chunks = connection.read_body(method, status, version, response_headers)
+            try:
+                yield status, response_headers, chunks
+            finally:
+                await chunks.aclose()
+                if connection.reusable:
+                    connection.idle_since = asyncio.get_running_loop().time()
+                    self._idle.setdefault(origin, []).append(connection)
+                else:
+                    connection.close()
+
+
+class GitHubAPI(gh_abc.GitHubAPI):
+    transport_errors = (OSError, asyncio.TimeoutError, http.client.HTTPException)
+    encoded_bodies = True
+
+    def __init__(self, pool: ConnectionPool, *args: Any, **kwargs: Any) -> None:
+        self._pool = pool
+        super().__init__(*args, **kwargs)
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: gh_abc.BODY_TYPE = b"",
+    ) -> Tuple[int, Mapping[str, str], bytes]:
+        """Make an HTTP request."""
+        async with self._pool.stream(method, url, headers, body) as response:
+            status_code, response_headers, chunks = response
+            return status_code, response_headers, b"".join([c async for c in chunks])
+
+    @contextlib.asynccontextmanager
+    async def _stream(
+        self, method: str, url: str, headers: Mapping[str, str], body: bytes = b""
+    ) -> AsyncIterator[Tuple[int, Mapping[str, str], AsyncIterator[bytes]]]:
+        """Make an HTTP request, providing the response body as an iterator of chunks."""
+        async with self._pool.stream(method, url, headers, body) as response:
+            yield response
+
+    async def sleep(self, seconds: float) -> None:
+        """Sleep for the specified number of seconds."""
+        await asyncio.sleep(seconds)
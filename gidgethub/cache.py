@@ -0,0 +1,372 @@
+"""Caches for conditional requests made by gidgethub.abc.GitHubAPI."""
+
+import asyncio
+import collections
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from typing import (
+    Any,
+    Callable,
+    List,
+    MutableMapping,
+    Optional,
+    OrderedDict,
+    Protocol,
+    Tuple,
+    Union,
+    runtime_checkable,
+)
+
+from . import codec, sansio
+
+# Value represents etag, last-modified, data, and next page.
+CACHE_ENTRY = Tuple[Optional[str], Optional[str], Any, Optional[str]]
+
+# Raw bodies of at least this many bytes are compressed by default.
+COMPRESS_THRESHOLD = 4 * 1024
+# How many entries an SQLiteCache sets between purges of expired entries.
+_PURGE_INTERVAL = 1000
+
+
+class RawBody:
+    """The undecoded (and possibly compressed) body of a response.
+
+    GitHubAPI caches these instead of the decoded data when it is created with
+    cache_raw=True, as the bytes of a JSON body take up a fraction of the
+    memory of the objects decoded from them.
+    """
+
+    __slots__ = ("content_type", "body", "compressed")
+
+    def __init__(
+        self, content_type: Optional[str], body: bytes, *, compressed: bool = False
+    ) -> None:
+        self.content_type = content_type
+        self.body = body
+        self.compressed = compressed
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}({self.content_type!r}, <{len(self.body)} bytes>, "
+            f"compressed={self.compressed!r})"
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RawBody):
+            return NotImplemented
+        return (self.content_type, self.body, self.compressed) == (
+            other.content_type,
+            other.body,
+            other.compressed,
+        )
+
+    @classmethod
+    def from_body(
+        cls,
+        content_type: Optional[str],
+        body: Union[bytes, bytearray, memoryview],
+        *,
+        compress_threshold: Optional[int] = COMPRESS_THRESHOLD,
+    ) -> "RawBody":
+        """Create an instance, compressing bodies of at least *compress_threshold* bytes."""
+        if not isinstance(body, bytes):
+            # Don't keep a view of a buffer which its owner may reuse.
+            body = bytes(body)
+        if compress_threshold is not None and len(body) >= compress_threshold:
+            compressed = zlib.compress(body)
+            if len(compressed) < len(body):
+                return cls(content_type, compressed, compressed=True)
+        return cls(content_type, body)
+
+    def decode(self, *, json_codec: codec.JSONCodec = codec.DEFAULT_CODEC) -> Any:
+        """Decode the body according to its content type."""
+        body = zlib.decompress(self.body) if self.compressed else self.body
+        return sansio._decode_body(self.content_type, body, json_codec=json_codec)
+
+
+@runtime_checkable
+class AsyncCache(Protocol):
+    """The protocol of an asynchronous cache for conditional requests."""
+
+    async def get(self, key: str) -> Optional[CACHE_ENTRY]:
+        """Return the entry for *key*, or None if there is no (fresh) entry."""
+
+    async def set(
+        self, key: str, value: CACHE_ENTRY, *, ttl: Optional[float] = None
+    ) -> None:
+        """Store *value* for *key*, optionally expiring after *ttl* seconds."""
+
+    async def delete(self, key: str) -> None:
+        """Remove any entry for *key*."""
+
+
+class MappingCache:
+    """Adapt a mutable mapping (e.g. a dict) to the AsyncCache protocol.
+
+    Any *ttl* is ignored; use a mapping with its own expiration scheme (e.g.
+    cachetools.TTLCache) if entries should expire.
+    """
+
+    def __init__(self, mapping: MutableMapping[str, CACHE_ENTRY]) -> None:
+        self.mapping = mapping
+
+    async def get(self, key: str) -> Optional[CACHE_ENTRY]:
+        try:
+            return self.mapping[key]
+        except KeyError:
+            return None
+
+    async def set(
+        self, key: str, value: CACHE_ENTRY, *, ttl: Optional[float] = None
+    ) -> None:
+        self.mapping[key] = value
+
+    async def delete(self, key: str) -> None:
+        self.mapping.pop(key, None)
+
+    async def revalidate(self, key: str, *, ttl: Optional[float] = None) -> None:
+        # The entry is already in the mapping and there is no expiry to extend.
+        pass
+
+
+class SQLiteCache:
+    """A cache stored in an SQLite database file.
+
+    As SQLite handles the locking of the database file, a single file can be
+    shared by multiple processes on the same machine. Entries are stored as
+    JSON, and so the cached data must be serializable as JSON (which is always
+    the case for what GitHubAPI caches) or be a RawBody. The blocking database calls are run
+    in a worker thread.
+
+    The *ttl* argument specifies the default number of seconds an entry is
+    considered fresh for; None means entries never expire. Expired entries are
+    deleted every so many sets, or when purge() is called.
+    """
+
+    def __init__(
+        self, path: Union[str, "os.PathLike[str]"], *, ttl: Optional[float] = None
+    ) -> None:
+        # Imported here so that importing gidgethub.abc doesn't import sqlite3.
+        import sqlite3
+
+        self.ttl = ttl
+        self._sets_until_purge = _PURGE_INTERVAL
+        self._lock = threading.Lock()
+        # The connection is shared with the worker threads; access to it is
+        # serialized by the lock.
+        self._connection = sqlite3.connect(
+            os.fspath(path), timeout=30, check_same_thread=False
+        )
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            # A RawBody is stored in its own columns as its body is binary.
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS gidgethub_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL, "
+                "content_type TEXT, body BLOB, compressed INTEGER)"
+            )
+
+    def _get(self, key: str) -> Optional[CACHE_ENTRY]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires, content_type, body, compressed "
+                "FROM gidgethub_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires, content_type, body, compressed = row
+        if expires is not None and expires <= time.time():
+            return None
+        etag, last_modified, data, more = json.loads(value)
+        if body is not None:
+            data = RawBody(content_type, body, compressed=bool(compressed))
+        return etag, last_modified, data, more
+
+    def _set(self, key: str, value: CACHE_ENTRY, ttl: Optional[float]) -> None:
+        if ttl is None:
+            ttl = self.ttl
+        expires = None if ttl is None else time.time() + ttl
+        etag, last_modified, data, more = value
+        content_type = body = compressed = None
+        if isinstance(data, RawBody):
+            content_type = data.content_type
+            body = data.body
+            compressed = data.compressed
+            data = None
+        serialized = json.dumps((etag, last_modified, data, more))
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO gidgethub_cache "
+                "(key, value, expires, content_type, body, compressed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, serialized, expires, content_type, body, compressed),
+            )
+        self._sets_until_purge -= 1
+        if self._sets_until_purge <= 0:
+            self._purge()
+
+    def _purge(self) -> int:
+        self._sets_until_purge = _PURGE_INTERVAL
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "DELETE FROM gidgethub_cache WHERE expires <= ?", (time.time(),)
+            )
+        return cursor.rowcount
+
+    def _revalidate(self, key: str, ttl: Optional[float]) -> None:
+        if ttl is None:
+            ttl = self.ttl
+        expires = None if ttl is None else time.time() + ttl
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE gidgethub_cache SET expires = ? WHERE key = ?",
+                (expires, key),
+            )
+
+    def _delete(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM gidgethub_cache WHERE key = ?", (key,)
+            )
+
+    async def get(self, key: str) -> Optional[CACHE_ENTRY]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(
+        self, key: str, value: CACHE_ENTRY, *, ttl: Optional[float] = None
+    ) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+    async def revalidate(self, key: str, *, ttl: Optional[float] = None) -> None:
+        await asyncio.to_thread(self._revalidate, key, ttl)
+
+    async def purge(self) -> int:
+        """Delete the expired entries, returning how many were deleted."""
+        return await asyncio.to_thread(self._purge)
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        with self._lock:
+            self._connection.close()
+
+
+def approximate_size(obj: Any) -> int:
+    """Approximate the number of bytes of memory used by a decoded JSON object."""
+    size = 0
+    stack: List[Any] = [obj]
+    while stack:
+        item = stack.pop()
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, RawBody):
+            stack.extend((item.content_type, item.body))
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return size
+
+
+class LRUCache:
+    """An in-memory cache which evicts the least recently used entries.
+
+    The cache holds at most *maxsize* entries and, if *max_bytes* is not None,
+    entries whose combined size is at most *max_bytes* as measured by
+    *size_of*. If *max_age* is not None, entries expire after that many
+    seconds (unless a different *ttl* is specified when the entry is set).
+
+    The hits, misses, evictions, and revalidations attributes count how the
+    cache has been used. A revalidation is GitHubAPI confirming an entry is
+    current after GitHub responds with a 304 to a conditional request, or an
+    entry being set again with the same etag and last-modified values.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        *,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        size_of: Callable[[CACHE_ENTRY], int] = approximate_size,
+    ) -> None:
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._size_of = size_of
+        # Key -> (entry, size, expiration time)
+        self._entries: OrderedDict[str, Tuple[CACHE_ENTRY, int, Optional[float]]]
+        self._entries = collections.OrderedDict()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = self.revalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.nbytes -= size
+
+    async def get(self, key: str) -> Optional[CACHE_ENTRY]:
+        try:
+            entry, _, expires = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        if expires is not None and expires <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    async def set(
+        self, key: str, value: CACHE_ENTRY, *, ttl: Optional[float] = None
+    ) -> None:
+        if ttl is None:
+            ttl = self.max_age
+        expires = None if ttl is None else time.monotonic() + ttl
+        if key in self._entries:
+            old_value, _, _ = self._entries[key]
+            if old_value[:2] == value[:2]:
+                self.revalidations += 1
+            self._remove(key)
+        size = self._size_of(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # The entry would evict everything else and still not fit.
+            return
+        self._entries[key] = value, size, expires
+        self.nbytes += size
+        while len(self._entries) > self.maxsize or (
+            self.max_bytes is not None and self.nbytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+    async def revalidate(self, key: str, *, ttl: Optional[float] = None) -> None:
+        try:
+            entry, size, _ = self._entries[key]
+        except KeyError:
+            return
+        if ttl is None:
+            ttl = self.max_age
+        expires = None if ttl is None else time.monotonic() + ttl
+        self._entries[key] = entry, size, expires
+        self._entries.move_to_end(key)
+        self.revalidations += 1
@@ -0,0 +1,53 @@
+"""Pluggable encoding and decoding of JSON."""
+
+import json
+from typing import Any, Protocol, Union
+
+
+class JSONCodec(Protocol):
+    """The protocol of an object which encodes and decodes JSON."""
+
+    def encode(self, obj: Any) -> bytes:
+        """Serialize *obj* as UTF-8 encoded JSON."""
+
+    def decode(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """Deserialize JSON, which is UTF-8 encoded unless it is a str."""
+
+
+class StdlibJSONCodec:
+    """Encode and decode JSON with the standard library's json module."""
+
+    def encode(self, obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    def decode(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        if isinstance(data, memoryview):
+            # json.loads() only accepts str, bytes, and bytearray.
+            data = str(data, "utf-8")
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """Encode and decode JSON with `orjson <https://pypi.org/project/orjson/>`_.
+
+    orjson must be installed (e.g. via the ``orjson`` extra of gidgethub).
+    Unlike the json module, orjson does not accept dicts with non-string keys
+    nor integers which do not fit in 64 bits.
+    """
+
+    def __init__(self) -> None:
+        import orjson
+
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+
+    def encode(self, obj: Any) -> bytes:
+        encoded: bytes = self._dumps(obj)
+        return encoded
+
+    def decode(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return self._loads(data)
+
+
+# The codec used when none is specified.
+DEFAULT_CODEC: JSONCodec = StdlibJSONCodec()
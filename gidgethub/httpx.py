@@ -1,24 +1,79 @@
 import asyncio
-from typing import Mapping, Tuple, Any
+import contextlib
+from typing import AsyncIterator, Mapping, Optional, Tuple, Any
 
 import httpx
 
 from . import abc as gh_abc
 
 
+def create_client(
+    *,
+    http2: Optional[bool] = None,
+    max_connections: Optional[int] = 10,
+    max_keepalive_connections: Optional[int] = None,
+    keepalive_expiry: Optional[float] = 30.0,
+    **kwargs: Any,
+) -> httpx.AsyncClient:
+    """Create a client suited to making many concurrent requests to GitHub.
+
+    With 'http2', concurrent requests are multiplexed as streams over a
+    shared connection instead of each needing a connection (and TLS session)
+    of its own; this requires the h2 package, which the 'http2' extra of
+    gidgethub installs. By default HTTP/2 is used if h2 is installed. The
+    other keyword arguments are passed on to httpx.AsyncClient.
+    """
+    if http2 is None:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            http2 = False
+        else:
+            http2 = True
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    return httpx.AsyncClient(http2=http2, limits=limits, **kwargs)
+
+
 class GitHubAPI(gh_abc.GitHubAPI):
+    transport_errors = (httpx.TransportError,)
+    encoded_bodies = True
+
     def __init__(self, client: httpx.AsyncClient, *args: Any, **kwargs: Any) -> None:
         self._client = client
         super().__init__(*args, **kwargs)
 
     async def _request(
-        self, method: str, url: str, headers: Mapping[str, str], body: bytes = b""
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: gh_abc.BODY_TYPE = b"",
     ) -> Tuple[int, Mapping[str, str], bytes]:
         """Make an HTTP request."""
-        response = await self._client.request(
-            method, url, headers=dict(headers), content=body
-        )
-        return response.status_code, response.headers, response.content
+        # The body is returned as sent, so only accept what gidgethub asked for.
+        headers = {"accept-encoding": "identity", **headers}
+        async with self._client.stream(
+            method, url, headers=headers, content=body
+        ) as response:
+            # The raw body, as httpx can't be told not to decompress the content.
+            response_body = b"".join([chunk async for chunk in response.aiter_raw()])
+            return response.status_code, response.headers, response_body
+
+    @contextlib.asynccontextmanager
+    async def _stream(
+        self, method: str, url: str, headers: Mapping[str, str], body: bytes = b""
+    ) -> AsyncIterator[Tuple[int, Mapping[str, str], AsyncIterator[bytes]]]:
+        """Make an HTTP request, providing the response body as an iterator of chunks."""
+        # The body is returned as sent, so only accept what gidgethub asked for.
+        headers = {"accept-encoding": "identity", **headers}
+        async with self._client.stream(
+            method, url, headers=headers, content=body
+        ) as response:
+            yield response.status_code, response.headers, response.aiter_raw()
 
     async def sleep(self, seconds: float) -> None:
         """Sleep for the specified number of seconds."""
@@ -0,0 +1,232 @@
+"""Observe the HTTP requests made through GitHubAPI."""
+
+import bisect
+import collections
+import datetime
+from typing import (
+    Counter,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+)
+
+from . import sansio
+
+# The upper bounds (in seconds) of the buckets of latency histograms.
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestMetrics(NamedTuple):
+    """The measurements of an HTTP request made by GitHubAPI.
+
+    Each attempt of a request which is retried is measured separately.
+    """
+
+    method: str
+    # The URL as it was passed, before its variables were expanded.
+    template: str
+    url: str
+    # None if no response was received.
+    status_code: Optional[int]
+    # The size of the request body, or None if it was streamed without a
+    # content-length.
+    bytes_sent: Optional[int]
+    # The size of the response body as it was received (i.e. compressed).
+    bytes_received: int
+    # The seconds from sending the request until the response was read.
+    duration: float
+    # 1 for the first attempt at a request, 2 for its first retry, etc.
+    attempt: int
+    # The rate limit reported by the response, if any.
+    rate_limit: Optional[sansio.RateLimit]
+    # The exception which kept a response from being received, if any.
+    error: Optional[BaseException] = None
+
+    @property
+    def revalidated(self) -> bool:
+        """Whether the response confirmed that a cached response is current."""
+        return self.status_code == 304
+
+
+class RequestListener(Protocol):
+    """The protocol of an object which is told about every request made."""
+
+    def request_finished(self, metrics: RequestMetrics) -> None:
+        """Receive the measurements of a request.
+
+        This is called synchronously while handling the response, so it
+        should be quick and not raise.
+        """
+
+
+class Histogram:
+    """Count observed values in buckets with the given upper *bounds*.
+
+    A final bucket counts the values which are larger than all of the bounds.
+    """
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        if list(bounds) != sorted(set(bounds)) or not bounds:
+            raise ValueError("bounds must be increasing")
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the *q*-quantile (e.g. 0.99) of the observed values.
+
+        The estimate is the upper bound of the bucket which the quantile falls
+        in, or infinity for the final bucket. None is returned if no values
+        have been observed.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return float("inf")
+
+
+class EndpointStats:
+    """The aggregated measurements of the requests to an endpoint."""
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.requests = 0
+        self.retries = 0
+        self.revalidated = 0
+        # Requests which received no response, e.g. because of a timeout.
+        self.transport_errors = 0
+        self.statuses: Counter[int] = collections.Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = Histogram(bounds)
+
+    def add(self, metrics: RequestMetrics) -> None:
+        self.requests += 1
+        if metrics.attempt > 1:
+            self.retries += 1
+        if metrics.revalidated:
+            self.revalidated += 1
+        if metrics.status_code is None:
+            self.transport_errors += 1
+        else:
+            self.statuses[metrics.status_code] += 1
+        self.bytes_sent += metrics.bytes_sent or 0
+        self.bytes_received += metrics.bytes_received
+        self.latency.observe(metrics.duration)
+
+
+class MetricsCollector:
+    """A RequestListener which aggregates measurements per endpoint.
+
+    The requests to each (method, URL template) pair are aggregated in the
+    EndpointStats of the 'endpoints' dict, with latencies counted in
+    histograms with the given bucket *bounds*.
+    """
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        # Fail early on invalid bounds.
+        Histogram(self.bounds)
+        self.endpoints: Dict[Tuple[str, str], EndpointStats] = {}
+
+    def request_finished(self, metrics: RequestMetrics) -> None:
+        key = metrics.method, metrics.template
+        try:
+            stats = self.endpoints[key]
+        except KeyError:
+            stats = self.endpoints[key] = EndpointStats(self.bounds)
+        stats.add(metrics)
+
+
+class EndpointCost(NamedTuple):
+    """The share of the rate limit used by the requests to an endpoint."""
+
+    requests: int = 0
+    # 304 responses, which do not count against the rate limit.
+    revalidated: int = 0
+    # Requests for the core API, or points for the GraphQL API.
+    cost: int = 0
+    # The rate limit the endpoint counts against, e.g. "core" or "graphql".
+    resource: Optional[str] = None
+
+
+class CostLedger:
+    """A RequestListener which attributes rate limit usage to endpoints.
+
+    Requests are attributed to their (method, URL template) pair. A request
+    costs 1 unless it was answered with a 304 or not answered at all. The cost
+    of a GraphQL query is how much the "used" points of the rate limit grew
+    since the previous response in the same rate limit window; as the rate
+    limit may be shared, this is an estimate.
+    """
+
+    def __init__(self) -> None:
+        # Entries are replaced rather than mutated so snapshots stay valid.
+        self._costs: Dict[Tuple[str, str], EndpointCost] = {}
+        # The most points seen used per GraphQL rate limit window.
+        self._graphql_used: Dict[datetime.datetime, int] = {}
+
+    def request_finished(self, metrics: RequestMetrics) -> None:
+        key = metrics.method, metrics.template
+        entry = self._costs.get(key, EndpointCost())
+        rate_limit = metrics.rate_limit
+        cost = 0
+        if metrics.revalidated:
+            entry = entry._replace(revalidated=entry.revalidated + 1)
+        elif metrics.status_code is None:
+            pass
+        elif rate_limit is not None and rate_limit.resource == "graphql":
+            cost = self._graphql_cost(rate_limit)
+        else:
+            cost = 1
+        if rate_limit is not None and rate_limit.resource is not None:
+            entry = entry._replace(resource=rate_limit.resource)
+        self._costs[key] = entry._replace(
+            requests=entry.requests + 1, cost=entry.cost + cost
+        )
+
+    def _graphql_cost(self, rate_limit: sansio.RateLimit) -> int:
+        used = rate_limit.used
+        if used is None:
+            used = rate_limit.limit - rate_limit.remaining
+        window = rate_limit.reset_datetime
+        previous = self._graphql_used.get(window)
+        if previous is None:
+            # Forget the windows which have ended.
+            self._graphql_used.clear()
+            self._graphql_used[window] = used
+            # Every query costs at least a point.
+            return 1
+        self._graphql_used[window] = max(previous, used)
+        return max(used - previous, 0)
+
+    def snapshot(self) -> Dict[Tuple[str, str], EndpointCost]:
+        """Return the cost of each endpoint so far."""
+        return self._costs.copy()
+
+    def most_expensive(
+        self, n: Optional[int] = None
+    ) -> List[Tuple[Tuple[str, str], EndpointCost]]:
+        """Return the *n* endpoints (or all of them) which cost the most."""
+        ranked = sorted(
+            self._costs.items(),
+            key=lambda item: (item[1].cost, item[1].requests),
+            reverse=True,
+        )
+        return ranked if n is None else ranked[:n]
@@ -0,0 +1,69 @@
+"""Proactively stay within GitHub's rate limit."""
+
+import time
+from typing import Dict, Optional
+
+from . import sansio
+
+
+class RateLimitScheduler:
+    """Pace requests so the remaining rate limit lasts until it resets.
+
+    Once fewer than *threshold* (a fraction of the limit) requests remain,
+    requests are spread out evenly over the time left until the rate limit
+    resets, with each request delayed by no more than *max_delay* seconds (if
+    specified). When no more than *reserve* requests remain, requests wait
+    until the rate limit resets. Each rate limit resource (e.g. "core" or
+    "search") is paced separately.
+
+    The delayed_requests, total_delay, and longest_delay attributes record how
+    much requests have been delayed.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.1,
+        reserve: int = 0,
+        max_delay: Optional[float] = None,
+    ) -> None:
+        if not 0 <= threshold <= 1:
+            raise ValueError("threshold must be between 0 and 1")
+        self.threshold = threshold
+        self.reserve = reserve
+        self.max_delay = max_delay
+        # When the next paced request to each resource may be made (in seconds
+        # since the epoch).
+        self._next_slots: Dict[str, float] = {}
+        self.delayed_requests = 0
+        self.total_delay = 0.0
+        self.longest_delay = 0.0
+
+    def delay(self, rate_limit: sansio.RateLimit, now: Optional[float] = None) -> float:
+        """Calculate how many seconds to wait before making the next request.
+
+        The request is assumed to be made once the delay has passed. *now* is
+        the current time in seconds since the epoch.
+        """
+        if now is None:
+            now = time.time()
+        time_left = rate_limit.reset_datetime.timestamp() - now
+        usable = rate_limit.remaining - self.reserve
+        if time_left <= 0:
+            delay = 0.0
+        elif usable <= 0:
+            delay = time_left
+        elif rate_limit.remaining < rate_limit.limit * self.threshold:
+            resource = rate_limit.resource or "core"
+            start = max(now, self._next_slots.get(resource, 0.0))
+            if self.max_delay is not None:
+                start = min(start, now + self.max_delay)
+            self._next_slots[resource] = start + time_left / usable
+            delay = start - now
+        else:
+            delay = 0.0
+        if delay > 0:
+            self.delayed_requests += 1
+            self.total_delay += delay
+            self.longest_delay = max(self.longest_delay, delay)
+        return delay
@@ -0,0 +1,150 @@
+"""Retrying requests which failed or GitHub asks to be made again later."""
+
+import collections
+import datetime
+import email.utils
+import http
+import random
+import time
+from typing import AbstractSet, Counter, Mapping, Optional, Union
+
+from . import BadGraphQLRequest, HTTPException
+
+# https://httpwg.org/specs/rfc9110.html#idempotent.methods
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Server errors which are typically transient.
+TRANSIENT_STATUSES = frozenset({500, 502, 503, 504})
+
+
+def _retry_after(headers: Mapping[str, str], now: float) -> Optional[float]:
+    """Return how long the retry-after header says to wait, if it was specified."""
+    # https://httpwg.org/specs/rfc9110.html#field.retry-after
+    try:
+        value = headers["retry-after"]
+    except KeyError:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(retry_at.timestamp() - now, 0.0)
+
+
+class RetryPolicy:
+    """Decide whether and when to retry a request which failed.
+
+    Requests using one of *methods* are retried when GitHub responds that a
+    primary or secondary rate limit has been exceeded, waiting as long as
+    GitHub asks via the retry-after or x-ratelimit-reset headers (or
+    *secondary_rate_limit_wait* seconds if it doesn't say). Requests which
+    fail with a status code in *statuses* or a transport error are retried
+    with an exponential backoff starting at *base_delay* seconds and capped at
+    *max_delay* seconds, of which up to a *jitter* fraction is random.
+
+    A request is given up on after *max_attempts* attempts or once retrying it
+    would have it wait more than *max_wait* seconds in total.
+
+    The retries and total_wait attributes record how often and how long
+    requests waited to be retried, while retries_by_cause counts retries by
+    the status code or exception type name which caused them.
+    """
+
+    def __init__(
+        self,
+        *,
+        methods: AbstractSet[str] = IDEMPOTENT_METHODS,
+        statuses: AbstractSet[int] = TRANSIENT_STATUSES,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        jitter: float = 1.0,
+        max_wait: float = 300.0,
+        secondary_rate_limit_wait: float = 60.0,
+    ) -> None:
+        if not 0 <= jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1")
+        self.methods = methods
+        self.statuses = statuses
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.max_wait = max_wait
+        self.secondary_rate_limit_wait = secondary_rate_limit_wait
+        self.retries = 0
+        self.total_wait = 0.0
+        self.retries_by_cause: Counter[str] = collections.Counter()
+
+    def _rate_limit_delay(
+        self, exc: Union[HTTPException, BadGraphQLRequest], now: float
+    ) -> Optional[float]:
+        # https://docs.github.com/en/rest/using-the-rest-api/rate-limits-for-the-rest-api#exceeding-the-rate-limit
+        if exc.status_code not in {
+            http.HTTPStatus.FORBIDDEN,
+            http.HTTPStatus.TOO_MANY_REQUESTS,
+        }:
+            return None
+        delay = _retry_after(exc.headers, now)
+        if delay is not None:
+            return delay
+        elif exc.headers.get("x-ratelimit-remaining") == "0":
+            try:
+                reset = float(exc.headers["x-ratelimit-reset"])
+            except (KeyError, ValueError):
+                return self.secondary_rate_limit_wait
+            return max(reset - now, 0.0)
+        elif (
+            exc.status_code == http.HTTPStatus.TOO_MANY_REQUESTS
+            or "secondary rate limit" in str(exc).lower()
+        ):
+            return self.secondary_rate_limit_wait
+        else:
+            # Simply forbidden.
+            return None
+
+    def _backoff(self, attempt: int) -> float:
+        # https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+        delay = min(self.base_delay * 2.0 ** (attempt - 1), self.max_delay)
+        return delay * (1 - self.jitter * random.random())
+
+    def delay(
+        self,
+        method: str,
+        exc: Exception,
+        attempt: int,
+        waited: float,
+        now: Optional[float] = None,
+    ) -> Optional[float]:
+        """Return how many seconds to wait before retrying, or None to give up.
+
+        The exception is either an HTTPException, a BadGraphQLRequest, or a
+        transport error raised by the HTTP library. *attempt* is the number of attempts made so far
+        and *waited* is how many seconds have already been spent waiting to
+        retry the request. *now* is the current time in seconds since the
+        epoch.
+        """
+        if method.upper() not in self.methods or attempt >= self.max_attempts:
+            return None
+        if now is None:
+            now = time.time()
+        delay: Optional[float]
+        if isinstance(exc, (HTTPException, BadGraphQLRequest)):
+            cause = str(int(exc.status_code))
+            delay = self._rate_limit_delay(exc, now)
+            if delay is None and exc.status_code in self.statuses:
+                delay = self._backoff(attempt)
+        else:
+            cause = type(exc).__name__
+            delay = self._backoff(attempt)
+        if delay is None or waited + delay > self.max_wait:
+            return None
+        self.retries += 1
+        self.retries_by_cause[cause] += 1
+        self.total_wait += delay
+        return delay
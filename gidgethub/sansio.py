@@ -6,18 +6,23 @@ when working with GitHub's API (e.g. validating webhook events or specifying the
 API version you want your request to work against).
 """
 
+import codecs
 import datetime
+import functools
 import hmac
 import http
+import importlib
 import json
 import re
 import urllib.parse
+import zlib
 from email.message import Message
-from typing import Any, Dict, Mapping, Optional, Tuple, Type, Union
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Type, Union
 
 import uritemplate
 from uritemplate import variable
 
+from . import codec
 from . import (
     BadRequest,
     BadRequestUnknownError,
@@ -48,29 +53,234 @@ def _parse_content_type(content_type: Optional[str]) -> Tuple[Optional[str], str
         return type_, str(encoding)
 
 
+@functools.lru_cache(maxsize=32)
+def _is_utf8(encoding: str) -> bool:
+    """Return whether *encoding* names UTF-8 (raising LookupError if unknown)."""
+    return codecs.lookup(encoding).name == "utf-8"
+
+
 def _decode_body(
-    content_type: Optional[str], body: bytes, *, strict: bool = False
+    content_type: Optional[str],
+    body: Union[bytes, bytearray, memoryview],
+    *,
+    strict: bool = False,
+    json_codec: codec.JSONCodec = codec.DEFAULT_CODEC,
 ) -> Any:
     """Decode an HTTP body based on the specified content type.
 
     If 'strict' is true, then raise ValueError if the content type
     is not recognized. Otherwise simply returned the body as a decoded
-    string.
+    string. JSON is decoded with 'json_codec'.
     """
     type_, encoding = _parse_content_type(content_type)
     if not len(body) or not content_type:
         return None
-    decoded_body = body.decode(encoding)
+    if type_ == "application/json" and _is_utf8(encoding):
+        # JSON codecs read UTF-8 themselves, which spares a str copy of the
+        # body when the codec parses bytes directly.
+        return json_codec.decode(body)
+    decoded_body = str(body, encoding)
     if type_ == "application/json":
-        return json.loads(decoded_body)
+        return json_codec.decode(decoded_body)
     elif type_ == "application/x-www-form-urlencoded":
-        return json.loads(urllib.parse.parse_qs(decoded_body)["payload"][0])
+        return json_codec.decode(urllib.parse.parse_qs(decoded_body)["payload"][0])
     elif strict:
         raise ValueError(f"unrecognized content type: {type_!r}")
     return decoded_body
 
 
-def validate_event(payload: bytes, *, signature: str, secret: str) -> None:
+def _page_items(data: Any, iterable_key: Optional[str]) -> Any:
+    """Return the iterable of items contained in a page of results."""
+    if isinstance(data, dict) and iterable_key in data:
+        return data[iterable_key]
+    return data
+
+
+_non_whitespace_re = re.compile(r"[^ \t\n\r]")
+# What may follow a complete JSON value or key; needed to know e.g. that "12"
+# isn't the start of "123" or "12.5".
+_VALUE_DELIMITERS = frozenset(" \t\n\r,:]}")
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    match = _non_whitespace_re.search(text, pos)
+    return len(text) if match is None else match.start()
+
+
+class _ItemDecoder:
+    """Incrementally decode the items in the body of a page of results.
+
+    The items of a top-level JSON array, or of the array under *iterable_key*
+    in a top-level JSON object, are returned by feed() as soon as they have
+    been received, so only the undecoded remainder of the body is held in
+    memory. Any other body is decoded by close() once it has been received
+    in full (with *json_codec*; items are always decoded by the json module).
+    Either way the items are the same as those of
+    _page_items(_decode_body(content_type, body), iterable_key).
+    """
+
+    # States of the decoder.
+    _START, _ITEMS, _MEMBERS, _END, _WHOLE = range(5)
+
+    def __init__(
+        self,
+        content_type: Optional[str],
+        iterable_key: Optional[str],
+        *,
+        json_codec: codec.JSONCodec = codec.DEFAULT_CODEC,
+    ) -> None:
+        type_, encoding = _parse_content_type(content_type)
+        self._content_type = content_type
+        self._json_codec = json_codec
+        self._iterable_key = iterable_key
+        self._state = self._START if type_ == "application/json" else self._WHOLE
+        # The raw body, kept until it's known whether it has to be decoded whole.
+        self._chunks: List[bytes] = []
+        self._text = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ""
+        self._json = json.JSONDecoder()
+        # Whether the items are those of a member of a top-level object.
+        self._in_object = False
+        self._members: Dict[str, Any] = {}
+        self._key: Optional[str] = None
+        # What was last seen in the array or object: "[", ",", or a value.
+        self._last = "["
+        # How much of an incomplete value must be buffered before trying to
+        # decode it again; doubling it keeps the total work linear.
+        self._retry_size = 0
+
+    def _error(self, message: str, pos: int) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, pos)
+
+    def _decode_value(self, pos: int, final: bool) -> Tuple[Any, int]:
+        """Decode the value at *pos*, returning an end of -1 if it's incomplete."""
+        pending = len(self._buffer) - pos
+        if not final and pending < self._retry_size:
+            return None, -1
+        try:
+            value, end = self._json.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            self._retry_size = pending * 2
+            return None, -1
+        if not final and (
+            end == len(self._buffer) or self._buffer[end] not in _VALUE_DELIMITERS
+        ):
+            self._retry_size = pending + 1
+            return None, -1
+        self._retry_size = 0
+        return value, end
+
+    def _decode(self, final: bool) -> List[Any]:
+        buffer = self._buffer
+        items: List[Any] = []
+        pos = 0
+        while True:
+            pos = _skip_whitespace(buffer, pos)
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if self._state == self._START:
+                if char == "[":
+                    self._state = self._ITEMS
+                elif char == "{" and self._iterable_key is not None:
+                    self._state = self._MEMBERS
+                else:
+                    # Not a page of items, so it's decoded once it's complete.
+                    self._state = self._WHOLE
+                    self._buffer = ""
+                    return items
+                self._chunks.clear()
+                pos += 1
+            elif self._state == self._END:
+                raise self._error("Extra data", pos)
+            elif char == ("]" if self._state == self._ITEMS else "}"):
+                if self._last == "," or self._key is not None:
+                    raise self._error("Expecting value", pos)
+                pos += 1
+                if self._state == self._ITEMS and self._in_object:
+                    self._state = self._MEMBERS
+                    self._last = "value"
+                else:
+                    self._state = self._END
+            elif char == ",":
+                if self._last != "value":
+                    raise self._error("Expecting value", pos)
+                pos += 1
+                self._last = ","
+            elif self._last == "value":
+                raise self._error("Expecting ',' delimiter", pos)
+            elif self._state == self._ITEMS:
+                item, end = self._decode_value(pos, final)
+                if end < 0:
+                    break
+                items.append(item)
+                pos = end
+                self._last = "value"
+            elif self._key is None:
+                # An object member's key and the colon which follows it.
+                if char != '"':
+                    raise self._error("Expecting property name", pos)
+                key, end = self._decode_value(pos, final)
+                if end < 0:
+                    break
+                colon = _skip_whitespace(buffer, end)
+                if colon == len(buffer):
+                    break
+                elif buffer[colon] != ":":
+                    raise self._error("Expecting ':' delimiter", colon)
+                self._key = key
+                pos = colon + 1
+            elif self._key == self._iterable_key and char == "[":
+                self._state = self._ITEMS
+                self._in_object = True
+                self._key = None
+                self._last = "["
+                pos += 1
+            else:
+                value, end = self._decode_value(pos, final)
+                if end < 0:
+                    break
+                self._members[self._key] = value
+                self._key = None
+                pos = end
+                self._last = "value"
+        self._buffer = buffer[pos:]
+        return items
+
+    def feed(self, data: bytes) -> List[Any]:
+        """Add the next chunk of the body, returning any items it completes."""
+        if self._state in {self._START, self._WHOLE}:
+            self._chunks.append(data)
+            if self._state == self._WHOLE:
+                return []
+        self._buffer += self._text.decode(data)
+        return self._decode(final=False)
+
+    def close(self) -> Iterable[Any]:
+        """Signal the end of the body, returning the remaining items."""
+        if self._state != self._WHOLE:
+            self._buffer += self._text.decode(b"", final=True)
+            items = self._decode(final=True)
+            if self._state == self._END:
+                if self._in_object or not self._members:
+                    return items
+                # The object has no array under iterable_key.
+                members: Iterable[Any] = _page_items(self._members, self._iterable_key)
+                return members
+            elif self._state != self._WHOLE and self._state != self._START:
+                raise self._error("Unterminated JSON", len(self._buffer))
+        data = _decode_body(
+            self._content_type, b"".join(self._chunks), json_codec=self._json_codec
+        )
+        page: Iterable[Any] = _page_items(data, self._iterable_key)
+        return page
+
+
+def validate_event(
+    payload: Union[bytes, bytearray, memoryview], *, signature: str, secret: str
+) -> None:
     """Validate the signature of a webhook event."""
     # https://docs.github.com/en/developers/webhooks-and-events/securing-your-webhooks#validating-payloads-from-github
     sha256_signature_prefix = "sha256="
@@ -109,7 +319,12 @@ class Event:
 
     @classmethod
     def from_http(
-        cls, headers: Mapping[str, str], body: bytes, *, secret: Optional[str] = None
+        cls,
+        headers: Mapping[str, str],
+        body: Union[bytes, bytearray, memoryview],
+        *,
+        secret: Optional[str] = None,
+        json_codec: codec.JSONCodec = codec.DEFAULT_CODEC,
     ) -> "Event":
         """Construct an event from HTTP headers and JSON body data.
 
@@ -124,6 +339,8 @@ class Event:
         will be performed unconditionally. Any failure in validation
         (including not providing a secret) will lead to ValidationFailure being
         raised.
+
+        The body is decoded with 'json_codec'.
         """
         signature = headers.get("x-hub-signature-256", headers.get("x-hub-signature"))
         if signature is not None:
@@ -134,7 +351,9 @@ class Event:
             raise ValidationFailure("signature is missing")
 
         try:
-            data = _decode_body(headers["content-type"], body, strict=True)
+            data = _decode_body(
+                headers["content-type"], body, strict=True, json_codec=json_codec
+            )
         except (KeyError, ValueError) as exc:
             raise BadRequest(
                 http.HTTPStatus(415),
@@ -180,6 +399,7 @@ def create_headers(
     accept: str = accept_format(),
     oauth_token: Optional[str] = None,
     jwt: Optional[str] = None,
+    accept_encoding: Optional[str] = None,
 ) -> Dict[str, str]:
     """Create a dict representing GitHub-specific header fields.
 
@@ -201,6 +421,10 @@ def create_headers(
 
     You can only supply only one of oauth_token or jwt, not both.
 
+    The 'accept_encoding' argument sets the 'accept-encoding' field, e.g. to
+    the result of accept_encoding() to request compressed responses which are
+    then decompressed with Decompressor.
+
     For consistency, all keys in the returned dict will be lowercased.
     """
     # user-agent: https://docs.github.com/en/free-pro-team@latest/rest/overview/resources-in-the-rest-api#user-agent-required
@@ -216,9 +440,83 @@ def create_headers(
         headers["authorization"] = f"token {oauth_token}"
     elif jwt is not None:
         headers["authorization"] = f"bearer {jwt}"
+    if accept_encoding is not None:
+        headers["accept-encoding"] = accept_encoding
     return headers
 
 
+@functools.lru_cache(maxsize=None)
+def _brotli() -> Any:
+    """Return the brotli or brotlicffi module, or None if neither is installed."""
+    for name in ["brotli", "brotlicffi"]:
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            pass
+    return None
+
+
+def accept_encoding() -> str:
+    """Return the content codings which Decompressor supports.
+
+    Brotli is only included if the brotli or brotlicffi package is installed.
+    """
+    codings = ["gzip", "deflate"]
+    if _brotli() is not None:
+        codings.append("br")
+    return ", ".join(codings)
+
+
+class _BrotliDecoder:
+    """Give the Decompressor of brotli or brotlicffi the interface of zlib's."""
+
+    def __init__(self, brotli: Any) -> None:
+        self.decompress = brotli.Decompressor().process
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class Decompressor:
+    """Incrementally decompress a body according to its content-encoding.
+
+    The sizes of the body before and after decompression are counted in
+    'compressed_size' and 'decompressed_size'.
+    """
+
+    def __init__(self, content_encoding: Optional[str]) -> None:
+        self.compressed_size = 0
+        self.decompressed_size = 0
+        # The codings are listed in the order they were applied.
+        self._decoders: List[Any] = []
+        for coding in reversed((content_encoding or "").split(",")):
+            coding = coding.strip().lower()
+            if coding in {"", "identity"}:
+                continue
+            elif coding in {"gzip", "x-gzip"}:
+                self._decoders.append(zlib.decompressobj(16 + zlib.MAX_WBITS))
+            elif coding == "deflate":
+                self._decoders.append(zlib.decompressobj())
+            elif coding == "br" and _brotli() is not None:
+                self._decoders.append(_BrotliDecoder(_brotli()))
+            else:
+                raise ValueError(f"unsupported content-encoding: {coding!r}")
+
+    def decompress(self, data: bytes, *, final: bool = False) -> bytes:
+        """Decompress the next chunk of the body.
+
+        Set 'final' for the last chunk (which may be empty) to flush any data
+        the decoders still hold.
+        """
+        self.compressed_size += len(data)
+        for decoder in self._decoders:
+            data = decoder.decompress(data)
+            if final:
+                data += decoder.flush()
+        self.decompressed_size += len(data)
+        return data
+
+
 class RateLimit:
     """The rate limit imposed upon the requester.
 
@@ -235,11 +533,23 @@ class RateLimit:
     The boolean value of an instance whether another request can be made. This
     is determined based on whether there are any remaining requests or if the
     reset datetime has passed.
+
+    The 'used' attribute specifies how many requests (or GraphQL points) have
+    been used in the current window, and 'resource' which rate limit applies
+    (e.g. "core" or "graphql"); both are None if GitHub did not report them.
     """
 
     # https://docs.github.com/en/free-pro-team@latest/rest/overview/resources-in-the-rest-api#rate-limiting
 
-    def __init__(self, *, limit: int, remaining: int, reset_epoch: float) -> None:
+    def __init__(
+        self,
+        *,
+        limit: int,
+        remaining: int,
+        reset_epoch: float,
+        used: Optional[int] = None,
+        resource: Optional[str] = None,
+    ) -> None:
         """Instantiate a RateLimit object.
 
         The reset_epoch argument should be in seconds since the UTC epoch.
@@ -248,6 +558,8 @@ class RateLimit:
         # API documentation.
         self.limit = limit
         self.remaining = remaining
+        self.used = used
+        self.resource = resource
         # Name specifies the type to remind users that the epoch is not stored
         # as an int as the GitHub API returns.
         self.reset_datetime = datetime.datetime.fromtimestamp(
@@ -279,8 +591,14 @@ class RateLimit:
             reset_epoch = float(headers["x-ratelimit-reset"])
         except KeyError:
             return None
-        else:
-            return cls(limit=limit, remaining=remaining, reset_epoch=reset_epoch)
+        used = headers.get("x-ratelimit-used")
+        return cls(
+            limit=limit,
+            remaining=remaining,
+            reset_epoch=reset_epoch,
+            used=None if used is None else int(used),
+            resource=headers.get("x-ratelimit-resource"),
+        )
 
 
 _link_re = re.compile(
@@ -288,21 +606,64 @@ _link_re = re.compile(
 )
 
 
-def _next_link(link: Optional[str]) -> Optional[str]:
+def _rel_link(link: Optional[str], rel: str) -> Optional[str]:
     # https://docs.github.com/en/free-pro-team@latest/rest/overview/resources-in-the-rest-api#pagination
     # https://tools.ietf.org/html/rfc5988
     if link is None:
         return None
     for match in _link_re.finditer(link):
         if match.group("param_type") == "rel":
-            if match.group("param_value") == "next":
+            if match.group("param_value") == rel:
                 return match.group("uri")
     else:
         return None
 
 
+def _next_link(link: Optional[str]) -> Optional[str]:
+    return _rel_link(link, "next")
+
+
+def _last_link(link: Optional[str]) -> Optional[str]:
+    return _rel_link(link, "last")
+
+
+_page_re = re.compile(r"[?&]page=(?P<page>\d+)")
+
+
+def _page_urls(next_url: str, last_url: str) -> Optional[List[str]]:
+    """Calculate the URLs for every page from *next_url* through *last_url*.
+
+    Only works for page-numbered pagination where the two URLs differ solely
+    in their ``page`` query parameter; otherwise ``None`` is returned (e.g.
+    cursor-based pagination).
+    """
+    next_match = _page_re.search(next_url)
+    last_match = _page_re.search(last_url)
+    if next_match is None or last_match is None:
+        return None
+    # The URLs may be URI templates, so avoid str.format() and its braces.
+    prefix = next_url[: next_match.start("page")]
+    suffix = next_url[next_match.end() :]
+    if prefix + last_match.group("page") + suffix != last_url:
+        return None
+    first_page = int(next_match.group("page"))
+    last_page = int(last_match.group("page"))
+    if last_page < first_page:
+        # Inconsistent links, but the next page still shouldn't be skipped.
+        return [next_url]
+    return [f"{prefix}{page}{suffix}" for page in range(first_page, last_page + 1)]
+
+
+# The status codes of responses which decipher_response() doesn't raise for.
+_SUCCESS_STATUSES = frozenset({200, 201, 202, 204})
+
+
 def decipher_response(
-    status_code: int, headers: Mapping[str, str], body: bytes
+    status_code: int,
+    headers: Mapping[str, str],
+    body: Union[bytes, bytearray, memoryview],
+    *,
+    json_codec: codec.JSONCodec = codec.DEFAULT_CODEC,
 ) -> Tuple[Any, Optional[RateLimit], Optional[str]]:
     """Decipher an HTTP response for a GitHub API request.
 
@@ -323,9 +684,11 @@ def decipher_response(
 
     If the status code is anything other than 200, 201, or 204, then
     an HTTPException is raised.
+
+    A JSON body is decoded with 'json_codec'.
     """
-    data = _decode_body(headers.get("content-type"), body)
-    if status_code in {200, 201, 202, 204}:
+    data = _decode_body(headers.get("content-type"), body, json_codec=json_codec)
+    if status_code in _SUCCESS_STATUSES:
         return data, RateLimit.from_http(headers), _next_link(headers.get("link"))
     else:
         try:
@@ -397,9 +760,19 @@ def format_url(
 
     The dict provided in url_vars is used in URI template formatting.
     """
+    if "{" not in url and url.startswith(("https://", "http://")):
+        # Nothing to join or expand. Such URLs, e.g. the "next" link of every
+        # page, are mostly used once, so caching them would evict templates.
+        return url
+    expanded_url: str = _url_template(url, base_url).expand(url_vars)
+    return expanded_url
+
 
+# Templates are immutable, so they can be shared by all calls to format_url().
+@functools.lru_cache(maxsize=1024)
+def _url_template(url: str, base_url: str) -> uritemplate.URITemplate:
+    """Join *url* to *base_url* and compile the result as a URI template."""
     url = urllib.parse.urljoin(
         base_url.removesuffix("/") + "/", url.removeprefix("/")
     )  # Works even if 'url' is fully-qualified.
-    expanded_url: str = uritemplate.expand(url, var_dict=url_vars)
-    return expanded_url
+    return uritemplate.URITemplate(url)
@@ -1,29 +1,197 @@
-from typing import Any, Dict, List, Mapping, Tuple, Union
+import asyncio
+import contextlib
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Mapping,
+    Optional,
+    Tuple,
+)
 
-from tornado import gen, httpclient
+from tornado import gen, httpclient, httputil, iostream, simple_httpclient
 
 from . import abc as gh_abc
 
 
+class _StreamClosed(Exception):
+    """Raised to abort the transfer of a streamed response which was closed."""
+
+
+def _body_producer(
+    chunks: AsyncIterable[bytes],
+) -> Callable[[Callable[[bytes], Awaitable[None]]], Awaitable[None]]:
+    """Create a body_producer for HTTPRequest which streams *chunks*."""
+
+    async def produce(write: Callable[[bytes], Awaitable[None]]) -> None:
+        async for chunk in chunks:
+            await write(chunk)
+
+    return produce
+
+
+def create_client(
+    *, max_clients: int = 100, curl: bool = False, **defaults: Any
+) -> httpclient.AsyncHTTPClient:
+    """Create a client of its own, rather than Tornado's shared one, for GitHubAPI.
+
+    'max_clients' is the number of requests which may be in flight at once;
+    Tornado's shared client allows 10 and queues the rest. With 'curl', the
+    client is backed by pycurl, which keeps connections alive between requests
+    (the default client makes a new connection for every request), but it
+    reads streamed request bodies (e.g. file uploads) into memory before
+    sending them. The
+    'defaults' are default HTTPRequest arguments, e.g. 'connect_timeout'.
+    """
+    if curl:
+        from tornado.curl_httpclient import CurlAsyncHTTPClient
+
+        return CurlAsyncHTTPClient(
+            force_instance=True, max_clients=max_clients, defaults=defaults
+        )
+    return httpclient.AsyncHTTPClient(
+        force_instance=True, max_clients=max_clients, defaults=defaults
+    )
+
+
 class GitHubAPI(gh_abc.GitHubAPI):
+    # Timeouts and other failures to get a response are raised as HTTPClientError
+    # (with a code of 599) even when raise_error is false.
+    transport_errors = (OSError, iostream.StreamClosedError, httpclient.HTTPClientError)
+    encoded_bodies = True
+
+    def __init__(
+        self,
+        *args: Any,
+        client: Optional[httpclient.AsyncHTTPClient] = None,
+        connect_timeout: Optional[float] = None,
+        request_timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._client = client
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        super().__init__(*args, **kwargs)
+
+    def _fetch(
+        self, url: str, method: str, headers: Mapping[str, str], **kwargs: Any
+    ) -> "asyncio.Future[httpclient.HTTPResponse]":
+        """Start fetching a request; timeouts which are None are the client's."""
+        request = httpclient.HTTPRequest(
+            url,
+            method,
+            dict(headers),
+            connect_timeout=self.connect_timeout,
+            request_timeout=self.request_timeout,
+            decompress_response=False,
+            **kwargs,
+        )
+        return self._get_client().fetch(request, raise_error=False)
+
+    def _get_client(self) -> httpclient.AsyncHTTPClient:
+        # Since Tornado has designed AsyncHTTPClient to be a singleton (per
+        # event loop), there's no reason not to simply instantiate it every time.
+        return self._client or httpclient.AsyncHTTPClient()
+
     async def _request(
-        self, method: str, url: str, headers: Mapping[str, str], body: bytes = b""
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: gh_abc.BODY_TYPE = b"",
     ) -> Tuple[int, Mapping[str, str], bytes]:
         """Make an HTTP request."""
-        # Setting 'body' to None fails type checking, so only add a 'body' argument if necessary.
-        args: List[Union[str, Dict[Any, Any], bytes]] = [url, method, dict(headers)]
-        if method != "GET" and body:
-            args.append(body)
-        # The below line is skipped from mypy because Tornado's HTTPRequest signature
-        # requires many types of arguments some of which are internal to it
-        # adding all of them to the `args` would be impractical.
-        request = httpclient.HTTPRequest(*args)
-        # Since Tornado has designed AsyncHTTPClient to be a singleton, there's
-        # no reason not to simply instantiate it every time.
-        client = httpclient.AsyncHTTPClient()
-        response = await client.fetch(request, raise_error=False)
+        kwargs: Dict[str, Any] = {}
+        if not isinstance(body, bytes):
+            if isinstance(self._get_client(), simple_httpclient.SimpleAsyncHTTPClient):
+                # Tornado annotates write() as returning None and body_producer
+                # as returning a Future, but awaiting write()'s Future (for
+                # flow control) and returning any awaitable both work.
+                kwargs["body_producer"] = _body_producer(body)
+            else:
+                # The curl client ignores body_producer, so the body is read
+                # into memory instead.
+                kwargs["body"] = b"".join([chunk async for chunk in body])
+        elif method != "GET" and body:
+            kwargs["body"] = body
+        response = await self._fetch(url, method, headers, **kwargs)
         return response.code, response.headers, response.body
 
+    @contextlib.asynccontextmanager
+    async def _stream(
+        self, method: str, url: str, headers: Mapping[str, str], body: bytes = b""
+    ) -> AsyncIterator[Tuple[int, Mapping[str, str], AsyncIterator[bytes]]]:
+        """Make an HTTP request, providing the response body as an iterator of chunks."""
+        # Tornado pushes the response to callbacks, so they are handed over
+        # through a queue (which, as Tornado can't be paused, is unbounded).
+        chunks: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+        response_headers = httputil.HTTPHeaders()
+        status_code = 0
+        headers_received = asyncio.get_running_loop().create_future()
+        closed = False
+        # The default client aborts the transfer if streaming_callback raises,
+        # while the curl client delivers the chunk again later.
+        abortable = isinstance(
+            self._get_client(), simple_httpclient.SimpleAsyncHTTPClient
+        )
+
+        def header_callback(line: str) -> None:
+            nonlocal status_code
+            if line.startswith("HTTP/"):
+                status_code = httputil.parse_response_start_line(line.strip()).code
+            elif line == "\r\n":
+                if not headers_received.done():
+                    headers_received.set_result(None)
+            else:
+                response_headers.parse_line(line)
+
+        def streaming_callback(chunk: bytes) -> None:
+            if not closed:
+                chunks.put_nowait(chunk)
+            elif abortable:
+                # Cancelling the fetch doesn't stop Tornado's transfer, but an
+                # exception from this callback makes Tornado abort it.
+                raise _StreamClosed
+
+        fetch = asyncio.ensure_future(
+            self._fetch(
+                url,
+                method,
+                headers,
+                body=body if method != "GET" and body else None,
+                header_callback=header_callback,
+                streaming_callback=streaming_callback,
+            )
+        )
+        fetch.add_done_callback(lambda _: chunks.put_nowait(None))
+
+        async def iter_chunks() -> AsyncIterator[bytes]:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                yield chunk
+            # Raise any error which cut the response short.
+            fetch.result()
+
+        try:
+            await asyncio.wait(
+                [headers_received, fetch], return_when=asyncio.FIRST_COMPLETED
+            )
+            if not headers_received.done():
+                # Only failing to receive a response finishes the fetch first.
+                fetch.result()
+            yield status_code, response_headers, iter_chunks()
+        finally:
+            closed = True
+            fetch.cancel()
+            # Drop any chunks which were received but not consumed.
+            while not chunks.empty():
+                chunks.get_nowait()
+
     async def sleep(self, seconds: float) -> None:
         """Sleep for the specified number of seconds."""
         await gen.sleep(seconds)
@@ -6,7 +6,7 @@ PYPROJECT = nox.project.load_toml("pyproject.toml")
 @nox.session(python=["3.9", "3.10", "3.11", "3.12", "3.13", "3.14", "3.15"])
 def tests(session):
     session.install(
-        ".[aiohttp,tornado,httpx]",
+        ".[aiohttp,tornado,curl,httpx,http2,orjson]",
         *nox.project.dependency_groups(PYPROJECT, "test"),
     )
     session.run("pytest", "--cov=gidgethub", "--cov-report=xml", "-n=auto", "tests")
@@ -30,3 +30,9 @@ def lint(session):
         "docs",
         "docs/_build/html",
     )
+
+
+@nox.session
+def benchmarks(session):
+    session.install(".")
+    session.run("python", "benchmarks/sansio_hot_paths.py", *session.posargs)
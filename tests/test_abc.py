@@ -1,4 +1,10 @@
+import asyncio
+import contextlib
+import datetime
+import gc
+import gzip
 import http
+import io
 import json
 import re
 
@@ -7,15 +13,21 @@ import pytest
 
 from gidgethub import (
     BadGraphQLRequest,
+    BadRequest,
     GitHubBroken,
     GraphQLAuthorizationFailure,
     GraphQLException,
     GraphQLResponseTypeError,
     QueryError,
     RedirectionException,
+    metrics,
+    ratelimit,
+    retry,
     sansio,
 )
 from gidgethub import abc as gh_abc
+from gidgethub import cache as gh_cache
+from gidgethub import codec as gh_codec
 from gidgethub.abc import JSON_UTF_8_CHARSET
 
 from .samples import GraphQL as graphql_samples
@@ -38,12 +50,17 @@ class MockGitHubAPI(gh_abc.GitHubAPI):
         cache=None,
         oauth_token=None,
         base_url=sansio.DOMAIN,
+        **kwargs,
     ):
         self.response_code = status_code
         self.response_headers = headers
         self.response_body = body
         super().__init__(
-            "test_abc", oauth_token=oauth_token, cache=cache, base_url=base_url
+            "test_abc",
+            oauth_token=oauth_token,
+            cache=cache,
+            base_url=base_url,
+            **kwargs,
         )
 
     async def _request(self, method, url, headers, body=b""):
@@ -60,11 +77,45 @@ class MockGitHubAPI(gh_abc.GitHubAPI):
             pass
         return self.response_code, response_headers, self.response_body
 
-    async def sleep(self, seconds):  # pragma: no cover
+    async def sleep(self, seconds):
         """Sleep for the specified number of seconds."""
         self.slept = seconds
 
 
+class PagedMockGitHubAPI(MockGitHubAPI):
+    """Serve a fixed set of pages whose URLs differ by their ``page`` parameter."""
+
+    def __init__(self, pages, *, link_last=True, **kwargs):
+        self.pages = pages
+        self.link_last = link_last
+        self.requested = []
+        self.in_flight = self.max_in_flight = 0
+        super().__init__(**kwargs)
+
+    async def _request(self, method, url, headers, body=b""):
+        self.requested.append(url)
+        self.in_flight += 1
+        self.max_in_flight = max(self.in_flight, self.max_in_flight)
+        try:
+            # Give other requests a chance to start.
+            await asyncio.sleep(0)
+        finally:
+            self.in_flight -= 1
+        match = re.search(r"page=(\d+)", url)
+        page = int(match.group(1)) if match else 1
+        response_headers = MockGitHubAPI.DEFAULT_HEADERS.copy()
+        links = []
+        if page < len(self.pages):
+            links.append(f'<https://api.github.com/fake?page={page + 1}>; rel="next"')
+            if self.link_last:
+                last = len(self.pages)
+                links.append(f'<https://api.github.com/fake?page={last}>; rel="last"')
+        if links:
+            response_headers["link"] = ", ".join(links)
+        body = json.dumps(self.pages[page - 1]).encode("utf-8")
+        return 200, response_headers, body
+
+
 class TestGeneralGitHubAPI:
     @pytest.mark.asyncio
     async def test_url_formatted(self):
@@ -126,6 +177,30 @@ class TestGeneralGitHubAPI:
         assert gh.headers["accept"] == accept
         assert gh.headers["authorization"] == "bearer json web token"
 
+    @pytest.mark.asyncio
+    async def test_headers_reused(self):
+        """Headers are only created once per accept and authorization."""
+        accept = sansio.accept_format()
+        gh = MockGitHubAPI(oauth_token="oauth token")
+        await gh._make_request(
+            "GET", "/rate_limit", {}, "", accept, extra_headers={"x-extra": "1"}
+        )
+        await gh._make_request("GET", "/rate_limit", {}, "", accept)
+        assert "x-extra" not in gh.headers
+        assert len(gh._header_templates) == 1
+        await gh._make_request("GET", "/rate_limit", {}, "", accept, jwt="jwt")
+        assert gh.headers["authorization"] == "bearer jwt"
+        assert len(gh._header_templates) == 2
+
+    @pytest.mark.asyncio
+    async def test_headers_bounded(self):
+        accept = sansio.accept_format()
+        gh = MockGitHubAPI()
+        for n in range(gh_abc._HEADER_TEMPLATES_SIZE + 1):
+            await gh._make_request("GET", "/rate_limit", {}, "", accept, jwt=str(n))
+        assert len(gh._header_templates) == gh_abc._HEADER_TEMPLATES_SIZE
+        assert (gh.requester, accept, "0", None) not in gh._header_templates
+
     @pytest.mark.asyncio
     async def test_make_request_passing_token_and_jwt(self):
         """Test that passing both jwt and oauth_token raises ValueError."""
@@ -441,6 +516,482 @@ class TestGitHubAPIGetiter:
         assert gh.headers["X-Custom-Header"] == "custom_value"
 
 
+class TestGitHubAPIGetiterConcurrency:
+    @pytest.mark.asyncio
+    async def test_same_as_serial(self):
+        pages = [[1, 2], [3, 4], [5, 6], [7, 8], [9]]
+        serial_gh = PagedMockGitHubAPI(pages)
+        serial = [item async for item in serial_gh.getiter("/fake")]
+        gh = PagedMockGitHubAPI(pages)
+        concurrent = [item async for item in gh.getiter("/fake", concurrency=3)]
+        assert concurrent == serial == list(range(1, 10))
+        assert sorted(gh.requested) == sorted(serial_gh.requested)
+        assert gh.max_in_flight == 3
+        assert serial_gh.max_in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_iterable_key(self):
+        pages = [{"items": [1]}, {"items": [2]}, {"items": [3]}]
+        gh = PagedMockGitHubAPI(pages)
+        data = [item async for item in gh.getiter("/fake", concurrency=2)]
+        assert data == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_no_last_link(self):
+        """Without a rel="last" link the pages are walked serially."""
+        pages = [[1], [2], [3]]
+        gh = PagedMockGitHubAPI(pages, link_last=False)
+        data = [item async for item in gh.getiter("/fake", concurrency=3)]
+        assert data == [1, 2, 3]
+        assert gh.max_in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_last_link_before_next(self):
+        link = (
+            '<https://api.github.com/fake?page=2>; rel="next", '
+            '<https://api.github.com/fake?page=1>; rel="last"'
+        )
+        gh = SequenceMockGitHubAPI([(200, {"link": link}, b"[1]"), (200, {}, b"[2]")])
+        data = [item async for item in gh.getiter("/fake", concurrency=3)]
+        assert data == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_single_page(self):
+        gh = PagedMockGitHubAPI([[1, 2]])
+        data = [item async for item in gh.getiter("/fake", concurrency=3)]
+        assert data == [1, 2]
+        assert len(gh.requested) == 1
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_pending(self):
+        pages = [[1], [2], [3], [4], [5]]
+        gh = PagedMockGitHubAPI(pages)
+        items = gh.getiter("/fake", concurrency=2)
+        assert await items.__anext__() == 1
+        assert await items.__anext__() == 2
+        # Let the pending pages be requested.
+        await asyncio.sleep(0)
+        assert gh.in_flight
+        await items.aclose()
+        assert gh.in_flight == 0
+        assert len(gh.requested) < len(pages)
+
+    @pytest.mark.asyncio
+    async def test_invalid_concurrency(self):
+        gh = PagedMockGitHubAPI([[1]])
+        with pytest.raises(ValueError):
+            async for _ in gh.getiter("/fake", concurrency=0):
+                pytest.fail("Unreachable")  # pragma: no cover
+
+
+class TestGitHubAPIGetiterReadAhead:
+    @pytest.mark.asyncio
+    async def test_same_as_serial(self):
+        pages = [[1, 2], [3, 4], [5]]
+        serial_gh = PagedMockGitHubAPI(pages, link_last=False)
+        serial = [item async for item in serial_gh.getiter("/fake")]
+        gh = PagedMockGitHubAPI(pages, link_last=False)
+        read_ahead = [item async for item in gh.getiter("/fake", read_ahead=2)]
+        assert read_ahead == serial == [1, 2, 3, 4, 5]
+        assert gh.requested == serial_gh.requested
+
+    @pytest.mark.asyncio
+    async def test_next_page_in_flight(self):
+        """The next page is requested while the current page is consumed."""
+        pages = [[1, 2], [3, 4], [5, 6], [7, 8]]
+        gh = PagedMockGitHubAPI(pages, link_last=False)
+        items = gh.getiter("/fake", read_ahead=1)
+        assert await items.__anext__() == 1
+        for _ in range(5):
+            await asyncio.sleep(0)
+        # Only one page beyond the one being consumed is requested.
+        assert len(gh.requested) == 2
+        assert [item async for item in items] == [2, 3, 4, 5, 6, 7, 8]
+        assert len(gh.requested) == 4
+
+    @pytest.mark.asyncio
+    async def test_depth(self):
+        pages = [[1], [2], [3], [4], [5], [6]]
+        gh = PagedMockGitHubAPI(pages, link_last=False)
+        items = gh.getiter("/fake", read_ahead=3)
+        assert await items.__anext__() == 1
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert len(gh.requested) == 4
+        await items.aclose()
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_pending(self):
+        pages = [[1], [2], [3], [4]]
+        gh = PagedMockGitHubAPI(pages, link_last=False)
+        items = gh.getiter("/fake", read_ahead=2)
+        assert await items.__anext__() == 1
+        # Let the next page be requested.
+        await asyncio.sleep(0)
+        assert gh.in_flight == 1
+        await items.aclose()
+        assert gh.in_flight == 0
+        assert len(gh.requested) == 2
+
+    @pytest.mark.asyncio
+    async def test_error_propagates(self):
+        class FailingGitHubAPI(PagedMockGitHubAPI):
+            async def _request(self, method, url, headers, body=b""):
+                if url.endswith("page=3"):
+                    return 500, MockGitHubAPI.DEFAULT_HEADERS.copy(), b""
+                return await super()._request(method, url, headers, body)
+
+        gh = FailingGitHubAPI([[1], [2], [3], [4]], link_last=False)
+        data = []
+        with pytest.raises(GitHubBroken):
+            async for item in gh.getiter("/fake", read_ahead=2):
+                data.append(item)
+        assert data == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_single_page(self):
+        gh = PagedMockGitHubAPI([[1, 2]], link_last=False)
+        data = [item async for item in gh.getiter("/fake", read_ahead=2)]
+        assert data == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_invalid_read_ahead(self):
+        gh = PagedMockGitHubAPI([[1]])
+        with pytest.raises(ValueError):
+            async for _ in gh.getiter("/fake", read_ahead=-1):
+                pytest.fail("Unreachable")  # pragma: no cover
+
+
+class ChunkedMockGitHubAPI(MockGitHubAPI):
+    """Stream the response body in the given chunks."""
+
+    def __init__(self, chunks, *, status_code=200, **kwargs):
+        self.chunks = chunks
+        self.consumed = 0
+        self.open = False
+        super().__init__(status_code, **kwargs)
+
+    @contextlib.asynccontextmanager
+    async def _stream(self, method, url, headers, body=b""):
+        self.method = method
+        self.url = url
+        self.headers = headers
+
+        async def iter_chunks():
+            for chunk in self.chunks:
+                self.consumed += 1
+                yield chunk
+
+        self.open = True
+        try:
+            yield self.response_code, self.response_headers.copy(), iter_chunks()
+        finally:
+            self.open = False
+
+
+class TestGitHubAPIGetstream:
+    @pytest.mark.asyncio
+    async def test_chunks(self):
+        gh = ChunkedMockGitHubAPI([b"diff ", b"--git"], oauth_token="oauth token")
+        chunks = [chunk async for chunk in gh.getstream("/fake{/ref}", {"ref": "x"})]
+        assert chunks == [b"diff ", b"--git"]
+        assert gh.method == "GET"
+        assert gh.url == "https://api.github.com/fake/x"
+        assert gh.headers["authorization"] == "token oauth token"
+        assert gh.headers["content-length"] == "0"
+        assert gh.rate_limit.limit == 2
+        assert not gh.open
+
+    @pytest.mark.asyncio
+    async def test_default_stream(self):
+        """Without a streaming implementation the body is one chunk."""
+        gh = MockGitHubAPI(body=b"diff --git")
+        chunks = [chunk async for chunk in gh.getstream("/fake")]
+        assert chunks == [b"diff --git"]
+        gh = MockGitHubAPI(204)
+        assert [chunk async for chunk in gh.getstream("/fake")] == []
+
+    @pytest.mark.asyncio
+    async def test_error(self):
+        gh = ChunkedMockGitHubAPI([b'{"message": "Not ', b'Found"}'], status_code=404)
+        with pytest.raises(BadRequest) as exc_info:
+            async for _ in gh.getstream("/fake"):
+                pass  # pragma: no cover
+        assert exc_info.value.status_code == 404
+        assert str(exc_info.value) == "Not Found"
+        assert not gh.open
+
+    @pytest.mark.asyncio
+    async def test_close(self):
+        gh = ChunkedMockGitHubAPI([b"1", b"2", b"3"], max_concurrency=1)
+        stream = gh.getstream("/fake")
+        assert await stream.__anext__() == b"1"
+        assert gh.open
+        # The slot is given back once the response head has been read.
+        assert not gh._request_slots.locked()
+        await stream.aclose()
+        assert not gh.open
+        assert not gh._request_slots.locked()
+
+    @pytest.mark.asyncio
+    async def test_nested_request(self):
+        gh = ChunkedMockGitHubAPI([b"1", b"2"], body=b"42", max_concurrency=1)
+
+        async def consume():
+            return [
+                (chunk, await gh.getitem("/other"))
+                async for chunk in gh.getstream("/fake")
+            ]
+
+        assert await asyncio.wait_for(consume(), 1) == [(b"1", 42), (b"2", 42)]
+
+    @pytest.mark.asyncio
+    async def test_transport_error_releases_slot(self):
+        class BrokenMockGitHubAPI(MockGitHubAPI):
+            @contextlib.asynccontextmanager
+            async def _stream(self, method, url, headers, body=b""):
+                raise ConnectionResetError
+                yield  # pragma: no cover
+
+        gh = BrokenMockGitHubAPI(max_concurrency=1)
+        with pytest.raises(ConnectionResetError):
+            async for _ in gh.getstream("/fake"):
+                pass  # pragma: no cover
+        assert not gh._request_slots.locked()
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_scheduler(self):
+        scheduler = ratelimit.RateLimitScheduler()
+        gh = ChunkedMockGitHubAPI([b"x"], rate_limit_scheduler=scheduler)
+        reset = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
+            seconds=100
+        )
+        gh.rate_limits["core"] = sansio.RateLimit(
+            limit=10, remaining=0, reset_epoch=reset.timestamp()
+        )
+        assert [chunk async for chunk in gh.getstream("/fake")] == [b"x"]
+        assert gh.slept == pytest.approx(100, abs=1)
+        gh.rate_limits["core"] = sansio.RateLimit(limit=10, remaining=5, reset_epoch=0)
+        assert [chunk async for chunk in gh.getstream("/fake")] == [b"x"]
+
+    @pytest.mark.asyncio
+    async def test_cannot_pass_both_oauth_and_jwt(self):
+        gh = ChunkedMockGitHubAPI([])
+        with pytest.raises(ValueError):
+            async for _ in gh.getstream("/fake", jwt="jwt", oauth_token="token"):
+                pass  # pragma: no cover
+
+
+class TestGitHubAPIGetiterIncremental:
+    @pytest.mark.asyncio
+    async def test_same_as_serial(self):
+        pages = [[{"id": 1}, {"id": 2}], [{"id": 3}], [{"id": 4}]]
+        gh = PagedMockGitHubAPI(pages)
+        data = [item async for item in gh.getiter("/fake", incremental=True)]
+        assert data == [{"id": 1}, {"id": 2}, {"id": 3}, {"id": 4}]
+        assert gh.requested == [
+            "https://api.github.com/fake",
+            "https://api.github.com/fake?page=2",
+            "https://api.github.com/fake?page=3",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_first_item_early(self):
+        """Items are yielded before the rest of the body has been received."""
+        chunks = [b'{"total_count": 2, "items": [{"id": 1}, ', b'{"id": 2}]}']
+        gh = ChunkedMockGitHubAPI(chunks)
+        items = gh.getiter("/search/issues", incremental=True)
+        assert await items.__anext__() == {"id": 1}
+        assert gh.consumed == 1
+        assert [item async for item in items] == [{"id": 2}]
+        assert gh.consumed == 2
+        assert not gh.open
+
+    @pytest.mark.asyncio
+    async def test_nested_requests(self):
+        """Requests can be made per item while a page is streamed."""
+        gh = ChunkedMockGitHubAPI([b"[1, ", b"2]"], body=b"42", max_concurrency=2)
+
+        async def consume():
+            pairs = []
+            async for outer in gh.getiter("/fake", incremental=True):
+                async for inner in gh.getiter("/fake", incremental=True):
+                    pairs.append((outer, inner, await gh.getitem("/other")))
+            return pairs
+
+        pairs = await asyncio.wait_for(consume(), 1)
+        assert pairs == [(1, 1, 42), (1, 2, 42), (2, 1, 42), (2, 2, 42)]
+
+    @pytest.mark.asyncio
+    async def test_not_a_page(self):
+        """The whole body is used when it isn't an array of items."""
+        body = b'{"total_count": 0}'
+        gh = ChunkedMockGitHubAPI([body])
+        data = [item async for item in gh.getiter("/fake", incremental=True)]
+        gh = MockGitHubAPI(body=body)
+        assert data == [item async for item in gh.getiter("/fake")]
+
+    @pytest.mark.asyncio
+    async def test_error(self):
+        gh = ChunkedMockGitHubAPI([b'{"message": "Not Found"}'], status_code=404)
+        with pytest.raises(BadRequest):
+            async for _ in gh.getiter("/fake", incremental=True):
+                pass  # pragma: no cover
+
+    @pytest.mark.asyncio
+    async def test_invalid(self):
+        gh = MockGitHubAPI()
+        with pytest.raises(ValueError):
+            async for _ in gh.getiter("/fake", incremental=True, concurrency=2):
+                pass  # pragma: no cover
+        with pytest.raises(ValueError):
+            async for _ in gh.getiter("/fake", incremental=True, read_ahead=1):
+                pass  # pragma: no cover
+
+
+class TaggingCodec(gh_codec.StdlibJSONCodec):
+    """Mark what was encoded and decoded by the codec."""
+
+    def encode(self, obj):
+        return super().encode({"encoded": obj})
+
+    def decode(self, data):
+        return {"decoded": super().decode(data)}
+
+
+class TestGitHubAPIJSONCodec:
+    @pytest.mark.asyncio
+    async def test_request_and_response(self):
+        gh = MockGitHubAPI(201, body=b'{"id": 1}', json_codec=TaggingCodec())
+        assert gh.json_codec.__class__ is TaggingCodec
+        data = await gh.post("/fake", data={"title": "bug"})
+        assert data == {"decoded": {"id": 1}}
+        assert json.loads(gh.body) == {"encoded": {"title": "bug"}}
+        assert gh.headers["content-length"] == str(len(gh.body))
+
+    @pytest.mark.asyncio
+    async def test_raw_cache(self):
+        cache = {}
+        headers = MockGitHubAPI.DEFAULT_HEADERS.copy()
+        headers["etag"] = "12345"
+        gh = MockGitHubAPI(
+            headers=headers,
+            body=b"[1]",
+            cache=cache,
+            cache_raw=True,
+            json_codec=TaggingCodec(),
+        )
+        assert await gh.getitem("/fake") == {"decoded": [1]}
+        gh.response_code = 304
+        assert await gh.getitem("/fake") == {"decoded": [1]}
+
+    @pytest.mark.asyncio
+    async def test_graphql(self):
+        class Codec(TaggingCodec):
+            def decode(self, data):
+                self.decoded = data
+                return gh_codec.StdlibJSONCodec.decode(self, data)
+
+        body = b'{"data": {"viewer": 1}}'
+        gh = MockGitHubAPI(body=body, json_codec=Codec())
+        assert await gh.graphql("query { viewer }") == {"viewer": 1}
+        assert gh.json_codec.decoded == body
+        assert json.loads(gh.body) == {"encoded": {"query": "query { viewer }"}}
+
+
+class EncodedMockGitHubAPI(MockGitHubAPI):
+    """Return response bodies as sent, still compressed."""
+
+    encoded_bodies = True
+
+
+class EncodedChunkedMockGitHubAPI(ChunkedMockGitHubAPI):
+    """Stream response bodies as sent, still compressed."""
+
+    encoded_bodies = True
+
+
+GZIP_HEADERS = {**MockGitHubAPI.DEFAULT_HEADERS, "content-encoding": "gzip"}
+
+
+class TestGitHubAPICompression:
+    @pytest.mark.asyncio
+    async def test_accept_encoding(self):
+        gh = EncodedMockGitHubAPI(body=b"42")
+        await gh.getitem("/fake")
+        assert gh.headers["accept-encoding"] == sansio.accept_encoding()
+        gh = MockGitHubAPI(body=b"42")
+        await gh.getitem("/fake")
+        assert "accept-encoding" not in gh.headers
+
+    @pytest.mark.asyncio
+    async def test_decompress(self):
+        data = [{"number": number} for number in range(100)]
+        body = json.dumps(data).encode("utf-8")
+        compressed = gzip.compress(body)
+        gh = EncodedMockGitHubAPI(headers=GZIP_HEADERS.copy(), body=compressed)
+        assert await gh.getitem("/fake") == data
+        assert gh.bytes_received == len(compressed)
+        assert gh.bytes_decompressed == len(body)
+
+    @pytest.mark.asyncio
+    async def test_decompressed_by_backend(self):
+        """A backend whose bodies are not encoded has decompressed them itself."""
+        gh = MockGitHubAPI(headers=GZIP_HEADERS.copy(), body=b"[1, 2]")
+        assert await gh.getitem("/fake") == [1, 2]
+        assert gh.bytes_received == gh.bytes_decompressed == 6
+
+    @pytest.mark.asyncio
+    async def test_record_transfer(self):
+        class RecordingGitHubAPI(EncodedMockGitHubAPI):
+            def __init__(self, *args, **kwargs):
+                self.transfers = []
+                super().__init__(*args, **kwargs)
+
+            def _record_transfer(self, method, url, received, decompressed):
+                self.transfers.append((method, url, received, decompressed))
+                super()._record_transfer(method, url, received, decompressed)
+
+        compressed = gzip.compress(b"[1, 2]")
+        gh = RecordingGitHubAPI(headers=GZIP_HEADERS.copy(), body=compressed)
+        await gh.post("/fake", data=b"")
+        await gh.getitem("/fake")
+        url = "https://api.github.com/fake"
+        transfer = len(compressed), 6
+        assert gh.transfers == [("POST", url, *transfer), ("GET", url, *transfer)]
+        assert gh.bytes_received == 2 * len(compressed)
+
+    @pytest.mark.asyncio
+    async def test_getstream(self):
+        body = b"diff --git " * 1000
+        compressed = gzip.compress(body)
+        # The first chunk only holds part of the gzip header.
+        chunks = [compressed[:5]] + [
+            compressed[i : i + 100] for i in range(5, len(compressed), 100)
+        ]
+        gh = EncodedChunkedMockGitHubAPI(chunks, headers=GZIP_HEADERS.copy())
+        received = [chunk async for chunk in gh.getstream("/fake")]
+        assert b"".join(received) == body
+        assert gh.bytes_received == len(compressed)
+        assert gh.bytes_decompressed == len(body)
+
+    @pytest.mark.asyncio
+    async def test_getstream_flush(self):
+        """Data which the decompressor holds back is yielded at the end."""
+
+        class HoldingDecompressor(sansio.Decompressor):
+            def decompress(self, data, *, final=False):
+                return b"tail" if final else data
+
+        class HoldingGitHubAPI(EncodedChunkedMockGitHubAPI):
+            def _decompressor(self, headers):
+                return HoldingDecompressor(None)
+
+        gh = HoldingGitHubAPI([b"diff ", b"--git "])
+        received = [chunk async for chunk in gh.getstream("/fake")]
+        assert received == [b"diff ", b"--git ", b"tail"]
+
+
 class TestGitHubAPIPost:
     @pytest.mark.asyncio
     async def test_post(self):
@@ -742,6 +1293,96 @@ class TestGitHubAPICache:
         with pytest.raises(RedirectionException):
             await gh.getitem("/fake")
 
+    @pytest.mark.asyncio
+    async def test_async_cache(self):
+        class RecordingCache:
+            def __init__(self):
+                self.entries = {}
+
+            async def get(self, key):
+                return self.entries.get(key)
+
+            async def set(self, key, value, *, ttl=None):
+                self.sets += 1
+                self.entries[key] = value
+
+            async def delete(self, key):  # pragma: no cover
+                del self.entries[key]
+
+        cache = RecordingCache()
+        cache.sets = 0
+        headers = MockGitHubAPI.DEFAULT_HEADERS.copy()
+        headers["etag"] = "12345"
+        gh = MockGitHubAPI(200, headers, b"42", cache=cache)
+        assert gh._cache is cache
+        url = "https://api.github.com/fake"
+        assert await gh.getitem(url) == 42
+        assert cache.entries[url] == ("12345", None, 42, None)
+        gh.response_code = 304
+        assert await gh.getitem(url) == 42
+        assert gh.headers["if-none-match"] == "12345"
+        # Without a revalidate() method, a 304 leaves the cache unchanged.
+        assert cache.sets == 1
+
+    @pytest.mark.asyncio
+    async def test_mapping_with_sync_methods(self):
+        """A mapping with synchronous get/set/delete (e.g. diskcache.Cache)."""
+
+        class SyncMethodsCache(dict):
+            def set(self, key, value):  # pragma: no cover
+                self[key] = value
+
+            def delete(self, key):  # pragma: no cover
+                del self[key]
+
+        cache = SyncMethodsCache()
+        headers = MockGitHubAPI.DEFAULT_HEADERS.copy()
+        headers["etag"] = "12345"
+        gh = MockGitHubAPI(200, headers, b"42", cache=cache)
+        assert isinstance(gh._cache, gh_cache.MappingCache)
+        url = "https://api.github.com/fake"
+        assert await gh.getitem(url) == 42
+        assert cache[url] == ("12345", None, 42, None)
+        gh.response_code = 304
+        assert await gh.getitem(url) == 42
+        assert gh.headers["if-none-match"] == "12345"
+
+    @pytest.mark.asyncio
+    async def test_revalidation_refreshes_entry(self):
+        sizes = []
+
+        def size_of(entry):
+            sizes.append(entry)
+            return 1
+
+        cache = gh_cache.LRUCache(size_of=size_of)
+        headers = MockGitHubAPI.DEFAULT_HEADERS.copy()
+        headers["etag"] = "12345"
+        gh = MockGitHubAPI(200, headers, b"42", cache=cache)
+        url = "https://api.github.com/fake"
+        await gh.getitem(url)
+        gh.response_code = 304
+        assert await gh.getitem(url) == 42
+        assert cache.revalidations == 1
+        assert cache.hits == 1
+        assert cache.misses == 1
+        # The entry isn't measured again.
+        assert len(sizes) == 1
+
+    @pytest.mark.asyncio
+    async def test_raw(self):
+        cache = {}
+        headers = MockGitHubAPI.DEFAULT_HEADERS.copy()
+        headers["etag"] = "12345"
+        body = json.dumps({"hello": "world"}).encode("utf-8")
+        gh = MockGitHubAPI(200, headers, body, cache=cache, cache_raw=True)
+        url = "https://api.github.com/fake"
+        assert await gh.getitem(url) == {"hello": "world"}
+        _, _, raw, _ = cache[url]
+        assert raw == gh_cache.RawBody(JSON_UTF_8_CHARSET, body)
+        gh.response_code = 304
+        assert await gh.getitem(url) == {"hello": "world"}
+
     @pytest.mark.asyncio
     async def test_no_cache(self):
         headers = MockGitHubAPI.DEFAULT_HEADERS.copy()
@@ -751,6 +1392,495 @@ class TestGitHubAPICache:
         await gh.getitem("/fake")  # No exceptions raised.
 
 
+class TestGitHubAPIRateLimitScheduler:
+    @pytest.mark.asyncio
+    async def test_sleeps_until_reset(self):
+        scheduler = ratelimit.RateLimitScheduler()
+        gh = MockGitHubAPI(rate_limit_scheduler=scheduler)
+        reset = datetime.datetime.now(datetime.timezone.utc).timestamp() + 60
+        gh.rate_limits["core"] = sansio.RateLimit(
+            limit=5000, remaining=0, reset_epoch=reset
+        )
+        await gh.getitem("/fake")
+        assert 0 < gh.slept <= 60
+        assert scheduler.delayed_requests == 1
+
+    @pytest.mark.asyncio
+    async def test_no_delay(self):
+        scheduler = ratelimit.RateLimitScheduler()
+        gh = MockGitHubAPI(rate_limit_scheduler=scheduler)
+        # The default headers have a reset time in the past.
+        await gh.getitem("/fake")
+        await gh.getitem("/fake")
+        assert not hasattr(gh, "slept")
+        assert scheduler.delayed_requests == 0
+
+    @pytest.mark.asyncio
+    async def test_per_resource(self):
+        """Requests are only paced by the rate limit they are charged to."""
+        scheduler = ratelimit.RateLimitScheduler()
+        reset = datetime.datetime.now(datetime.timezone.utc).timestamp() + 60
+        headers = {
+            "x-ratelimit-limit": "30",
+            "x-ratelimit-remaining": "0",
+            "x-ratelimit-reset": str(int(reset)),
+            "x-ratelimit-resource": "search",
+        }
+        gh = SequenceMockGitHubAPI(
+            [(200, headers, b"{}"), (200, {}, b"{}"), (200, headers, b"{}")],
+            rate_limit_scheduler=scheduler,
+        )
+        await gh.getitem("/search/issues?q=gidgethub")
+        assert gh.rate_limits["search"].remaining == 0
+        # The exhausted search rate limit is the last one seen ...
+        assert gh.rate_limit.resource == "search"
+        # ... but doesn't delay a request charged to the core rate limit.
+        await gh.getitem("/repos/gidgethub/search/issues")
+        assert gh.sleeps == []
+        assert gh.rate_limits.keys() == {"search", "core"}
+        await gh.getitem("https://api.github.com/search/issues?q=gidgethub")
+        assert len(gh.sleeps) == 1
+        assert 0 < gh.sleeps[0] <= 60
+
+    @pytest.mark.asyncio
+    async def test_graphql(self):
+        scheduler = ratelimit.RateLimitScheduler()
+        reset = datetime.datetime.now(datetime.timezone.utc).timestamp() + 60
+        gh = SequenceMockGitHubAPI(
+            [(200, {}, b'{"data": {}}')] * 2, rate_limit_scheduler=scheduler
+        )
+        gh.rate_limits["core"] = sansio.RateLimit(
+            limit=5000, remaining=0, reset_epoch=reset
+        )
+        await gh.graphql("{ viewer { login } }")
+        assert gh.sleeps == []
+        gh.rate_limits["graphql"] = sansio.RateLimit(
+            limit=5000, remaining=0, reset_epoch=reset
+        )
+        await gh.graphql("{ viewer { login } }")
+        assert len(gh.sleeps) == 1
+
+    @pytest.mark.asyncio
+    async def test_per_resource_enterprise(self):
+        scheduler = ratelimit.RateLimitScheduler()
+        reset = datetime.datetime.now(datetime.timezone.utc).timestamp() + 60
+        gh = SequenceMockGitHubAPI(
+            [(200, {}, b"{}")] * 3,
+            base_url="https://ghe.example.com/api/v3",
+            rate_limit_scheduler=scheduler,
+        )
+        gh.rate_limits["search"] = sansio.RateLimit(
+            limit=30, remaining=0, reset_epoch=reset
+        )
+        await gh.getitem("/rate_limit")
+        assert gh.sleeps == []
+        await gh.getitem("/search/code?q=gidgethub")
+        assert gh.sleeps == []
+        await gh.getitem("/search/issues?q=gidgethub")
+        assert len(gh.sleeps) == 1
+
+
+class SequenceMockGitHubAPI(MockGitHubAPI):
+    """Respond with each (status code, headers, body) in turn."""
+
+    def __init__(self, responses, **kwargs):
+        self.responses = list(responses)
+        self.request_count = 0
+        self.sleeps = []
+        super().__init__(**kwargs)
+
+    async def _request(self, method, url, headers, body=b""):
+        self.request_count += 1
+        self.headers = headers
+        status_code, response_headers, response_body = self.responses.pop(0)
+        headers = MockGitHubAPI.DEFAULT_HEADERS.copy()
+        headers.update(response_headers)
+        return status_code, headers, response_body
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+SECONDARY_RATE_LIMIT = (
+    403,
+    {"retry-after": "30"},
+    b'{"message": "You have exceeded a secondary rate limit."}',
+)
+
+
+class TestGitHubAPIRetry:
+    @pytest.mark.asyncio
+    async def test_secondary_rate_limit(self):
+        policy = retry.RetryPolicy()
+        gh = SequenceMockGitHubAPI(
+            [SECONDARY_RATE_LIMIT, SECONDARY_RATE_LIMIT, (200, {}, b"42")],
+            retry_policy=policy,
+        )
+        assert await gh.getitem("/fake") == 42
+        assert gh.sleeps == [30, 30]
+        assert gh.request_count == 3
+        assert policy.retries == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up(self):
+        policy = retry.RetryPolicy(max_wait=45)
+        gh = SequenceMockGitHubAPI(
+            [SECONDARY_RATE_LIMIT, SECONDARY_RATE_LIMIT, (200, {}, b"42")],
+            retry_policy=policy,
+        )
+        with pytest.raises(BadRequest):
+            await gh.getitem("/fake")
+        assert gh.sleeps == [30]
+
+    @pytest.mark.asyncio
+    async def test_not_idempotent(self):
+        gh = SequenceMockGitHubAPI(
+            [SECONDARY_RATE_LIMIT, (200, {}, b"42")],
+            retry_policy=retry.RetryPolicy(),
+        )
+        with pytest.raises(BadRequest):
+            await gh.post("/fake", data=42)
+        assert not gh.sleeps
+
+    @pytest.mark.asyncio
+    async def test_no_policy(self):
+        gh = SequenceMockGitHubAPI([SECONDARY_RATE_LIMIT, (200, {}, b"42")])
+        with pytest.raises(BadRequest):
+            await gh.getitem("/fake")
+        assert gh.request_count == 1
+
+    @pytest.mark.asyncio
+    async def test_server_error(self):
+        policy = retry.RetryPolicy(jitter=0)
+        gh = SequenceMockGitHubAPI(
+            [(502, {}, b""), (503, {}, b""), (200, {}, b"42")], retry_policy=policy
+        )
+        assert await gh.getitem("/fake") == 42
+        assert gh.sleeps == [1, 2]
+        assert policy.retries_by_cause == {"502": 1, "503": 1}
+
+    @pytest.mark.asyncio
+    async def test_graphql(self):
+        policy = retry.RetryPolicy(jitter=0)
+        secondary_rate_limit = (
+            403,
+            {"retry-after": "30"},
+            b'{"message": "You have exceeded a secondary rate limit."}',
+        )
+        gh = SequenceMockGitHubAPI(
+            [
+                (502, {"content-type": "text/html"}, b"<html>Bad gateway</html>"),
+                secondary_rate_limit,
+                (200, {}, b'{"data": {"viewer": 1}}'),
+            ],
+            retry_policy=policy,
+        )
+        assert await gh.graphql("query { viewer { login } }") == {"viewer": 1}
+        assert gh.sleeps == [1, 30]
+        assert policy.retries_by_cause == {"502": 1, "403": 1}
+
+    @pytest.mark.asyncio
+    async def test_graphql_mutation(self):
+        gh = SequenceMockGitHubAPI(
+            [(502, {}, b""), (200, {}, b'{"data": {}}')],
+            retry_policy=retry.RetryPolicy(),
+        )
+        with pytest.raises(GitHubBroken):
+            await gh.graphql("mutation { addStar(input: {}) { clientMutationId } }")
+        assert gh.request_count == 1
+
+    @pytest.mark.asyncio
+    async def test_max_attempts(self):
+        gh = SequenceMockGitHubAPI(
+            [(502, {}, b"")] * 3, retry_policy=retry.RetryPolicy(max_attempts=3)
+        )
+        with pytest.raises(GitHubBroken):
+            await gh.getitem("/fake")
+        assert gh.request_count == 3
+
+    @pytest.mark.asyncio
+    async def test_transport_error(self):
+        class FlakyMockGitHubAPI(SequenceMockGitHubAPI):
+            async def _request(self, method, url, headers, body=b""):
+                if not self.request_count:
+                    self.request_count += 1
+                    raise ConnectionResetError
+                return await super()._request(method, url, headers, body)
+
+        gh = FlakyMockGitHubAPI(
+            [(200, {}, b"42")], retry_policy=retry.RetryPolicy(jitter=0)
+        )
+        assert await gh.getitem("/fake") == 42
+        assert gh.sleeps == [1]
+
+    @pytest.mark.asyncio
+    async def test_transport_error_without_policy(self):
+        class BrokenMockGitHubAPI(MockGitHubAPI):
+            async def _request(self, method, url, headers, body=b""):
+                raise ConnectionResetError
+
+        gh = BrokenMockGitHubAPI()
+        with pytest.raises(ConnectionResetError):
+            await gh.getitem("/fake")
+
+    @pytest.mark.asyncio
+    async def test_getiter_retries_page(self):
+        """Only the failing page is requested again."""
+
+        class FailingGitHubAPI(PagedMockGitHubAPI):
+            failed = False
+
+            async def _request(self, method, url, headers, body=b""):
+                if url.endswith("page=2") and not self.failed:
+                    self.failed = True
+                    self.requested.append(url)
+                    return 503, MockGitHubAPI.DEFAULT_HEADERS.copy(), b""
+                return await super()._request(method, url, headers, body)
+
+        gh = FailingGitHubAPI([[1], [2], [3]], retry_policy=retry.RetryPolicy(jitter=0))
+        data = [item async for item in gh.getiter("/fake")]
+        assert data == [1, 2, 3]
+        assert gh.requested == [
+            "https://api.github.com/fake",
+            "https://api.github.com/fake?page=2",
+            "https://api.github.com/fake?page=2",
+            "https://api.github.com/fake?page=3",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_cache_headers_resent(self):
+        url = "https://api.github.com/fake"
+        cache = {url: ("12345", None, 42, None)}
+        gh = SequenceMockGitHubAPI(
+            [SECONDARY_RATE_LIMIT, (304, {}, b"")],
+            cache=cache,
+            retry_policy=retry.RetryPolicy(),
+        )
+        assert await gh.getitem(url) == 42
+        assert gh.headers["if-none-match"] == "12345"
+
+
+class UploadMockGitHubAPI(SequenceMockGitHubAPI):
+    """Read streamed request bodies like an HTTP library would."""
+
+    def __init__(self, responses, **kwargs):
+        self.uploads = []
+        super().__init__(responses, **kwargs)
+
+    async def _request(self, method, url, headers, body=b""):
+        if isinstance(body, bytes):
+            self.uploads.append([body])
+        else:
+            self.uploads.append([chunk async for chunk in body])
+        return await super()._request(method, url, headers, body)
+
+
+async def upload_chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestGitHubAPIUpload:
+    @pytest.mark.asyncio
+    async def test_file(self):
+        data = bytes(range(256)) * 1000
+        file = io.BytesIO(b"skipped" + data)
+        file.read(len(b"skipped"))
+        gh = UploadMockGitHubAPI([(201, {}, b"42")])
+        result = await gh.post(
+            "/fake", data=file, content_type="application/octet-stream"
+        )
+        assert result == 42
+        assert gh.headers["content-type"] == "application/octet-stream"
+        assert gh.headers["content-length"] == str(len(data))
+        [chunks] = gh.uploads
+        assert b"".join(chunks) == data
+        assert max(map(len, chunks)) == gh_abc._UPLOAD_CHUNK_SIZE
+
+    @pytest.mark.asyncio
+    async def test_file_retry(self):
+        """A file is uploaded again from where it started."""
+        file = io.BytesIO(b"artifact")
+        gh = UploadMockGitHubAPI(
+            [(503, {}, b""), (200, {}, b"42")],
+            retry_policy=retry.RetryPolicy(jitter=0),
+        )
+        await gh.put("/fake", data=file, content_type="application/octet-stream")
+        assert gh.uploads == [[b"artifact"], [b"artifact"]]
+
+    @pytest.mark.asyncio
+    async def test_file_truncated(self):
+        class TruncatedFile(io.BytesIO):
+            def read(self, size=-1):
+                return b""
+
+        gh = UploadMockGitHubAPI([(201, {}, b"42")])
+        with pytest.raises(ValueError):
+            await gh.post(
+                "/fake",
+                data=TruncatedFile(b"artifact"),
+                content_type="application/octet-stream",
+            )
+
+    @pytest.mark.asyncio
+    async def test_async_iterable(self):
+        gh = UploadMockGitHubAPI([(201, {}, b"42")])
+        await gh.post(
+            "/fake",
+            data=upload_chunks(b"art", b"ifact"),
+            content_type="application/octet-stream",
+        )
+        assert "content-length" not in gh.headers
+        assert gh.uploads == [[b"art", b"ifact"]]
+
+    @pytest.mark.asyncio
+    async def test_async_iterable_content_length(self):
+        gh = UploadMockGitHubAPI([(201, {}, b"42")])
+        await gh.post(
+            "/fake",
+            data=upload_chunks(b"art", b"ifact"),
+            content_type="application/octet-stream",
+            extra_headers={"content-length": "8"},
+        )
+        assert gh.headers["content-length"] == "8"
+
+    @pytest.mark.asyncio
+    async def test_async_iterable_not_retried(self):
+        gh = UploadMockGitHubAPI(
+            [(503, {}, b""), (200, {}, b"42")], retry_policy=retry.RetryPolicy()
+        )
+        with pytest.raises(GitHubBroken):
+            await gh.put(
+                "/fake",
+                data=upload_chunks(b"artifact"),
+                content_type="application/octet-stream",
+            )
+        assert gh.request_count == 1
+
+
+class SlowMockGitHubAPI(MockGitHubAPI):
+    """Hold every request until released."""
+
+    def __init__(self, *args, **kwargs):
+        self.release = asyncio.Event()
+        self.request_count = 0
+        super().__init__(*args, **kwargs)
+
+    async def _request(self, method, url, headers, body=b""):
+        self.request_count += 1
+        await self.release.wait()
+        return await super()._request(method, url, headers, body)
+
+
+class TestGitHubAPICoalesce:
+    @pytest.mark.asyncio
+    async def test_identical_requests_share_response(self):
+        gh = SlowMockGitHubAPI(body=b"42", coalesce=True)
+        tasks = [asyncio.ensure_future(gh.getitem("/fake")) for _ in range(5)]
+        await asyncio.sleep(0)
+        gh.release.set()
+        assert await asyncio.gather(*tasks) == [42] * 5
+        assert gh.request_count == 1
+        assert not gh._in_flight
+        # Later requests are not coalesced with completed ones.
+        assert await gh.getitem("/fake") == 42
+        assert gh.request_count == 2
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self):
+        gh = SlowMockGitHubAPI(body=b"42")
+        tasks = [asyncio.ensure_future(gh.getitem("/fake")) for _ in range(3)]
+        await asyncio.sleep(0)
+        gh.release.set()
+        await asyncio.gather(*tasks)
+        assert gh.request_count == 3
+
+    @pytest.mark.asyncio
+    async def test_different_requests(self):
+        gh = SlowMockGitHubAPI(body=b"42", coalesce=True)
+        tasks = [
+            asyncio.ensure_future(gh.getitem("/fake")),
+            asyncio.ensure_future(gh.getitem("/other")),
+            asyncio.ensure_future(gh.getitem("/fake", oauth_token="token")),
+            asyncio.ensure_future(gh.getitem("/fake", accept="text/plain")),
+            asyncio.ensure_future(gh.post("/fake", data=42)),
+            asyncio.ensure_future(gh.post("/fake", data=42)),
+        ]
+        await asyncio.sleep(0)
+        gh.release.set()
+        await asyncio.gather(*tasks)
+        assert gh.request_count == len(tasks)
+
+    @pytest.mark.asyncio
+    async def test_exception_shared(self):
+        gh = SlowMockGitHubAPI(500, coalesce=True)
+        tasks = [asyncio.ensure_future(gh.getitem("/fake")) for _ in range(2)]
+        await asyncio.sleep(0)
+        gh.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, GitHubBroken) for result in results)
+        assert gh.request_count == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller(self):
+        gh = SlowMockGitHubAPI(body=b"42", coalesce=True)
+        cancelled = asyncio.ensure_future(gh.getitem("/fake"))
+        waiting = asyncio.ensure_future(gh.getitem("/fake"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        gh.release.set()
+        assert await waiting == 42
+        assert cancelled.cancelled()
+        assert gh.request_count == 1
+
+    @pytest.mark.asyncio
+    async def test_all_callers_cancelled(self):
+        """A failure with no caller left to receive it is not logged."""
+        loop = asyncio.get_running_loop()
+        errors = []
+        loop.set_exception_handler(lambda loop, context: errors.append(context))
+        try:
+            gh = SlowMockGitHubAPI(500, coalesce=True)
+            tasks = [asyncio.ensure_future(gh.getitem("/fake")) for _ in range(2)]
+            await asyncio.sleep(0)
+            [shared] = gh._in_flight.values()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            gh.release.set()
+            await asyncio.wait([shared])
+            assert not gh._in_flight
+            # The cancelled callers' frames refer to the shared request too.
+            del shared, tasks, task
+            gc.collect()
+        finally:
+            loop.set_exception_handler(None)
+        assert errors == []
+
+    @pytest.mark.asyncio
+    async def test_shared_request_cancelled(self):
+        gh = SlowMockGitHubAPI(body=b"42", coalesce=True)
+        task = asyncio.ensure_future(gh.getitem("/fake"))
+        await asyncio.sleep(0)
+        [shared] = gh._in_flight.values()
+        shared.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not gh._in_flight
+
+    @pytest.mark.asyncio
+    async def test_with_cache(self):
+        url = "https://api.github.com/fake"
+        cache = {url: ("12345", None, 42, None)}
+        gh = SlowMockGitHubAPI(304, cache=cache, coalesce=True)
+        tasks = [asyncio.ensure_future(gh.getitem(url)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gh.release.set()
+        assert await asyncio.gather(*tasks) == [42] * 3
+        assert gh.request_count == 1
+
+
 _SAMPLE_QUERY = """query {
     viewer {
         name
@@ -776,6 +1906,238 @@ _SAMPLE_QUERY_WITH_VARIABLES = """query ($number_of_repos: Int!) {
 """
 
 
+class TestGitHubAPIMaxConcurrency:
+    @pytest.mark.asyncio
+    async def test_capped(self):
+        gh = PagedMockGitHubAPI([[n] for n in range(10)], max_concurrency=3)
+        requests = [("GET", f"/fake?page={n}") for n in range(1, 11)]
+        await gh.batch(requests)
+        assert len(gh.requested) == 10
+        assert gh.max_in_flight == 3
+
+    @pytest.mark.asyncio
+    async def test_uncapped(self):
+        gh = PagedMockGitHubAPI([[n] for n in range(10)])
+        requests = [("GET", f"/fake?page={n}") for n in range(1, 11)]
+        await gh.batch(requests)
+        assert gh.max_in_flight == 10
+
+    @pytest.mark.asyncio
+    async def test_getiter(self):
+        gh = PagedMockGitHubAPI([[n] for n in range(10)], max_concurrency=2)
+        data = [item async for item in gh.getiter("/fake", concurrency=5)]
+        assert data == list(range(10))
+        assert gh.max_in_flight == 2
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            MockGitHubAPI(max_concurrency=0)
+
+
+class TestGitHubAPIBatch:
+    @pytest.mark.asyncio
+    async def test_order(self):
+        gh = PagedMockGitHubAPI([[n] for n in range(5)])
+        requests = [
+            gh_abc.BatchRequest("GET", "/fake{?page}", {"page": n})
+            for n in range(5, 0, -1)
+        ]
+        assert await gh.batch(requests) == [[4], [3], [2], [1], [0]]
+
+    @pytest.mark.asyncio
+    async def test_exceptions(self):
+        gh = SequenceMockGitHubAPI([(200, {}, b"1"), (404, {}, b""), (200, {}, b"3")])
+        results = await gh.batch([("GET", "/one"), ("GET", "/two"), ("GET", "/three")])
+        assert results[0] == 1
+        assert isinstance(results[1], BadRequest)
+        assert results[1].status_code == 404
+        assert results[2] == 3
+
+    @pytest.mark.asyncio
+    async def test_data(self):
+        gh = MockGitHubAPI(201, body=b'{"id": 1}')
+        request = gh_abc.BatchRequest("POST", "/fake", data={"title": "bug"})
+        assert await gh.batch([request], oauth_token="oauth token") == [{"id": 1}]
+        assert gh.method == "POST"
+        assert json.loads(gh.body) == {"title": "bug"}
+        assert gh.headers["authorization"] == "token oauth token"
+
+
+class RecordingListener:
+    def __init__(self):
+        self.requests = []
+
+    def request_finished(self, request_metrics):
+        self.requests.append(request_metrics)
+
+
+class TestGitHubAPIRequestListeners:
+    @pytest.mark.asyncio
+    async def test_getitem(self):
+        first, second = RecordingListener(), RecordingListener()
+        gh = MockGitHubAPI(body=b'{"id": 1}', request_listeners=[first, second])
+        await gh.getitem("/repos/{owner}/{repo}", {"owner": "o", "repo": "r"})
+        [request] = first.requests
+        assert second.requests == [request]
+        assert request.method == "GET"
+        assert request.template == "/repos/{owner}/{repo}"
+        assert request.url == "https://api.github.com/repos/o/r"
+        assert request.status_code == 200
+        assert request.bytes_sent == 0
+        assert request.bytes_received == len(b'{"id": 1}')
+        assert request.duration >= 0
+        assert request.attempt == 1
+        assert request.rate_limit.remaining == 1
+        assert not request.revalidated
+        assert request.error is None
+
+    @pytest.mark.asyncio
+    async def test_no_listeners(self):
+        gh = MockGitHubAPI(body=b"42")
+        assert gh.request_listeners == []
+        assert await gh.getitem("/fake") == 42
+
+    @pytest.mark.asyncio
+    async def test_post(self):
+        listener = RecordingListener()
+        gh = MockGitHubAPI(201, body=b"{}", request_listeners=[listener])
+        await gh.post("/fake", data={"title": "bug"})
+        [request] = listener.requests
+        assert request.method == "POST"
+        assert request.bytes_sent == len(gh.body)
+
+    @pytest.mark.asyncio
+    async def test_retries(self):
+        listener = RecordingListener()
+
+        class FlakyMockGitHubAPI(SequenceMockGitHubAPI):
+            async def _request(self, method, url, headers, body=b""):
+                if not self.request_count:
+                    self.request_count += 1
+                    raise ConnectionResetError
+                return await super()._request(method, url, headers, body)
+
+        gh = FlakyMockGitHubAPI(
+            [(502, {}, b""), (200, {}, b"42")],
+            retry_policy=retry.RetryPolicy(jitter=0),
+            request_listeners=[listener],
+        )
+        assert await gh.getitem("/fake") == 42
+        statuses = [request.status_code for request in listener.requests]
+        assert statuses == [None, 502, 200]
+        assert [request.attempt for request in listener.requests] == [1, 2, 3]
+        assert isinstance(listener.requests[0].error, ConnectionResetError)
+        assert listener.requests[0].rate_limit is None
+
+    @pytest.mark.asyncio
+    async def test_revalidated(self):
+        listener = RecordingListener()
+        cache = {"https://api.github.com/fake": ("etag", None, "hi", None)}
+        gh = MockGitHubAPI(304, cache=cache, request_listeners=[listener])
+        assert await gh.getitem("/fake") == "hi"
+        [request] = listener.requests
+        assert request.revalidated
+
+    @pytest.mark.asyncio
+    async def test_getiter(self):
+        listener = RecordingListener()
+        gh = PagedMockGitHubAPI([[1], [2], [3]], request_listeners=[listener])
+        assert [item async for item in gh.getiter("/fake")] == [1, 2, 3]
+        assert [request.template for request in listener.requests] == ["/fake"] * 3
+        assert [request.url for request in listener.requests] == [
+            "https://api.github.com/fake",
+            "https://api.github.com/fake?page=2",
+            "https://api.github.com/fake?page=3",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_getiter_incremental(self):
+        listener = RecordingListener()
+        gh = ChunkedMockGitHubAPI([b"[1, ", b"2]"], request_listeners=[listener])
+        items = [item async for item in gh.getiter("/fake", incremental=True)]
+        assert items == [1, 2]
+        [request] = listener.requests
+        assert request.template == "/fake"
+        assert request.bytes_received == len(b"[1, 2]")
+
+    @pytest.mark.asyncio
+    async def test_getstream(self):
+        listener = RecordingListener()
+        gh = ChunkedMockGitHubAPI([b"diff ", b"--git"], request_listeners=[listener])
+        chunks = [chunk async for chunk in gh.getstream("/fake{/ref}", {"ref": "x"})]
+        [request] = listener.requests
+        assert request.template == "/fake{/ref}"
+        assert request.url == "https://api.github.com/fake/x"
+        assert request.status_code == 200
+        assert request.bytes_received == len(b"".join(chunks))
+        assert request.error is None
+
+    @pytest.mark.asyncio
+    async def test_getstream_transport_error(self):
+        listener = RecordingListener()
+
+        class BrokenMockGitHubAPI(MockGitHubAPI):
+            @contextlib.asynccontextmanager
+            async def _stream(self, method, url, headers, body=b""):
+                raise ConnectionResetError
+                yield  # pragma: no cover
+
+        gh = BrokenMockGitHubAPI(request_listeners=[listener])
+        with pytest.raises(ConnectionResetError):
+            async for _ in gh.getstream("/fake"):
+                pass  # pragma: no cover
+        [request] = listener.requests
+        assert request.status_code is None
+        assert request.bytes_received == 0
+        assert isinstance(request.error, ConnectionResetError)
+
+    @pytest.mark.asyncio
+    async def test_upload(self):
+        listener = RecordingListener()
+        gh = UploadMockGitHubAPI(
+            [(201, {}, b"1"), (201, {}, b"2")], request_listeners=[listener]
+        )
+        await gh.post("/fake", data=io.BytesIO(b"artifact"), content_type="x/y")
+        await gh.post("/fake", data=upload_chunks(b"art", b"ifact"), content_type="x/y")
+        assert [request.bytes_sent for request in listener.requests] == [8, None]
+
+    @pytest.mark.asyncio
+    async def test_graphql(self):
+        listener = RecordingListener()
+        gh = MockGitHubAPI(
+            body=b'{"data": {}}',
+            headers={"content-type": JSON_UTF_8_CHARSET},
+            request_listeners=[listener],
+        )
+        await gh.graphql("{ viewer { login } }")
+        [request] = listener.requests
+        assert request.template == request.url == "https://api.github.com/graphql"
+        assert request.method == "POST"
+        assert request.rate_limit is None
+
+    @pytest.mark.asyncio
+    async def test_cost_ledger(self):
+        ledger = metrics.CostLedger()
+        headers = MockGitHubAPI.DEFAULT_HEADERS.copy()
+        headers.update({"x-ratelimit-used": "1", "x-ratelimit-resource": "core"})
+        gh = MockGitHubAPI(body=b"{}", headers=headers, request_listeners=[ledger])
+        await gh.getitem("/repos/{owner}/{repo}/pulls", {"owner": "o", "repo": "r"})
+        assert gh.rate_limit.used == 1
+        assert ledger.snapshot() == {
+            ("GET", "/repos/{owner}/{repo}/pulls"): metrics.EndpointCost(
+                requests=1, cost=1, resource="core"
+            )
+        }
+
+    @pytest.mark.asyncio
+    async def test_collector(self):
+        collector = metrics.MetricsCollector()
+        gh = PagedMockGitHubAPI([[1], [2]], request_listeners=[collector])
+        [item async for item in gh.getiter("/fake")]
+        stats = collector.endpoints["GET", "/fake"]
+        assert stats.requests == stats.latency.count == 2
+
+
 class TestGraphQL:
     """Test gidgethub.abc.GitHubAPI.graphql()."""
 
@@ -944,6 +2306,18 @@ class TestGraphQL:
         with pytest.raises(GraphQLResponseTypeError):
             await gh.graphql("does not matter")
 
+    @pytest.mark.asyncio
+    async def test_buffer_response(self):
+        gh, response_data = self.gh_and_response("success-200.json")
+        gh.response_headers = {"content-type": "application/json; charset=utf-8"}
+        gh.response_body = memoryview(gh.response_body)
+        result = await gh.graphql(_SAMPLE_QUERY)
+        assert result == response_data["data"]
+        gh.response_headers["content-type"] = "text/plain; charset=utf-8"
+        with pytest.raises(GraphQLResponseTypeError) as exc:
+            await gh.graphql(_SAMPLE_QUERY)
+        assert exc.value.response == bytes(gh.response_body).decode("utf-8")
+
     @pytest.mark.asyncio
     async def test_no_response_content_type_gh121(self):
         gh, response_data = self.gh_and_response("success-200.json")
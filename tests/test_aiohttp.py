@@ -1,8 +1,13 @@
 import datetime
+import gzip
+import io
+import json
 
 import aiohttp
 import pytest
+from aiohttp import test_utils, web
 
+from gidgethub import BadRequest
 from gidgethub import aiohttp as gh_aiohttp
 from gidgethub import sansio
 
@@ -38,3 +43,100 @@ async def test_get():
         gh = gh_aiohttp.GitHubAPI(session, "gidgethub")
         data = await gh.getitem("/rate_limit")
     assert "rate" in data
+
+
+@pytest.mark.asyncio
+async def test_getstream():
+    async def handler(request):
+        response = web.StreamResponse(headers={"content-type": "text/plain"})
+        await response.prepare(request)
+        for chunk in [b"diff ", b"--git"]:
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/diff", handler)
+    async with test_utils.TestServer(app) as server:
+        async with aiohttp.ClientSession() as session:
+            gh = gh_aiohttp.GitHubAPI(session, "gidgethub")
+            chunks = [
+                chunk async for chunk in gh.getstream(str(server.make_url("/diff")))
+            ]
+            with pytest.raises(BadRequest):
+                async for _ in gh.getstream(str(server.make_url("/missing"))):
+                    pass  # pragma: no cover
+    assert b"".join(chunks) == b"diff --git"
+
+
+@pytest.mark.asyncio
+async def test_upload():
+    async def handler(request):
+        body = await request.read()
+        return web.json_response(
+            {"body": body.decode(), "content-length": request.content_length}
+        )
+
+    async def chunks():
+        for chunk in [b"art", b"ifact"]:
+            yield chunk
+
+    app = web.Application()
+    app.router.add_post("/upload", handler)
+    async with test_utils.TestServer(app) as server:
+        async with aiohttp.ClientSession() as session:
+            gh = gh_aiohttp.GitHubAPI(session, "gidgethub")
+            url = str(server.make_url("/upload"))
+            from_file = await gh.post(
+                url, data=io.BytesIO(b"artifact"), content_type="text/plain"
+            )
+            from_iterable = await gh.post(url, data=chunks(), content_type="text/plain")
+    assert from_file == {"body": "artifact", "content-length": 8}
+    assert from_iterable == {"body": "artifact", "content-length": None}
+
+
+@pytest.mark.asyncio
+async def test_compression():
+    async def handler(request):
+        data = {"accept-encoding": request.headers["accept-encoding"]}
+        headers = {"content-type": "application/json"}
+        body = json.dumps(data).encode()
+        if "gzip" in data["accept-encoding"]:
+            headers["content-encoding"] = "gzip"
+            body = gzip.compress(body)
+        return web.Response(body=body, headers=headers)
+
+    app = web.Application()
+    app.router.add_get("/compressed", handler)
+    async with test_utils.TestServer(app) as server:
+        async with aiohttp.ClientSession() as session:
+            gh = gh_aiohttp.GitHubAPI(session, "gidgethub")
+            url = str(server.make_url("/compressed"))
+            data = await gh.getitem(url)
+            chunks = [chunk async for chunk in gh.getstream(url)]
+            identity = await gh._request("GET", url, sansio.create_headers("gidgethub"))
+    assert sansio.decipher_response(*identity)[0] == {"accept-encoding": "identity"}
+    assert data == {"accept-encoding": sansio.accept_encoding()}
+    assert json.loads(b"".join(chunks)) == data
+    assert 0 < gh.bytes_received != gh.bytes_decompressed
+
+
+@pytest.mark.asyncio
+async def test_create_session():
+    async def handler(request):
+        return web.json_response({"connection": id(request.transport)})
+
+    app = web.Application()
+    app.router.add_get("/rate_limit", handler)
+    async with test_utils.TestServer(app) as server:
+        async with gh_aiohttp.create_session(read_timeout=5) as session:
+            assert session.connector.limit == 100
+            assert session.timeout == aiohttp.ClientTimeout(
+                total=None, sock_connect=30, sock_read=5
+            )
+            gh = gh_aiohttp.GitHubAPI(session, "gidgethub")
+            url = str(server.make_url("/rate_limit"))
+            first = await gh.getitem(url)
+            second = await gh.getitem(url)
+    # The connection was kept alive.
+    assert first == second
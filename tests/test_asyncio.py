@@ -0,0 +1,403 @@
+import asyncio
+import datetime
+import gzip
+import http.client
+import io
+import json
+import ssl
+
+import pytest
+
+from gidgethub import BadRequest
+from gidgethub import asyncio as gh_asyncio
+from gidgethub import sansio
+
+
+def response(body=b"{}", *, status="200 OK", version="HTTP/1.1", **headers):
+    """Create a raw response, with a content-length unless given 'None'."""
+    headers = {
+        "content-type": "application/json",
+        "content-length": str(len(body)),
+        **{name.replace("_", "-"): value for name, value in headers.items()},
+    }
+    lines = [f"{version} {status}"]
+    lines.extend(
+        f"{name}: {value}" for name, value in headers.items() if value is not None
+    )
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+
+def chunked(*chunks, extension=b"", trailers=b""):
+    body = b"".join(b"%x%b\r\n%b\r\n" % (len(c), extension, c) for c in chunks)
+    return body + b"0\r\n" + trailers + b"\r\n"
+
+
+class Server:
+    """A local server which answers each request with the next response.
+
+    A response of None closes the connection instead of responding and a
+    response followed by ... closes the connection after it. The connection
+    is also closed once there are no more responses.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.connections = 0
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while self.responses:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = dict(
+                    line.lower().split(": ", 1)
+                    for line in head.decode().split("\r\n")[1:-2]
+                )
+                if "content-length" in headers:
+                    body = await reader.readexactly(int(headers["content-length"]))
+                elif "transfer-encoding" in headers:
+                    body = b""
+                    while size := int(await reader.readline(), 16):
+                        body += await reader.readexactly(size)
+                        await reader.readline()
+                    await reader.readline()
+                else:
+                    body = b""
+                self.requests.append((head.decode(), body))
+                raw = self.responses.pop(0)
+                if raw is None:
+                    break
+                writer.write(raw)
+                await writer.drain()
+                if self.responses and self.responses[0] is ...:
+                    self.responses.pop(0)
+                    break
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.mark.asyncio
+async def test_sleep():
+    delay = 1
+    start = datetime.datetime.now()
+    async with gh_asyncio.ConnectionPool() as pool:
+        gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+        await gh.sleep(delay)
+    stop = datetime.datetime.now()
+    assert (stop - start) > datetime.timedelta(seconds=delay)
+
+
+@pytest.mark.asyncio
+async def test_getitem():
+    body = b'{"rate": {}}'
+    async with Server(response(body), response(body)) as server:
+        async with gh_asyncio.ConnectionPool(read_timeout=None) as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            first = await gh.getitem(server.url + "/rate_limit{?page}", {"page": 2})
+            second = await gh.getitem(server.url + "/rate_limit")
+    assert first == second == {"rate": {}}
+    assert server.connections == pool.connections_opened == 1
+    head, _ = server.requests[0]
+    assert head.startswith("GET /rate_limit?page=2 HTTP/1.1\r\n")
+    assert f"host: {server.url[7:]}\r\n" in head
+
+
+@pytest.mark.asyncio
+async def test_chunked_response():
+    body = chunked(b"diff ", b"--git", extension=b";x=y", trailers=b"x-trailer: 1\r\n")
+    raw = response(body, content_length=None, transfer_encoding="chunked")
+    async with Server(raw, raw) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            chunks = [chunk async for chunk in gh.getstream(server.url + "/diff")]
+            assert await gh._request("GET", server.url, {}) == (
+                200,
+                {"content-type": "application/json", "transfer-encoding": "chunked"},
+                b"diff --git",
+            )
+    assert chunks == [b"diff ", b"--git"]
+    assert server.connections == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "raw, connections",
+    [
+        (response(), 1),
+        (response(connection="close"), 2),
+        (response(content_length=None), 2),
+        (response(version="HTTP/1.0"), 2),
+        (response(version="HTTP/1.0", connection="keep-alive"), 1),
+        (response(b"", status="204 No Content", content_length=None), 1),
+    ],
+)
+async def test_keep_alive(raw, connections):
+    # A server which closes the connection does so once it has responded.
+    follow = ... if connections == 2 else response()
+    async with Server(raw, follow, response()) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            for _ in range(2):
+                status, _, _ = await gh_asyncio.GitHubAPI(pool, "gidgethub")._request(
+                    "GET", server.url, {}
+                )
+                assert status in {200, 204}
+    assert server.connections == connections
+
+
+@pytest.mark.asyncio
+async def test_head():
+    async with Server(response(b"", content_length="5"), response()) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            async with pool.stream("HEAD", server.url, {}) as (status, _, chunks):
+                assert [chunk async for chunk in chunks] == []
+            async with pool.stream("GET", server.url, {}) as (status, _, chunks):
+                assert [chunk async for chunk in chunks] == [b"{}"]
+    assert server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_content_length():
+    async with Server(response(), response()) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            for method, body in [("GET", b""), ("POST", b"data")]:
+                async with pool.stream(method, server.url, {}, body) as (_, _, chunks):
+                    assert [chunk async for chunk in chunks] == [b"{}"]
+    (get_head, _), (post_head, post_body) = server.requests
+    assert "content-length" not in get_head
+    assert "content-length: 4\r\n" in post_head
+    assert post_body == b"data"
+
+
+@pytest.mark.asyncio
+async def test_informational_response():
+    raw = b"HTTP/1.1 100 Continue\r\n\r\n" + response()
+    async with Server(raw) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            assert await gh.post(server.url, data={}) == {}
+
+
+@pytest.mark.asyncio
+async def test_stale_connection():
+    async with Server(response(), None, response()) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            await gh.getitem(server.url)
+            # The server closes the idle connection as the request is sent.
+            assert await gh.getitem(server.url) == {}
+    assert server.connections == pool.connections_opened == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_connection_streamed_body():
+    async def body():
+        yield b"data"
+
+    async with Server(response(), None) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            await gh.getitem(server.url)
+            with pytest.raises(http.client.RemoteDisconnected):
+                await gh.post(server.url, data=body(), content_type="text/plain")
+
+
+@pytest.mark.asyncio
+async def test_closed_idle_connection():
+    async with Server(response(), ..., response()) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            await gh.getitem(server.url)
+            await asyncio.sleep(0.05)
+            assert await gh.getitem(server.url) == {}
+    assert pool.connections_opened == 2
+
+
+@pytest.mark.asyncio
+async def test_keepalive_expiry():
+    async with Server(response(), response()) as server:
+        async with gh_asyncio.ConnectionPool(keepalive_expiry=0) as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            await gh.getitem(server.url)
+            await gh.getitem(server.url)
+    assert pool.connections_opened == 2
+
+
+@pytest.mark.asyncio
+async def test_max_connections_per_host():
+    async with Server(*[response()] * 4) as server:
+        async with gh_asyncio.ConnectionPool(max_connections_per_host=2) as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            await asyncio.gather(*(gh.getitem(server.url) for _ in range(4)))
+    assert pool.connections_opened == 2
+
+    with pytest.raises(ValueError):
+        gh_asyncio.ConnectionPool(max_connections_per_host=0)
+
+
+@pytest.mark.asyncio
+async def test_stream_closed_early():
+    body = chunked(b"diff ", b"--git")
+    raw = response(body, content_length=None, transfer_encoding="chunked")
+    async with Server(raw, response()) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            async for chunk in gh.getstream(server.url):
+                break
+            assert await gh.getitem(server.url) == {}
+    assert pool.connections_opened == 2
+
+
+@pytest.mark.asyncio
+async def test_upload():
+    async def chunks():
+        for chunk in [b"art", b"", b"ifact"]:
+            yield chunk
+
+    async with Server(*[response()] * 3) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            await gh.post(server.url, data=io.BytesIO(b"artifact"), content_type="x/y")
+            await gh.post(server.url, data=chunks(), content_type="x/y")
+            await gh.post(
+                server.url,
+                data=chunks(),
+                content_type="x/y",
+                extra_headers={"Content-Length": "8"},
+            )
+    (file_head, file_body), (iter_head, iter_body), (length_head, length_body) = (
+        server.requests
+    )
+    assert "content-length: 8\r\n" in file_head
+    assert "transfer-encoding: chunked\r\n" in iter_head
+    assert "content-length: 8\r\n" in length_head
+    assert "transfer-encoding" not in length_head
+    assert file_body == iter_body == length_body == b"artifact"
+
+
+@pytest.mark.asyncio
+async def test_compression():
+    data = {"compressed": True}
+    raw = response(gzip.compress(json.dumps(data).encode()), content_encoding="gzip")
+    async with Server(raw) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            assert await gh.getitem(server.url) == data
+    head, _ = server.requests[0]
+    assert f"accept-encoding: {sansio.accept_encoding()}\r\n" in head
+    assert 0 < gh.bytes_received != gh.bytes_decompressed
+
+
+@pytest.mark.asyncio
+async def test_error_status():
+    raw = response(b'{"message": "Not Found"}', status="404 Not Found")
+    async with Server(raw) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            with pytest.raises(BadRequest):
+                await gh.getitem(server.url)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "raw, error",
+    [
+        (None, http.client.RemoteDisconnected),
+        (b"HTTP/1.1 200 OK\r\n", http.client.IncompleteRead),
+        (b"SPDY/3 200 OK\r\n\r\n", http.client.BadStatusLine),
+        (b"HTTP/1.1 OK\r\n\r\n", http.client.BadStatusLine),
+        (b"HTTP/1.1 200 OK\r\nno colon\r\n\r\n", http.client.HTTPException),
+        (
+            b"HTTP/1.1 200 OK\r\nx: " + b"x" * 2**17 + b"\r\n\r\n",
+            http.client.LineTooLong,
+        ),
+        (response(b"{}", content_length="5"), http.client.IncompleteRead),
+        (
+            response(b"zz\r\n", content_length=None, transfer_encoding="chunked"),
+            http.client.HTTPException,
+        ),
+        (
+            response(b"2\r\n{}xx", content_length=None, transfer_encoding="chunked"),
+            http.client.HTTPException,
+        ),
+    ],
+)
+async def test_invalid_response(raw, error):
+    async with Server(raw) as server:
+        async with gh_asyncio.ConnectionPool() as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            with pytest.raises(error):
+                await gh.getitem(server.url)
+
+
+@pytest.mark.asyncio
+async def test_read_timeout():
+    async with Server(b"HTTP/1.1 200 OK\r\n", response()) as server:
+        async with gh_asyncio.ConnectionPool(read_timeout=0.05) as pool:
+            gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+            with pytest.raises(asyncio.TimeoutError):
+                await gh.getitem(server.url)
+            assert pool.connections_opened == 1
+            assert pool._idle == {}
+
+
+@pytest.mark.asyncio
+async def test_invalid_request():
+    async with gh_asyncio.ConnectionPool() as pool:
+        gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+        with pytest.raises(ValueError):
+            await gh.getitem("ftp://example.com/")
+        with pytest.raises(ValueError):
+            await gh.getitem(
+                "http://example.com/", extra_headers={"x-header": "a\r\nb: c"}
+            )
+    assert pool.connections_opened == 0
+
+
+@pytest.mark.asyncio
+async def test_https(monkeypatch):
+    contexts = []
+
+    async def open_connection(host, port, *, ssl):
+        contexts.append((host, port, ssl))
+        raise ConnectionRefusedError
+
+    monkeypatch.setattr(asyncio, "open_connection", open_connection)
+    async with gh_asyncio.ConnectionPool() as pool:
+        gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+        for _ in range(2):
+            with pytest.raises(ConnectionRefusedError):
+                await gh.getitem("https://api.github.com/rate_limit")
+    context = ssl.create_default_context()
+    async with gh_asyncio.ConnectionPool(ssl_context=context) as pool:
+        gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+        with pytest.raises(ConnectionRefusedError):
+            await gh.getitem("https://api.github.com:8443/rate_limit")
+    (host, port, first), (_, _, second), (_, custom_port, custom) = contexts
+    assert (host, port) == ("api.github.com", 443)
+    assert isinstance(first, ssl.SSLContext) and first is second
+    assert custom_port == 8443 and custom is context
+
+
+@pytest.mark.asyncio
+async def test_close():
+    async with Server(response(), response()) as server:
+        pool = gh_asyncio.ConnectionPool()
+        gh = gh_asyncio.GitHubAPI(pool, "gidgethub")
+        await gh.getitem(server.url)
+        [[connection]] = pool._idle.values()
+        await pool.close()
+        assert connection.writer.is_closing()
+        assert pool._idle == {}
@@ -0,0 +1,356 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from gidgethub import cache as gh_cache
+from gidgethub import codec as gh_codec
+
+
+class TestRawBody:
+    """Tests for gidgethub.cache.RawBody."""
+
+    def test_decode(self):
+        body = json.dumps({"hello": "world"}).encode("utf-8")
+        raw = gh_cache.RawBody("application/json; charset=utf-8", body)
+        assert raw.decode() == {"hello": "world"}
+
+    def test_decode_json_codec(self):
+        class Codec(gh_codec.StdlibJSONCodec):
+            def decode(self, data):
+                return {"decoded": super().decode(data)}
+
+        raw = gh_cache.RawBody("application/json", b"[1]")
+        assert raw.decode(json_codec=Codec()) == {"decoded": [1]}
+
+    def test_decode_text(self):
+        raw = gh_cache.RawBody("text/plain", b"diff --git")
+        assert raw.decode() == "diff --git"
+
+    def test_from_body_small(self):
+        raw = gh_cache.RawBody.from_body("application/json", b"[1, 2, 3]")
+        assert not raw.compressed
+        assert raw.body == b"[1, 2, 3]"
+
+    def test_from_body_buffer(self):
+        buffer = bytearray(b"[1, 2, 3]")
+        raw = gh_cache.RawBody.from_body("application/json", memoryview(buffer))
+        buffer[:] = b"[4, 5, 6]"
+        assert type(raw.body) is bytes
+        assert raw.decode() == [1, 2, 3]
+
+    def test_from_body_compressed(self):
+        data = [{"url": "https://api.github.com/repos/octocat/hello"}] * 1000
+        body = json.dumps(data).encode("utf-8")
+        raw = gh_cache.RawBody.from_body("application/json", body)
+        assert raw.compressed
+        assert len(raw.body) < len(body)
+        assert raw.decode() == data
+
+    def test_from_body_incompressible(self):
+        body = os.urandom(gh_cache.COMPRESS_THRESHOLD)
+        raw = gh_cache.RawBody.from_body("application/octet-stream", body)
+        assert not raw.compressed
+        assert raw.body == body
+
+    def test_from_body_no_compression(self):
+        body = b"[" + b"1, " * 10_000 + b"1]"
+        raw = gh_cache.RawBody.from_body(
+            "application/json", body, compress_threshold=None
+        )
+        assert not raw.compressed
+
+    def test_eq(self):
+        raw = gh_cache.RawBody("application/json", b"[]")
+        assert raw == gh_cache.RawBody("application/json", b"[]")
+        assert raw != gh_cache.RawBody("application/json", b"[]", compressed=True)
+        assert raw != b"[]"
+
+    def test_repr(self):
+        raw = gh_cache.RawBody("application/json", b"[]")
+        assert repr(raw) == "RawBody('application/json', <2 bytes>, compressed=False)"
+
+    def test_size(self):
+        body = b"x" * 10_000
+        raw = gh_cache.RawBody("application/json", body)
+        assert gh_cache.approximate_size(raw) >= len(body)
+
+
+class TestMappingCache:
+    """Tests for gidgethub.cache.MappingCache."""
+
+    @pytest.mark.asyncio
+    async def test_get(self):
+        entry = ("12345", None, 42, None)
+        cache = gh_cache.MappingCache({"key": entry})
+        assert await cache.get("key") == entry
+        assert await cache.get("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_set(self):
+        mapping = {}
+        cache = gh_cache.MappingCache(mapping)
+        entry = ("12345", None, 42, None)
+        await cache.set("key", entry, ttl=60)
+        assert mapping == {"key": entry}
+
+    @pytest.mark.asyncio
+    async def test_delete(self):
+        mapping = {"key": ("12345", None, 42, None)}
+        cache = gh_cache.MappingCache(mapping)
+        await cache.delete("key")
+        assert not mapping
+        await cache.delete("key")  # No exception raised.
+
+    @pytest.mark.asyncio
+    async def test_revalidate(self):
+        mapping = {"key": ("12345", None, 42, None)}
+        cache = gh_cache.MappingCache(mapping)
+        await cache.revalidate("key", ttl=60)
+        assert mapping == {"key": ("12345", None, 42, None)}
+
+    def test_protocol(self):
+        assert isinstance(gh_cache.MappingCache({}), gh_cache.AsyncCache)
+        assert not isinstance({}, gh_cache.AsyncCache)
+
+
+class TestSQLiteCache:
+    """Tests for gidgethub.cache.SQLiteCache."""
+
+    @pytest.mark.asyncio
+    async def test_round_trip(self, tmp_path):
+        cache = gh_cache.SQLiteCache(tmp_path / "cache.sqlite")
+        entry = ("12345", "67890", {"hello": ["world"]}, "https://next")
+        await cache.set("key", entry)
+        assert await cache.get("key") == entry
+        assert await cache.get("missing") is None
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_raw_body(self, tmp_path):
+        cache = gh_cache.SQLiteCache(tmp_path / "cache.sqlite")
+        raw = gh_cache.RawBody("application/json", b"x" * 10, compressed=True)
+        entry = ("12345", None, raw, "https://next")
+        await cache.set("key", entry)
+        assert await cache.get("key") == entry
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_delete(self, tmp_path):
+        cache = gh_cache.SQLiteCache(tmp_path / "cache.sqlite")
+        await cache.set("key", ("12345", None, 42, None))
+        await cache.delete("key")
+        assert await cache.get("key") is None
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_shared(self, tmp_path):
+        """Separate connections to the same file see each other's entries."""
+        path = str(tmp_path / "cache.sqlite")
+        cache1 = gh_cache.SQLiteCache(path)
+        cache2 = gh_cache.SQLiteCache(path)
+        entry = ("12345", None, "diff --git", None)
+        await cache1.set("key", entry)
+        assert await cache2.get("key") == entry
+        cache1.close()
+        cache2.close()
+
+    @pytest.mark.asyncio
+    async def test_ttl(self, tmp_path, monkeypatch):
+        cache = gh_cache.SQLiteCache(tmp_path / "cache.sqlite", ttl=60)
+        await cache.set("default", ("1", None, 1, None))
+        await cache.set("short", ("2", None, 2, None), ttl=10)
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 30)
+        assert await cache.get("default") == ("1", None, 1, None)
+        assert await cache.get("short") is None
+        monkeypatch.setattr(time, "time", lambda: now + 90)
+        assert await cache.get("default") is None
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_revalidate(self, tmp_path, monkeypatch):
+        cache = gh_cache.SQLiteCache(tmp_path / "cache.sqlite", ttl=60)
+        await cache.set("default", ("1", None, 1, None))
+        await cache.set("short", ("2", None, 2, None), ttl=10)
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 50)
+        await cache.revalidate("default")
+        await cache.revalidate("short", ttl=20)
+        await cache.revalidate("missing")  # No exception raised.
+        monkeypatch.setattr(time, "time", lambda: now + 65)
+        assert await cache.get("default") == ("1", None, 1, None)
+        assert await cache.get("short") == ("2", None, 2, None)
+        monkeypatch.setattr(time, "time", lambda: now + 111)
+        assert await cache.get("default") is None
+        assert await cache.get("short") is None
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_purge(self, tmp_path, monkeypatch):
+        cache = gh_cache.SQLiteCache(tmp_path / "cache.sqlite")
+        await cache.set("long", ("1", None, 1, None), ttl=60)
+        await cache.set("short", ("2", None, 2, None), ttl=10)
+        await cache.set("forever", ("3", None, 3, None))
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 30)
+        assert await cache.purge() == 1
+        monkeypatch.setattr(time, "time", lambda: now + 90)
+        assert await cache.purge() == 1
+        assert await cache.purge() == 0
+        assert await cache.get("forever") == ("3", None, 3, None)
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_purged_by_set(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(gh_cache, "_PURGE_INTERVAL", 3)
+        cache = gh_cache.SQLiteCache(tmp_path / "cache.sqlite")
+        await cache.set("expired", ("1", None, 1, None), ttl=-1)
+        await cache.set("fresh", ("2", None, 2, None))
+
+        def count():
+            return cache._connection.execute(
+                "SELECT COUNT(*) FROM gidgethub_cache"
+            ).fetchone()[0]
+
+        assert count() == 2
+        await cache.set("third", ("3", None, 3, None))
+        assert count() == 2
+        assert await cache.get("fresh") == ("2", None, 2, None)
+        cache.close()
+
+    def test_sqlite3_imported_lazily(self):
+        code = "import sys, gidgethub.abc; print('sqlite3' in sys.modules)"
+        output = subprocess.run(
+            [sys.executable, "-c", code], check=True, capture_output=True, text=True
+        ).stdout
+        assert output.strip() == "False"
+
+    @pytest.mark.asyncio
+    async def test_stored_as_json(self, tmp_path):
+        path = tmp_path / "cache.sqlite"
+        cache = gh_cache.SQLiteCache(path)
+        await cache.set("key", ("12345", None, [1, 2], None))
+        (value,) = cache._connection.execute(
+            "SELECT value FROM gidgethub_cache WHERE key = ?", ("key",)
+        ).fetchone()
+        assert json.loads(value) == ["12345", None, [1, 2], None]
+        cache.close()
+
+
+class TestApproximateSize:
+    """Tests for gidgethub.cache.approximate_size()."""
+
+    def test_nested(self):
+        flat = gh_cache.approximate_size([])
+        nested = gh_cache.approximate_size([{"key": ["value", 42]}])
+        assert nested > flat
+
+    def test_grows_with_content(self):
+        small = gh_cache.approximate_size({"body": "x"})
+        large = gh_cache.approximate_size({"body": "x" * 10_000})
+        assert large - small >= 9_999
+
+
+class TestLRUCache:
+    """Tests for gidgethub.cache.LRUCache."""
+
+    @pytest.mark.asyncio
+    async def test_hit_and_miss(self):
+        cache = gh_cache.LRUCache()
+        entry = ("12345", None, 42, None)
+        assert await cache.get("key") is None
+        await cache.set("key", entry)
+        assert await cache.get("key") == entry
+        assert "key" in cache
+        assert len(cache) == 1
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_maxsize(self):
+        cache = gh_cache.LRUCache(2)
+        await cache.set("a", ("a", None, 1, None))
+        await cache.set("b", ("b", None, 2, None))
+        # Make "a" the most recently used entry.
+        await cache.get("a")
+        await cache.set("c", ("c", None, 3, None))
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.evictions == 1
+
+    @pytest.mark.asyncio
+    async def test_max_bytes(self):
+        cache = gh_cache.LRUCache(max_bytes=25, size_of=lambda entry: entry[2])
+        await cache.set("a", ("a", None, 10, None))
+        await cache.set("b", ("b", None, 10, None))
+        assert cache.nbytes == 20
+        await cache.set("c", ("c", None, 10, None))
+        assert "a" not in cache
+        assert cache.nbytes == 20
+        assert cache.evictions == 1
+        # Too big to ever fit.
+        await cache.set("d", ("d", None, 30, None))
+        assert "d" not in cache
+        assert len(cache) == 2
+
+    @pytest.mark.asyncio
+    async def test_max_age(self, monkeypatch):
+        cache = gh_cache.LRUCache(max_age=60)
+        await cache.set("default", ("1", None, 1, None))
+        await cache.set("short", ("2", None, 2, None), ttl=10)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 30)
+        assert await cache.get("default") == ("1", None, 1, None)
+        assert await cache.get("short") is None
+        assert "short" not in cache
+        assert cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_revalidation(self):
+        cache = gh_cache.LRUCache(size_of=lambda entry: 1)
+        await cache.set("key", ("12345", None, 42, None))
+        await cache.set("key", ("12345", None, 42, None))
+        assert cache.revalidations == 1
+        await cache.set("key", ("67890", None, 42, None))
+        assert cache.revalidations == 1
+        assert cache.nbytes == 1
+
+    @pytest.mark.asyncio
+    async def test_revalidate(self, monkeypatch):
+        sizes = []
+
+        def size_of(entry):
+            sizes.append(entry)
+            return 1
+
+        cache = gh_cache.LRUCache(maxsize=2, max_age=60, size_of=size_of)
+        await cache.set("a", ("1", None, 1, None))
+        await cache.set("b", ("2", None, 2, None))
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 50)
+        await cache.revalidate("a")
+        await cache.revalidate("missing")
+        assert cache.revalidations == 1
+        assert len(sizes) == 2
+        # "a" is now the most recently used entry.
+        await cache.set("c", ("3", None, 3, None))
+        assert "a" in cache and "b" not in cache
+        monkeypatch.setattr(time, "monotonic", lambda: now + 100)
+        assert await cache.get("a") == ("1", None, 1, None)
+        await cache.revalidate("a", ttl=10)
+        monkeypatch.setattr(time, "monotonic", lambda: now + 111)
+        assert await cache.get("a") is None
+
+    @pytest.mark.asyncio
+    async def test_delete(self):
+        cache = gh_cache.LRUCache()
+        await cache.set("key", ("12345", None, 42, None))
+        await cache.delete("key")
+        await cache.delete("key")
+        assert "key" not in cache
+        assert cache.nbytes == 0
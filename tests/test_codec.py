@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from gidgethub import codec
+
+DATA = {"title": "Bug ✨", "labels": ["bug"], "number": 42, "draft": False, "x": None}
+
+
+class TestStdlibJSONCodec:
+    """Tests for gidgethub.codec.StdlibJSONCodec."""
+
+    def test_encode(self):
+        encoded = codec.StdlibJSONCodec().encode(DATA)
+        assert isinstance(encoded, bytes)
+        assert encoded == json.dumps(DATA).encode("utf-8")
+
+    def test_decode(self):
+        json_codec = codec.StdlibJSONCodec()
+        assert json_codec.decode(json.dumps(DATA)) == DATA
+        assert json_codec.decode(json.dumps(DATA).encode("utf-8")) == DATA
+
+    def test_decode_buffers(self):
+        json_codec = codec.StdlibJSONCodec()
+        encoded = json.dumps(DATA).encode("utf-8")
+        assert json_codec.decode(bytearray(encoded)) == DATA
+        assert json_codec.decode(memoryview(encoded)) == DATA
+
+    def test_default(self):
+        assert isinstance(codec.DEFAULT_CODEC, codec.StdlibJSONCodec)
+
+
+class TestOrjsonCodec:
+    """Tests for gidgethub.codec.OrjsonCodec."""
+
+    def test_round_trip(self):
+        pytest.importorskip("orjson")
+        json_codec = codec.OrjsonCodec()
+        encoded = json_codec.encode(DATA)
+        assert isinstance(encoded, bytes)
+        assert json.loads(encoded) == DATA
+        assert json_codec.decode(encoded) == DATA
+        assert json_codec.decode(encoded.decode("utf-8")) == DATA
+        assert json_codec.decode(bytearray(encoded)) == DATA
+        assert json_codec.decode(memoryview(encoded)) == DATA
+
+    def test_invalid(self):
+        pytest.importorskip("orjson")
+        with pytest.raises(ValueError):
+            codec.OrjsonCodec().decode(b"{")
@@ -1,13 +1,109 @@
+import asyncio
 import datetime
+import gzip
+import io
+import json
+import sys
 
 import httpx
 
 import pytest
 
+from gidgethub import BadRequest
 from gidgethub import httpx as gh_httpx
 from gidgethub import sansio
 
 
+class StreamingMockTransport(httpx.AsyncBaseTransport):
+    """Unlike httpx.MockTransport, leave the response body to be streamed."""
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    async def handle_async_request(self, request):
+        await request.aread()
+        response = self.handler(request)
+        if isinstance(response.stream, httpx.ByteStream):
+            # A body which was given all at once has already been read.
+            return httpx.Response(
+                response.status_code,
+                headers=response.headers,
+                stream=response.stream,
+            )
+        return response
+
+
+class CountingServer(asyncio.Protocol):
+    """Answer requests with an empty JSON object and count the connections."""
+
+    connections = 0
+
+    def connection_made(self, transport):
+        type(self).connections += 1
+        self.transport = transport
+        self.buffer = b""
+
+    def data_received(self, data):
+        self.buffer += data
+        while b"\r\n\r\n" in self.buffer:
+            _, self.buffer = self.buffer.split(b"\r\n\r\n", 1)
+            asyncio.get_running_loop().call_later(0.05, self.respond)
+
+    def respond(self):
+        self.transport.write(
+            b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+            b"content-length: 2\r\n\r\n{}"
+        )
+
+
+class CountingHTTP2Server(CountingServer):
+    def connection_made(self, transport):
+        import h2.config
+        import h2.connection
+
+        super().connection_made(transport)
+        config = h2.config.H2Configuration(client_side=False)
+        self.conn = h2.connection.H2Connection(config=config)
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        import h2.events
+
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.StreamEnded):
+                asyncio.get_running_loop().call_later(
+                    0.05, self.respond_on, event.stream_id
+                )
+        self.transport.write(self.conn.data_to_send())
+
+    def respond_on(self, stream_id):
+        headers = [(":status", "200"), ("content-type", "application/json")]
+        self.conn.send_headers(stream_id, headers)
+        self.conn.send_data(stream_id, b"{}", end_stream=True)
+        self.transport.write(self.conn.data_to_send())
+
+
+async def count_connections(protocol, requests, **kwargs):
+    protocol.connections = 0
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(protocol, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        async with gh_httpx.create_client(**kwargs) as client:
+            gh = gh_httpx.GitHubAPI(
+                client, "gidgethub", base_url=f"http://127.0.0.1:{port}"
+            )
+            results = await asyncio.gather(
+                *(gh.getitem("/rate_limit") for _ in range(requests))
+            )
+    finally:
+        server.close()
+        await server.wait_closed()
+    assert results == [{}] * requests
+    return protocol.connections
+
+
 @pytest.mark.asyncio
 async def test_sleep():
     delay = 1
@@ -39,3 +135,101 @@ async def test_get():
         gh = gh_httpx.GitHubAPI(client, "gidgethub")
         data = await gh.getitem("/rate_limit")
     assert "rate" in data
+
+
+@pytest.mark.asyncio
+async def test_getstream():
+    async def body():
+        for chunk in [b"diff ", b"--git"]:
+            yield chunk
+
+    def handler(request):
+        if request.url.path == "/diff":
+            return httpx.Response(
+                200, headers={"content-type": "text/plain"}, content=body()
+            )
+        return httpx.Response(404)
+
+    async with httpx.AsyncClient(transport=StreamingMockTransport(handler)) as client:
+        gh = gh_httpx.GitHubAPI(client, "gidgethub")
+        chunks = [chunk async for chunk in gh.getstream("https://example.com/diff")]
+        with pytest.raises(BadRequest):
+            async for _ in gh.getstream("https://example.com/missing"):
+                pass  # pragma: no cover
+    assert chunks == [b"diff ", b"--git"]
+
+
+@pytest.mark.asyncio
+async def test_upload():
+    def handler(request):
+        body = request.content
+        return httpx.Response(
+            200,
+            json={
+                "body": body.decode(),
+                "content-length": request.headers.get("content-length"),
+            },
+        )
+
+    async def chunks():
+        for chunk in [b"art", b"ifact"]:
+            yield chunk
+
+    async with httpx.AsyncClient(transport=StreamingMockTransport(handler)) as client:
+        gh = gh_httpx.GitHubAPI(client, "gidgethub")
+        url = "https://example.com/upload"
+        from_file = await gh.post(
+            url, data=io.BytesIO(b"artifact"), content_type="text/plain"
+        )
+        from_iterable = await gh.post(url, data=chunks(), content_type="text/plain")
+    assert from_file == {"body": "artifact", "content-length": "8"}
+    assert from_iterable == {"body": "artifact", "content-length": None}
+
+
+@pytest.mark.asyncio
+async def test_compression():
+    def handler(request):
+        data = {"accept-encoding": request.headers["accept-encoding"]}
+        headers = {"content-type": "application/json"}
+        body = json.dumps(data).encode()
+        if "gzip" in data["accept-encoding"]:
+            headers["content-encoding"] = "gzip"
+            body = gzip.compress(body)
+        return httpx.Response(200, headers=headers, content=body)
+
+    async with httpx.AsyncClient(transport=StreamingMockTransport(handler)) as client:
+        gh = gh_httpx.GitHubAPI(client, "gidgethub")
+        url = "https://example.com/compressed"
+        data = await gh.getitem(url)
+        chunks = [chunk async for chunk in gh.getstream(url)]
+        identity = await gh._request("GET", url, sansio.create_headers("gidgethub"))
+    assert sansio.decipher_response(*identity)[0] == {"accept-encoding": "identity"}
+    assert data == {"accept-encoding": sansio.accept_encoding()}
+    assert json.loads(b"".join(chunks)) == data
+    assert 0 < gh.bytes_received != gh.bytes_decompressed
+
+
+@pytest.mark.asyncio
+async def test_create_client_http1():
+    connections = await count_connections(
+        CountingServer, 6, http2=False, max_connections=2
+    )
+    assert connections == 2
+
+
+@pytest.mark.asyncio
+async def test_create_client_http2():
+    pytest.importorskip("h2")
+    # Without TLS to negotiate the protocol, HTTP/2 must be used from the start.
+    connections = await count_connections(CountingHTTP2Server, 6, http1=False)
+    assert connections == 1
+
+
+def test_create_client_default(monkeypatch):
+    pytest.importorskip("h2")
+    assert gh_httpx.create_client()._transport._pool._http2
+    # Without h2 (e.g. only the httpx extra is installed), HTTP/1.1 is used.
+    monkeypatch.setitem(sys.modules, "h2", None)
+    assert not gh_httpx.create_client()._transport._pool._http2
+    with pytest.raises(ImportError):
+        gh_httpx.create_client(http2=True)
@@ -0,0 +1,195 @@
+import pytest
+
+from gidgethub import metrics, sansio
+
+
+def request_metrics(**kwargs):
+    fields = {
+        "method": "GET",
+        "template": "/repos/{owner}/{repo}",
+        "url": "https://api.github.com/repos/o/r",
+        "status_code": 200,
+        "bytes_sent": 0,
+        "bytes_received": 100,
+        "duration": 0.2,
+        "attempt": 1,
+        "rate_limit": None,
+    }
+    fields.update(kwargs)
+    return metrics.RequestMetrics(**fields)
+
+
+def graphql_rate_limit(used, *, reset_epoch=1_000_000, report_used=True):
+    return sansio.RateLimit(
+        limit=5000,
+        remaining=5000 - used,
+        reset_epoch=reset_epoch,
+        used=used if report_used else None,
+        resource="graphql",
+    )
+
+
+class TestHistogram:
+    """Tests for gidgethub.metrics.Histogram."""
+
+    @pytest.mark.parametrize("bounds", [(), (1, 1), (2, 1)])
+    def test_invalid_bounds(self, bounds):
+        with pytest.raises(ValueError):
+            metrics.Histogram(bounds)
+
+    def test_observe(self):
+        histogram = metrics.Histogram((1, 2))
+        for value in (0.5, 1, 1.5, 3, 4):
+            histogram.observe(value)
+        assert histogram.counts == [2, 1, 2]
+        assert histogram.count == 5
+        assert histogram.sum == 10
+
+    def test_quantile(self):
+        histogram = metrics.Histogram((1, 2, 3))
+        for value in (1.5, 1.5, 1.5, 2.5):
+            histogram.observe(value)
+        assert histogram.quantile(0) == 2
+        assert histogram.quantile(0.5) == 2
+        assert histogram.quantile(0.75) == 2
+        assert histogram.quantile(0.99) == 3
+
+    def test_quantile_overflow(self):
+        histogram = metrics.Histogram((1,))
+        histogram.observe(0.5)
+        histogram.observe(5)
+        assert histogram.quantile(0.5) == 1
+        assert histogram.quantile(1) == float("inf")
+
+    def test_quantile_empty(self):
+        assert metrics.Histogram().quantile(0.5) is None
+
+    @pytest.mark.parametrize("q", [-0.1, 1.1])
+    def test_invalid_quantile(self, q):
+        with pytest.raises(ValueError):
+            metrics.Histogram().quantile(q)
+
+
+class TestMetricsCollector:
+    """Tests for gidgethub.metrics.MetricsCollector."""
+
+    def test_endpoints(self):
+        collector = metrics.MetricsCollector()
+        collector.request_finished(request_metrics())
+        collector.request_finished(request_metrics(method="PATCH", bytes_sent=10))
+        collector.request_finished(request_metrics(url="https://api.github.com/x/y"))
+        assert set(collector.endpoints) == {
+            ("GET", "/repos/{owner}/{repo}"),
+            ("PATCH", "/repos/{owner}/{repo}"),
+        }
+        stats = collector.endpoints["GET", "/repos/{owner}/{repo}"]
+        assert stats.requests == 2
+        assert stats.bytes_received == 200
+        assert stats.latency.count == 2
+        assert collector.endpoints["PATCH", "/repos/{owner}/{repo}"].bytes_sent == 10
+
+    def test_outcomes(self):
+        collector = metrics.MetricsCollector()
+        error = ConnectionResetError()
+        collector.request_finished(
+            request_metrics(status_code=None, bytes_received=0, error=error)
+        )
+        collector.request_finished(request_metrics(status_code=502, attempt=2))
+        collector.request_finished(request_metrics(attempt=3, bytes_sent=None))
+        collector.request_finished(request_metrics(status_code=304))
+        [stats] = collector.endpoints.values()
+        assert stats.requests == 4
+        assert stats.retries == 2
+        assert stats.transport_errors == 1
+        assert stats.revalidated == 1
+        assert stats.statuses == {200: 1, 304: 1, 502: 1}
+        assert stats.bytes_sent == 0
+
+    def test_bounds(self):
+        collector = metrics.MetricsCollector(bounds=(0.1, 1))
+        collector.request_finished(request_metrics(duration=0.5))
+        [stats] = collector.endpoints.values()
+        assert stats.latency.counts == [0, 1, 0]
+        with pytest.raises(ValueError):
+            metrics.MetricsCollector(bounds=())
+
+
+class TestCostLedger:
+    """Tests for gidgethub.metrics.CostLedger."""
+
+    def test_rest(self):
+        ledger = metrics.CostLedger()
+        core = sansio.RateLimit(
+            limit=5000, remaining=4999, reset_epoch=1_000_000, resource="core"
+        )
+        ledger.request_finished(request_metrics(rate_limit=core))
+        ledger.request_finished(request_metrics(url="https://api.github.com/x/y"))
+        ledger.request_finished(request_metrics(status_code=304))
+        ledger.request_finished(request_metrics(status_code=None, bytes_received=0))
+        ledger.request_finished(request_metrics(method="POST", status_code=422))
+        assert ledger.snapshot() == {
+            ("GET", "/repos/{owner}/{repo}"): metrics.EndpointCost(
+                requests=4, revalidated=1, cost=2, resource="core"
+            ),
+            ("POST", "/repos/{owner}/{repo}"): metrics.EndpointCost(requests=1, cost=1),
+        }
+
+    def test_snapshot_is_a_copy(self):
+        ledger = metrics.CostLedger()
+        ledger.request_finished(request_metrics())
+        snapshot = ledger.snapshot()
+        ledger.request_finished(request_metrics())
+        [entry] = snapshot.values()
+        assert entry.requests == 1
+
+    def test_graphql(self):
+        ledger = metrics.CostLedger()
+        queries = [("query_a", 10), ("query_b", 15), ("query_a", 16)]
+        for template, used in queries:
+            ledger.request_finished(
+                request_metrics(
+                    method="POST",
+                    template=template,
+                    rate_limit=graphql_rate_limit(used),
+                )
+            )
+        snapshot = ledger.snapshot()
+        # The first query in a window is charged the minimum of 1 point.
+        assert snapshot["POST", "query_a"].cost == 1 + 1
+        assert snapshot["POST", "query_b"].cost == 5
+        assert snapshot["POST", "query_a"].resource == "graphql"
+
+    def test_graphql_out_of_order(self):
+        ledger = metrics.CostLedger()
+        for used in (10, 20, 15, 21):
+            ledger.request_finished(
+                request_metrics(rate_limit=graphql_rate_limit(used))
+            )
+        [entry] = ledger.snapshot().values()
+        assert entry.cost == 1 + 10 + 0 + 1
+
+    def test_graphql_windows(self):
+        ledger = metrics.CostLedger()
+        ledger.request_finished(request_metrics(rate_limit=graphql_rate_limit(100)))
+        ledger.request_finished(
+            request_metrics(rate_limit=graphql_rate_limit(3, reset_epoch=1_003_600))
+        )
+        ledger.request_finished(
+            request_metrics(
+                rate_limit=graphql_rate_limit(
+                    7, reset_epoch=1_003_600, report_used=False
+                )
+            )
+        )
+        [entry] = ledger.snapshot().values()
+        assert entry.cost == 1 + 1 + 4
+
+    def test_most_expensive(self):
+        ledger = metrics.CostLedger()
+        for template, count in [("/a", 1), ("/b", 3), ("/c", 2)]:
+            for _ in range(count):
+                ledger.request_finished(request_metrics(template=template))
+        ledger.request_finished(request_metrics(template="/a", status_code=304))
+        ranked = ledger.most_expensive()
+        assert [template for (_, template), _ in ranked] == ["/b", "/c", "/a"]
+        assert ledger.most_expensive(1) == ranked[:1]
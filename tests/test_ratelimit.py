@@ -0,0 +1,77 @@
+import pytest
+
+from gidgethub import ratelimit, sansio
+
+NOW = 1_000_000.0
+
+
+def rate_limit(remaining, *, limit=5000, reset_in=100, resource=None):
+    return sansio.RateLimit(
+        limit=limit, remaining=remaining, reset_epoch=NOW + reset_in, resource=resource
+    )
+
+
+class TestRateLimitScheduler:
+    """Tests for gidgethub.ratelimit.RateLimitScheduler."""
+
+    def test_plenty_remaining(self):
+        scheduler = ratelimit.RateLimitScheduler()
+        assert scheduler.delay(rate_limit(4999), NOW) == 0
+        assert scheduler.delayed_requests == 0
+
+    def test_pacing(self):
+        scheduler = ratelimit.RateLimitScheduler()
+        # 10 requests left over 100 seconds means one every 10 seconds.
+        assert scheduler.delay(rate_limit(10), NOW) == 0
+        assert scheduler.delay(rate_limit(9), NOW) == pytest.approx(10)
+        assert scheduler.delay(rate_limit(8), NOW + 10) == pytest.approx(100 / 9)
+        assert scheduler.delayed_requests == 2
+        assert scheduler.total_delay == pytest.approx(10 + 100 / 9)
+        assert scheduler.longest_delay == pytest.approx(100 / 9)
+
+    def test_threshold(self):
+        scheduler = ratelimit.RateLimitScheduler(threshold=0.5)
+        assert scheduler.delay(rate_limit(60, limit=100), NOW) == 0
+        assert scheduler.delay(rate_limit(40, limit=100), NOW) == 0
+        assert scheduler.delay(rate_limit(39, limit=100), NOW) > 0
+
+    def test_resources_paced_separately(self):
+        """A low search budget doesn't delay core requests."""
+        scheduler = ratelimit.RateLimitScheduler(threshold=0.5)
+        search = rate_limit(2, limit=30, reset_in=60, resource="search")
+        assert scheduler.delay(search, NOW) == 0
+        assert scheduler.delay(search, NOW) == pytest.approx(30)
+        core = rate_limit(2000, reset_in=3600, resource="core")
+        assert scheduler.delay(core, NOW) == 0
+        # A rate limit without a resource is the core one.
+        assert scheduler.delay(rate_limit(2000, reset_in=3600), NOW) == pytest.approx(
+            3600 / 2000
+        )
+
+    def test_invalid_threshold(self):
+        with pytest.raises(ValueError):
+            ratelimit.RateLimitScheduler(threshold=2)
+
+    def test_max_delay(self):
+        scheduler = ratelimit.RateLimitScheduler(max_delay=1)
+        scheduler.delay(rate_limit(2), NOW)
+        assert scheduler.delay(rate_limit(1), NOW) == 1
+
+    def test_exhausted(self):
+        scheduler = ratelimit.RateLimitScheduler()
+        assert scheduler.delay(rate_limit(0, reset_in=42), NOW) == 42
+        assert scheduler.longest_delay == 42
+
+    def test_reserve(self):
+        scheduler = ratelimit.RateLimitScheduler(reserve=10)
+        assert scheduler.delay(rate_limit(10, reset_in=42), NOW) == 42
+        assert scheduler.delay(rate_limit(11), NOW) == 0
+
+    def test_reset_passed(self):
+        scheduler = ratelimit.RateLimitScheduler()
+        assert scheduler.delay(rate_limit(0, reset_in=-1), NOW) == 0
+
+    def test_default_now(self):
+        scheduler = ratelimit.RateLimitScheduler()
+        limit = sansio.RateLimit(limit=5000, remaining=0, reset_epoch=0)
+        assert scheduler.delay(limit) == 0
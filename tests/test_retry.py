@@ -0,0 +1,170 @@
+import http
+import random
+
+import pytest
+
+from gidgethub import (
+    BadGraphQLRequest,
+    BadRequest,
+    GitHubBroken,
+    RateLimitExceeded,
+    retry,
+    sansio,
+)
+
+NOW = 1_000_000.0
+
+
+def forbidden(message="Forbidden", **headers):
+    return BadRequest(http.HTTPStatus.FORBIDDEN, message, headers=headers)
+
+
+class TestRetryAfter:
+    """Tests for gidgethub.retry._retry_after()."""
+
+    def test_missing(self):
+        assert retry._retry_after({}, NOW) is None
+
+    def test_seconds(self):
+        assert retry._retry_after({"retry-after": "30"}, NOW) == 30
+        assert retry._retry_after({"retry-after": "-5"}, NOW) == 0
+
+    def test_http_date(self):
+        headers = {"retry-after": "Mon, 12 Jan 1970 13:47:10 GMT"}
+        assert retry._retry_after(headers, NOW) == pytest.approx(30)
+
+    def test_http_date_no_timezone(self):
+        headers = {"retry-after": "Mon, 12 Jan 1970 13:47:10 -0000"}
+        assert retry._retry_after(headers, NOW) == pytest.approx(30)
+
+    def test_invalid(self):
+        assert retry._retry_after({"retry-after": "soon"}, NOW) is None
+
+
+class TestRetryPolicy:
+    """Tests for gidgethub.retry.RetryPolicy."""
+
+    def test_retry_after(self):
+        policy = retry.RetryPolicy()
+        exc = forbidden(
+            "You have exceeded a secondary rate limit", **{"retry-after": "30"}
+        )
+        assert policy.delay("GET", exc, 1, 0, NOW) == 30
+        assert policy.retries == 1
+        assert policy.total_wait == 30
+
+    def test_graphql(self):
+        policy = retry.RetryPolicy()
+        response = {"message": "You have exceeded a secondary rate limit."}
+        exc = BadGraphQLRequest(
+            http.HTTPStatus.FORBIDDEN, response, headers={"retry-after": "30"}
+        )
+        assert policy.delay("GET", exc, 1, 0, NOW) == 30
+        exc = BadGraphQLRequest(http.HTTPStatus.FORBIDDEN, response)
+        assert policy.delay("GET", exc, 1, 0, NOW) == 60
+        exc = BadGraphQLRequest(http.HTTPStatus.BAD_REQUEST, {"message": "Problems"})
+        assert policy.delay("GET", exc, 1, 0, NOW) is None
+
+    def test_too_many_requests(self):
+        policy = retry.RetryPolicy(secondary_rate_limit_wait=15)
+        exc = BadRequest(http.HTTPStatus.TOO_MANY_REQUESTS)
+        assert policy.delay("GET", exc, 1, 0, NOW) == 15
+
+    def test_secondary_rate_limit_message(self):
+        policy = retry.RetryPolicy()
+        exc = forbidden("You have exceeded a secondary rate limit.")
+        assert policy.delay("GET", exc, 1, 0, NOW) == 60
+
+    def test_primary_rate_limit(self):
+        policy = retry.RetryPolicy()
+        headers = {
+            "x-ratelimit-limit": "5000",
+            "x-ratelimit-remaining": "0",
+            "x-ratelimit-reset": str(NOW + 42),
+        }
+        exc = RateLimitExceeded(sansio.RateLimit.from_http(headers), headers=headers)
+        assert policy.delay("GET", exc, 1, 0, NOW) == 42
+
+    def test_primary_rate_limit_no_reset(self):
+        policy = retry.RetryPolicy()
+        exc = forbidden(**{"x-ratelimit-remaining": "0"})
+        assert policy.delay("GET", exc, 1, 0, NOW) == 60
+
+    def test_forbidden(self):
+        policy = retry.RetryPolicy()
+        assert policy.delay("GET", forbidden(), 1, 0, NOW) is None
+        assert policy.retries == 0
+
+    def test_other_errors(self):
+        policy = retry.RetryPolicy()
+        exc = BadRequest(http.HTTPStatus.NOT_FOUND, headers={"retry-after": "1"})
+        assert policy.delay("GET", exc, 1, 0, NOW) is None
+
+    def test_methods(self):
+        policy = retry.RetryPolicy()
+        exc = forbidden(**{"retry-after": "1"})
+        for method in ["GET", "get", "PUT", "DELETE"]:
+            assert policy.delay(method, exc, 1, 0, NOW) == 1
+        assert policy.delay("POST", exc, 1, 0, NOW) is None
+        policy = retry.RetryPolicy(methods={"POST"})
+        assert policy.delay("POST", exc, 1, 0, NOW) == 1
+
+    def test_max_wait(self):
+        policy = retry.RetryPolicy(max_wait=100)
+        exc = forbidden(**{"retry-after": "60"})
+        assert policy.delay("GET", exc, 1, 40, NOW) == 60
+        assert policy.delay("GET", exc, 1, 41, NOW) is None
+
+    def test_max_attempts(self):
+        policy = retry.RetryPolicy(max_attempts=3)
+        exc = forbidden(**{"retry-after": "1"})
+        assert policy.delay("GET", exc, 2, 0, NOW) == 1
+        assert policy.delay("GET", exc, 3, 0, NOW) is None
+
+    def test_server_error_backoff(self):
+        policy = retry.RetryPolicy(base_delay=2, max_delay=10, jitter=0)
+        exc = GitHubBroken(http.HTTPStatus.SERVICE_UNAVAILABLE)
+        assert policy.delay("GET", exc, 1, 0, NOW) == 2
+        assert policy.delay("GET", exc, 2, 0, NOW) == 4
+        assert policy.delay("GET", exc, 3, 0, NOW) == 8
+        assert policy.delay("GET", exc, 4, 0, NOW) == 10
+        assert policy.retries_by_cause == {"503": 4}
+
+    def test_server_error_not_transient(self):
+        policy = retry.RetryPolicy()
+        exc = GitHubBroken(http.HTTPStatus.NOT_IMPLEMENTED)
+        assert policy.delay("GET", exc, 1, 0, NOW) is None
+        policy = retry.RetryPolicy(statuses={501})
+        assert policy.delay("GET", exc, 1, 0, NOW) is not None
+
+    def test_transport_error(self):
+        policy = retry.RetryPolicy(base_delay=1, jitter=0)
+        exc = ConnectionResetError()
+        assert policy.delay("GET", exc, 1, 0, NOW) == 1
+        assert policy.retries_by_cause == {"ConnectionResetError": 1}
+
+    def test_jitter(self, monkeypatch):
+        policy = retry.RetryPolicy(base_delay=4, jitter=0.5)
+        exc = ConnectionResetError()
+        monkeypatch.setattr(random, "random", lambda: 1.0)
+        assert policy.delay("GET", exc, 1, 0, NOW) == 2
+        monkeypatch.setattr(random, "random", lambda: 0.0)
+        assert policy.delay("GET", exc, 1, 0, NOW) == 4
+
+    def test_invalid_jitter(self):
+        with pytest.raises(ValueError):
+            retry.RetryPolicy(jitter=1.5)
+
+    def test_counts(self):
+        policy = retry.RetryPolicy(jitter=0)
+        policy.delay("GET", forbidden(**{"retry-after": "30"}), 1, 0, NOW)
+        policy.delay("GET", GitHubBroken(http.HTTPStatus.BAD_GATEWAY), 1, 0, NOW)
+        policy.delay("GET", TimeoutError(), 2, 0, NOW)
+        assert policy.retries == 3
+        assert policy.total_wait == 33
+        assert policy.retries_by_cause == {"403": 1, "502": 1, "TimeoutError": 1}
+
+    def test_default_now(self):
+        policy = retry.RetryPolicy()
+        exc = forbidden(**{"retry-after": "1"})
+        assert policy.delay("GET", exc, 1, 0) == 1
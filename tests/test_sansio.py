@@ -1,7 +1,10 @@
 import datetime
+import gzip
 import http
 import json
 import pathlib
+import sys
+import zlib
 
 import pytest
 
@@ -15,6 +18,7 @@ from gidgethub import (
     RedirectionException,
     ValidationError,
     ValidationFailure,
+    codec,
     sansio,
 )
 
@@ -87,6 +91,24 @@ class TestEvent:
         event = sansio.Event.from_http(headers, body)
         assert event.data["zen"] == "Keep it logically awesome."
 
+    def test_from_http_json_codec(self):
+        json_codec = RecordingCodec()
+        event = sansio.Event.from_http(
+            self.headers, self.data_bytes, secret=self.secret, json_codec=json_codec
+        )
+        self.check_event(event)
+        assert json_codec.decoded == 1
+
+    def test_from_http_buffers(self):
+        for body in [bytearray(self.data_bytes), memoryview(self.data_bytes)]:
+            event = sansio.Event.from_http(self.headers, body, secret=self.secret)
+            self.check_event(event)
+
+    def test_from_http_urlencoded_buffer(self):
+        headers, body = sample("ping_urlencoded", 200)
+        event = sansio.Event.from_http(headers, memoryview(body))
+        assert event.event == "ping"
+
     def test_from_http_no_content_type(self):
         """Only accept data when content-type is application/json."""
         headers_no_content_type = self.headers.copy()
@@ -205,6 +227,100 @@ class TestCreateHeaders:
             sansio.create_headers(user_agent, oauth_token=oauth_token, jwt=jwt)
         assert str(exc_info.value) == "Cannot pass both oauth_token and jwt."
 
+    def test_accept_encoding(self):
+        headers = sansio.create_headers("brettcannon")
+        assert "accept-encoding" not in headers
+        headers = sansio.create_headers("brettcannon", accept_encoding="gzip")
+        assert headers["accept-encoding"] == "gzip"
+
+
+class FakeBrotli:
+    """Stand in for the brotli package, "compressing" by swapping case."""
+
+    class Decompressor:
+        def process(self, data):
+            return data.swapcase()
+
+
+@pytest.fixture
+def brotli(monkeypatch):
+    """Make the fake brotli package importable."""
+    monkeypatch.setitem(sys.modules, "brotli", FakeBrotli)
+    sansio._brotli.cache_clear()
+    yield FakeBrotli
+    sansio._brotli.cache_clear()
+
+
+@pytest.fixture
+def no_brotli(monkeypatch):
+    """Make neither brotli nor brotlicffi importable."""
+    monkeypatch.setitem(sys.modules, "brotli", None)
+    monkeypatch.setitem(sys.modules, "brotlicffi", None)
+    sansio._brotli.cache_clear()
+    yield
+    sansio._brotli.cache_clear()
+
+
+class TestAcceptEncoding:
+    """Tests for gidgethub.sansio.accept_encoding()."""
+
+    def test_without_brotli(self, no_brotli):
+        assert sansio.accept_encoding() == "gzip, deflate"
+
+    def test_with_brotli(self, brotli):
+        assert sansio.accept_encoding() == "gzip, deflate, br"
+
+
+class TestDecompressor:
+    """Tests for gidgethub.sansio.Decompressor."""
+
+    DATA = b'[{"title": "compressible"}, ' * 1000 + b"{}]"
+
+    def decompress_chunks(self, decompressor, body, size=100):
+        chunks = [body[i : i + size] for i in range(0, len(body), size)]
+        data = b"".join(decompressor.decompress(chunk) for chunk in chunks)
+        return data + decompressor.decompress(b"", final=True)
+
+    def test_identity(self):
+        for content_encoding in [None, "", "identity"]:
+            decompressor = sansio.Decompressor(content_encoding)
+            body = memoryview(self.DATA)
+            assert decompressor.decompress(body, final=True) is body
+            assert decompressor.compressed_size == len(self.DATA)
+            assert decompressor.decompressed_size == len(self.DATA)
+
+    def test_gzip(self):
+        body = gzip.compress(self.DATA)
+        for content_encoding in ["gzip", "x-gzip", "GZIP"]:
+            decompressor = sansio.Decompressor(content_encoding)
+            assert self.decompress_chunks(decompressor, body) == self.DATA
+            assert decompressor.compressed_size == len(body)
+            assert decompressor.decompressed_size == len(self.DATA)
+
+    def test_deflate(self):
+        body = zlib.compress(self.DATA)
+        decompressor = sansio.Decompressor("deflate")
+        assert self.decompress_chunks(decompressor, body) == self.DATA
+
+    def test_brotli(self, brotli):
+        decompressor = sansio.Decompressor("br")
+        body = self.DATA.swapcase()
+        assert self.decompress_chunks(decompressor, body) == self.DATA
+
+    def test_brotli_not_installed(self, no_brotli):
+        with pytest.raises(ValueError):
+            sansio.Decompressor("br")
+
+    def test_multiple_codings(self):
+        body = gzip.compress(zlib.compress(self.DATA))
+        decompressor = sansio.Decompressor("deflate, identity, gzip")
+        assert self.decompress_chunks(decompressor, body) == self.DATA
+        assert decompressor.compressed_size == len(body)
+
+    def test_unsupported(self):
+        with pytest.raises(ValueError):
+            sansio.Decompressor("compress")
+
 
 class TestRateLimit:
     def test_init(self):
@@ -250,6 +366,21 @@ class TestRateLimit:
         assert rate_limit.limit == rate
         assert rate_limit.remaining == left
         assert rate_limit.reset_datetime == reset
+        assert rate_limit.used is None
+        assert rate_limit.resource is None
+
+    def test_from_http_used(self):
+        headers = {
+            "x-ratelimit-limit": "5000",
+            "x-ratelimit-remaining": "4990",
+            "x-ratelimit-reset": "1000000",
+            "x-ratelimit-used": "10",
+            "x-ratelimit-resource": "graphql",
+        }
+        rate_limit = sansio.RateLimit.from_http(headers)
+        assert rate_limit is not None
+        assert rate_limit.used == 10
+        assert rate_limit.resource == "graphql"
 
     def test___str__(self):
         left = 4200
@@ -268,6 +399,17 @@ class TestRateLimit:
         assert rate_limit is None
 
 
+class RecordingCodec(codec.StdlibJSONCodec):
+    """Count how often JSON is decoded."""
+
+    def __init__(self):
+        self.decoded = 0
+
+    def decode(self, data):
+        self.decoded += 1
+        return super().decode(data)
+
+
 def sample(directory, status_code):
     # pytest doesn't set __spec__.origin :(
     sample_dir = pathlib.Path(__file__).parent / "samples" / directory
@@ -281,6 +423,42 @@ def sample(directory, status_code):
 class TestDecipherResponse:
     """Tests for gidgethub.sansio.decipher_response()."""
 
+    def test_json_codec(self):
+        headers, body = sample("pr_page_1", 200)
+        json_codec = RecordingCodec()
+        data, _, _ = sansio.decipher_response(200, headers, body, json_codec=json_codec)
+        assert data == json.loads(body)
+        assert json_codec.decoded == 1
+
+    def test_json_bytes(self):
+        """UTF-8 JSON is handed to the codec without first copying it to a str."""
+        headers, body = sample("pr_single", 200)
+        decoded = []
+
+        class Codec(codec.StdlibJSONCodec):
+            def decode(self, data):
+                decoded.append(data)
+                return super().decode(data)
+
+        for buffer in [body, bytearray(body), memoryview(body)]:
+            data, _, _ = sansio.decipher_response(
+                200, headers, buffer, json_codec=Codec()
+            )
+            assert data == json.loads(body)
+            assert decoded.pop() is buffer
+
+    def test_json_other_charset(self):
+        headers = {"content-type": "application/json; charset=latin-1"}
+        body = '{"title": "Café"}'.encode("latin-1")
+        for buffer in [body, bytearray(body), memoryview(body)]:
+            data, _, _ = sansio.decipher_response(200, headers, buffer)
+            assert data == {"title": "Café"}
+
+    def test_text_buffer(self):
+        headers = {"content-type": "text/plain; charset=utf-8"}
+        data, _, _ = sansio.decipher_response(200, headers, memoryview(b"diff"))
+        assert data == "diff"
+
     def test_5XX(self):
         status_code = 502
         with pytest.raises(GitHubBroken) as exc_info:
@@ -587,6 +765,156 @@ class TestDecipherResponse:
         assert returned_data == data
 
 
+class TestPagination:
+    """Tests for the pagination helpers in gidgethub.sansio."""
+
+    def test_last_link(self):
+        headers, _ = sample("pr_page_1", 200)
+        last = sansio._last_link(headers["link"])
+        assert last == "https://api.github.com/repositories/4164482/pulls?page=4"
+
+    def test_no_last_link(self):
+        headers, _ = sample("pr_page_last", 200)
+        assert sansio._last_link(headers["link"]) is None
+        assert sansio._last_link(None) is None
+
+    def test_page_urls(self):
+        urls = sansio._page_urls(
+            "https://api.github.com/repositories/4164482/pulls?page=2",
+            "https://api.github.com/repositories/4164482/pulls?page=4",
+        )
+        assert urls == [
+            "https://api.github.com/repositories/4164482/pulls?page=2",
+            "https://api.github.com/repositories/4164482/pulls?page=3",
+            "https://api.github.com/repositories/4164482/pulls?page=4",
+        ]
+
+    def test_page_urls_other_parameters(self):
+        next_url = "https://api.github.com/fake{/extra}?q=a&page=3&per_page=3"
+        last_url = "https://api.github.com/fake{/extra}?q=a&page=4&per_page=3"
+        urls = sansio._page_urls(next_url, last_url)
+        assert urls == [next_url, last_url]
+
+    def test_page_urls_last_before_next(self):
+        next_url = "https://api.github.com/fake?page=3"
+        last_url = "https://api.github.com/fake?page=2"
+        assert sansio._page_urls(next_url, last_url) == [next_url]
+
+    def test_page_urls_cursor(self):
+        next_url = "https://api.github.com/fake?after=abc"
+        last_url = "https://api.github.com/fake?before=xyz"
+        assert sansio._page_urls(next_url, last_url) is None
+
+    def test_page_urls_mismatch(self):
+        next_url = "https://api.github.com/fake?page=2&per_page=3"
+        last_url = "https://api.github.com/fake?page=4&per_page=100"
+        assert sansio._page_urls(next_url, last_url) is None
+
+
+def decode_items(content_type, body, iterable_key="items", chunk_size=None):
+    decoder = sansio._ItemDecoder(content_type, iterable_key)
+    chunk_size = chunk_size or len(body) or 1
+    items = []
+    for start in range(0, len(body), chunk_size):
+        items.extend(decoder.feed(body[start : start + chunk_size]))
+    items.extend(decoder.close())
+    return items
+
+
+class TestItemDecoder:
+    """Tests for gidgethub.sansio._ItemDecoder."""
+
+    @pytest.mark.parametrize("chunk_size", [61, 4096, None])
+    def test_array(self, chunk_size):
+        headers, body = sample("pr_page_1", 200)
+        items = decode_items(headers["content-type"], body, chunk_size=chunk_size)
+        assert items == json.loads(body)
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, None])
+    def test_iterable_key(self, chunk_size):
+        data = {
+            "total_count": 3,
+            "incomplete_results": False,
+            "items": [{"number": 1}, "two", 3.5],
+            "after": [{"ignored": True}],
+        }
+        body = json.dumps(data, indent=2).encode("utf-8")
+        items = decode_items("application/json", body, chunk_size=chunk_size)
+        assert items == [{"number": 1}, "two", 3.5]
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, None])
+    def test_scalars(self, chunk_size):
+        """Values which end at the end of a chunk aren't decoded too early."""
+        data = [12345, -1.5e10, "été", None, True, [], {"a": "]}"}]
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        items = decode_items("application/json", body, chunk_size=chunk_size)
+        assert items == data
+
+    def test_incremental(self):
+        decoder = sansio._ItemDecoder("application/json", None)
+        assert decoder.feed(b'[{"id": 1}, {"id"') == [{"id": 1}]
+        assert decoder.feed(b": 2}, 3") == [{"id": 2}]
+        assert decoder.feed(b"]") == [3]
+        assert list(decoder.close()) == []
+
+    @pytest.mark.parametrize(
+        "data", [{"total_count": 0}, {}, {"items": "not a list"}, "not a page"]
+    )
+    def test_not_items(self, data):
+        body = json.dumps(data).encode("utf-8")
+        expected = sansio._page_items(json.loads(body), "items")
+        for chunk_size in [1, None]:
+            items = decode_items("application/json", body, chunk_size=chunk_size)
+            assert items == list(expected)
+
+    def test_no_iterable_key(self):
+        body = b'{"items": [1, 2]}'
+        assert decode_items("application/json", body, None, 1) == ["items"]
+
+    def test_not_json(self):
+        body = b"diff --git a/README b/README"
+        items = decode_items("text/plain", body, chunk_size=4)
+        assert "".join(items) == body.decode("utf-8")
+
+    def test_not_items_json_codec(self):
+        json_codec = RecordingCodec()
+        decoder = sansio._ItemDecoder(
+            "application/json", "items", json_codec=json_codec
+        )
+        decoder.feed(b'"not a page"')
+        assert list(decoder.close()) == list("not a page")
+        assert json_codec.decoded == 1
+
+    def test_empty(self):
+        decoder = sansio._ItemDecoder("application/json", "items")
+        assert decoder.feed(b"") == []
+        assert decoder.close() is None
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            b"[1.]",
+            b"[nul]",
+            b"[,1]",
+            b"[1 2]",
+            b"[1, 2",
+            b"[1] []",
+            b'{"items": [1]',
+            b'{"items": [1],}',
+            b'{"items" [1]}',
+            b'{"items": }',
+            b"{1: 2}",
+            b'{"a": 1 "b": 2}',
+            b"[1.]",
+            b"[nul]",
+        ],
+    )
+    @pytest.mark.parametrize("chunk_size", [1, None])
+    def test_invalid(self, body, chunk_size):
+        with pytest.raises(ValueError):
+            decode_items("application/json", body, chunk_size=chunk_size)
+
+
 class TestFormatUrl:
     """Tests for gidgethub.sansio.format_url()."""
 
@@ -645,6 +973,26 @@ class TestFormatUrl:
         )
         assert url == "https://my.host.com/users/octocat/gists/1234"
 
+    def test_template_reused(self):
+        template_url = "/repos/brettcannon/gidgethub/issues{/number}"
+        sansio.format_url(template_url, {"number": 1})
+        hits = sansio._url_template.cache_info().hits
+        url = sansio.format_url(template_url, {"number": 2})
+        assert url == "https://api.github.com/repos/brettcannon/gidgethub/issues/2"
+        assert sansio._url_template.cache_info().hits == hits + 1
+
+    def test_absolute_url_not_cached(self):
+        """Absolute URLs with nothing to expand, e.g. "next" links, aren't cached."""
+        url = "https://api.github.com/repositories/1/issues?page=2"
+        misses = sansio._url_template.cache_info().misses
+        assert sansio.format_url(url, {}) == url
+        assert sansio.format_url(url, {"page": 3}) == url
+        assert sansio._url_template.cache_info().misses == misses
+
+    def test_no_url_vars(self):
+        url = sansio.format_url("/notifications{?all}", None)
+        assert url == "https://api.github.com/notifications"
+
     @pytest.mark.parametrize(
         "base_url", ["https://api.github.com", "https://my.host.com"]
     )
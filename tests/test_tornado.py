@@ -1,9 +1,17 @@
+import asyncio
 import datetime
+import gzip
+import io
+import json
 
 import pytest
 import tornado
+import tornado.iostream
+import tornado.web
 
-from tornado.testing import AsyncTestCase
+from tornado import httpclient
+
+from tornado.testing import AsyncHTTPTestCase, AsyncTestCase
 
 from gidgethub import BadRequest
 from gidgethub import sansio
@@ -49,3 +57,202 @@ class TornadoTestCase(AsyncTestCase):
         gh = gh_tornado.GitHubAPI("gidgethub")
         data = await gh.getitem("/rate_limit")
         assert "rate" in data
+
+
+class DiffHandler(tornado.web.RequestHandler):
+    async def get(self):
+        self.set_header("content-type", "text/plain")
+        for chunk in [b"diff ", b"--git"]:
+            self.write(chunk)
+            await self.flush()
+
+
+@tornado.web.stream_request_body
+class UploadHandler(tornado.web.RequestHandler):
+    def prepare(self):
+        self.chunks = []
+
+    def data_received(self, chunk):
+        self.chunks.append(chunk)
+
+    def post(self):
+        self.write(
+            {
+                "body": b"".join(self.chunks).decode(),
+                "content-length": self.request.headers.get("content-length"),
+            }
+        )
+
+
+class CompressedHandler(tornado.web.RequestHandler):
+    def get(self):
+        data = {"accept-encoding": self.request.headers["accept-encoding"]}
+        self.set_header("content-type", "application/json")
+        self.set_header("content-encoding", "gzip")
+        self.write(gzip.compress(json.dumps(data).encode()))
+
+
+class SlowHandler(tornado.web.RequestHandler):
+    async def get(self):
+        await asyncio.sleep(1)
+        self.write({})
+
+
+class LargeHandler(tornado.web.RequestHandler):
+    CHUNK = b"x" * 64 * 1024
+    CHUNKS = 800
+    written = 0
+
+    async def get(self):
+        type(self).written = 0
+        self.set_header("content-length", str(len(self.CHUNK) * self.CHUNKS))
+        try:
+            for _ in range(self.CHUNKS):
+                self.write(self.CHUNK)
+                await self.flush()
+                type(self).written += len(self.CHUNK)
+        except tornado.iostream.StreamClosedError:
+            pass
+
+
+class TornadoStreamTestCase(AsyncHTTPTestCase):
+    def get_app(self):
+        return tornado.web.Application(
+            [
+                ("/diff", DiffHandler),
+                ("/upload", UploadHandler),
+                ("/compressed", CompressedHandler),
+                ("/slow", SlowHandler),
+                ("/large", LargeHandler),
+            ]
+        )
+
+    @tornado.testing.gen_test
+    async def test_getstream(self):
+        gh = gh_tornado.GitHubAPI("gidgethub")
+        chunks = [chunk async for chunk in gh.getstream(self.get_url("/diff"))]
+        assert b"".join(chunks) == b"diff --git"
+
+    @tornado.testing.gen_test
+    async def test_getstream_error(self):
+        gh = gh_tornado.GitHubAPI("gidgethub")
+        with pytest.raises(BadRequest):
+            async for _ in gh.getstream(self.get_url("/missing")):
+                pass  # pragma: no cover
+
+    @tornado.testing.gen_test
+    async def test_getstream_connection_refused(self):
+        gh = gh_tornado.GitHubAPI("gidgethub")
+        with pytest.raises(gh.transport_errors):
+            async for _ in gh.getstream("http://127.0.0.1:1/"):
+                pass  # pragma: no cover
+
+    @tornado.testing.gen_test
+    async def test_getstream_close_early(self):
+        gh = gh_tornado.GitHubAPI("gidgethub")
+        stream = gh.getstream(self.get_url("/large"))
+        assert await stream.__anext__()
+        await stream.aclose()
+        # Let the server write until the client aborts the transfer.
+        for _ in range(50):
+            await asyncio.sleep(0.02)
+        total = len(LargeHandler.CHUNK) * LargeHandler.CHUNKS
+        assert LargeHandler.written < total / 2
+
+    @tornado.testing.gen_test
+    async def test_getstream_close_early_curl(self):
+        pytest.importorskip("tornado.curl_httpclient")
+        client = gh_tornado.create_client(curl=True)
+        try:
+            gh = gh_tornado.GitHubAPI("gidgethub", client=client)
+            stream = gh.getstream(self.get_url("/large"))
+            assert await stream.__anext__()
+            await stream.aclose()
+            # The rest of the body is discarded rather than buffered.
+            data = await gh.getitem(self.get_url("/compressed"))
+        finally:
+            client.close()
+        assert data == {"accept-encoding": sansio.accept_encoding()}
+
+    @tornado.testing.gen_test
+    async def test_upload_curl(self):
+        pytest.importorskip("tornado.curl_httpclient")
+
+        async def chunks():
+            for chunk in [b"art", b"ifact"]:
+                yield chunk
+
+        client = gh_tornado.create_client(curl=True)
+        try:
+            gh = gh_tornado.GitHubAPI("gidgethub", client=client)
+            url = self.get_url("/upload")
+            from_file = await gh.post(
+                url, data=io.BytesIO(b"artifact"), content_type="text/plain"
+            )
+            from_iterable = await gh.post(url, data=chunks(), content_type="text/plain")
+        finally:
+            client.close()
+        assert from_file == {"body": "artifact", "content-length": "8"}
+        assert from_iterable == {"body": "artifact", "content-length": "8"}
+
+    @tornado.testing.gen_test
+    async def test_upload(self):
+        async def chunks():
+            for chunk in [b"art", b"ifact"]:
+                yield chunk
+
+        gh = gh_tornado.GitHubAPI("gidgethub")
+        url = self.get_url("/upload")
+        from_file = await gh.post(
+            url, data=io.BytesIO(b"artifact"), content_type="text/plain"
+        )
+        from_iterable = await gh.post(url, data=chunks(), content_type="text/plain")
+        assert from_file == {"body": "artifact", "content-length": "8"}
+        assert from_iterable == {"body": "artifact", "content-length": None}
+
+    @tornado.testing.gen_test
+    async def test_compression(self):
+        gh = gh_tornado.GitHubAPI("gidgethub")
+        url = self.get_url("/compressed")
+        data = await gh.getitem(url)
+        chunks = [chunk async for chunk in gh.getstream(url)]
+        assert data == {"accept-encoding": sansio.accept_encoding()}
+        assert json.loads(b"".join(chunks)) == data
+        assert 0 < gh.bytes_received != gh.bytes_decompressed
+
+    @tornado.testing.gen_test
+    async def test_create_client(self):
+        client = gh_tornado.create_client(max_clients=2, connect_timeout=5)
+        try:
+            assert client is not httpclient.AsyncHTTPClient()
+            assert client.max_clients == 2
+            assert client.defaults["connect_timeout"] == 5
+            gh = gh_tornado.GitHubAPI("gidgethub", client=client)
+            data = await gh.getitem(self.get_url("/compressed"))
+        finally:
+            client.close()
+        assert data == {"accept-encoding": sansio.accept_encoding()}
+
+    @tornado.testing.gen_test
+    async def test_create_client_curl(self):
+        curl_httpclient = pytest.importorskip("tornado.curl_httpclient")
+        client = gh_tornado.create_client(max_clients=2, curl=True)
+        try:
+            assert isinstance(client, curl_httpclient.CurlAsyncHTTPClient)
+            gh = gh_tornado.GitHubAPI("gidgethub", client=client)
+            data = await gh.getitem(self.get_url("/compressed"))
+            chunks = [chunk async for chunk in gh.getstream(self.get_url("/diff"))]
+        finally:
+            client.close()
+        assert data == {"accept-encoding": sansio.accept_encoding()}
+        assert b"".join(chunks) == b"diff --git"
+
+    @tornado.testing.gen_test
+    async def test_request_timeout(self):
+        gh = gh_tornado.GitHubAPI("gidgethub", request_timeout=0.1)
+        with pytest.raises(httpclient.HTTPClientError) as exc_info:
+            await gh.getitem(self.get_url("/slow"))
+        assert "Timeout" in str(exc_info.value)
+        with pytest.raises(httpclient.HTTPClientError):
+            async for _ in gh.getstream(self.get_url("/slow")):
+                pass  # pragma: no cover